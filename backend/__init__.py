@@ -4,14 +4,17 @@ ZugaCloud Backend Package
 
 from flask import Flask
 from flask_cors import CORS
-from .auth import auth_bp, init_auth
-from .api.routes import api_bp  # Import the API blueprint
 import logging
 
 logger = logging.getLogger(__name__)
 
 def create_app():
     """Create and configure the Flask application"""
+    # Imported here: the routes build the storage integration, and worker
+    # processes that import backend.* for other modules must not pay for that
+    from .auth import auth_bp, init_auth
+    from .api.routes import api_bp  # Import the API blueprint
+
     try:
         app = Flask(__name__)
         CORS(app)
@@ -1,11 +1,13 @@
 from flask import Blueprint, jsonify, request
 from ..aws.aws_integration import aws_integration
+import gzip
 import logging
 from urllib.parse import unquote
 from ..api_requests import (
     ConfigHandler,
     FileHandler,
     SyncHandler,
+    ThumbnailHandler,
     AuthHandler,
     HealthHandler,
     BucketHandler,
@@ -13,13 +15,22 @@ from ..api_requests import (
 )
 from ..auth.auth import login_required
 
+try:
+    import brotli  # Optional: smaller bodies than gzip for large listings
+except ImportError:
+    brotli = None
+
 logger = logging.getLogger(__name__)
 api_bp = Blueprint('api', __name__)
 
+# JSON bodies below this size are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
 # Initialize handlers
 config_handler = ConfigHandler(aws_integration)
 file_handler = FileHandler(aws_integration)
 sync_handler = SyncHandler(aws_integration)
+thumbnail_handler = ThumbnailHandler(aws_integration)
 auth_handler = AuthHandler(aws_integration)
 health_handler = HealthHandler(aws_integration)
 bucket_handler = BucketHandler(aws_integration)
@@ -50,7 +61,38 @@ def list_files():
     try:
         path = request.args.get('path', '/')
         bucket = request.args.get('bucket')
-        return file_handler.list_files(path, bucket)
+        stream_format = request.args.get('stream')
+        if not stream_format and request.accept_mimetypes.best == 'application/x-ndjson':
+            stream_format = 'ndjson'
+        if stream_format:
+            return file_handler.list_files_stream(path, bucket, stream_format)
+        return file_handler.list_files(
+            path,
+            bucket,
+            page_size=request.args.get('pageSize', type=int),
+            token=request.args.get('continuationToken'),
+            sort=request.args.get('sort', 'name'),
+            order=request.args.get('order', 'asc')
+        )
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/search', methods=['GET'])
+def search_files():
+    try:
+        return file_handler.search_files(
+            request.args.get('q'),
+            request.args.get('bucket'),
+            all_buckets=request.args.get('allBuckets', '').lower() == 'true',
+            prefix=request.args.get('prefix'),
+            ext=request.args.getlist('ext') or None,
+            min_size=request.args.get('minSize', type=int),
+            max_size=request.args.get('maxSize', type=int),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            limit=request.args.get('limit', type=int),
+            offset=request.args.get('offset', 0, type=int)
+        )
     except APIException as e:
         return jsonify({'error': e.message}), e.status_code
 
@@ -101,6 +143,47 @@ def stream_file(file_key):
     except APIException as e:
         return jsonify({'error': e.message}), e.status_code
 
+@api_bp.route('/files/local/<path:file_key>', methods=['GET'])
+def serve_local_file(file_key):
+    try:
+        return file_handler.serve_local_file(file_key)
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/proxy/<path:file_key>', methods=['GET'])
+def proxy_file(file_key):
+    try:
+        return file_handler.proxy_file(file_key)
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/stream', methods=['POST'])
+def stream_files():
+    try:
+        data = request.json
+        if not data or 'keys' not in data:
+            return jsonify({'error': 'No keys provided'}), 400
+        return file_handler.stream_files(data['keys'], data.get('bucket'))
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/hls/<path:file_key>', methods=['GET'])
+def get_hls_playlist(file_key):
+    try:
+        return file_handler.get_hls_playlist(file_key, request.args.get('rendition'))
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/hls', methods=['POST'])
+def package_hls():
+    try:
+        data = request.json
+        if not data or 'key' not in data:
+            return jsonify({'error': 'No key provided'}), 400
+        return file_handler.package_hls(data['key'])
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
 @api_bp.route('/files/info', methods=['GET'])
 def get_file_info():
     try:
@@ -109,6 +192,16 @@ def get_file_info():
     except APIException as e:
         return jsonify({'error': e.message}), e.status_code
 
+@api_bp.route('/files/info', methods=['POST'])
+def get_files_info():
+    try:
+        data = request.json
+        if not data or 'keys' not in data:
+            return jsonify({'error': 'No keys provided'}), 400
+        return file_handler.get_files_info(data['keys'], data.get('bucket'))
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
 @api_bp.route('/files/local', methods=['DELETE'])
 def delete_local_file():
     try:
@@ -138,6 +231,76 @@ def check_local_file():
         return file_handler.check_local_file(data['path'])
     except APIException as e:
         return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/local/check-batch', methods=['POST'])
+def check_local_files():
+    try:
+        data = request.json
+        if not data or 'keys' not in data:
+            return jsonify({'error': 'No keys provided'}), 400
+        return file_handler.check_local_files(data['keys'])
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/files/prefetch', methods=['POST'])
+def prefetch_files():
+    try:
+        data = request.json
+        if not data or 'keys' not in data:
+            return jsonify({'error': 'No keys provided'}), 400
+        return file_handler.prefetch_files(data['keys'])
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/request', methods=['POST'])
+def request_thumbnails():
+    try:
+        data = request.json
+        if not data or 'keys' not in data:
+            return jsonify({'error': 'No keys provided'}), 400
+        return thumbnail_handler.request_thumbnails(data['keys'])
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/backfill', methods=['POST'])
+def backfill_thumbnails():
+    try:
+        data = request.get_json(silent=True) or {}
+        return thumbnail_handler.backfill_thumbnails(data.get('prefix'))
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/status', methods=['GET'])
+def thumbnail_status():
+    try:
+        return thumbnail_handler.thumbnail_status()
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/sprites', methods=['POST'])
+def sprite_index():
+    try:
+        data = request.json
+        if not data or ('keys' not in data and 'prefix' not in data):
+            return jsonify({'error': 'No keys provided'}), 400
+        return thumbnail_handler.sprite_index(data.get('keys'), data.get('prefix'))
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/sprites/<name>', methods=['GET'])
+def serve_sprite_sheet(name):
+    try:
+        return thumbnail_handler.serve_sprite_sheet(name)
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
+@api_bp.route('/thumbnails/scrub/<path:file_key>', methods=['GET'])
+def scrub_index(file_key):
+    try:
+        return thumbnail_handler.scrub_index(file_key)
+    except APIException as e:
+        return jsonify({'error': e.message}), e.status_code
+
 # Add error handlers
 @api_bp.errorhandler(APIException)
 def handle_api_error(error):
@@ -148,3 +311,36 @@ def handle_error(error):
     logger.error(f"Unhandled error: {str(error)}")
     return jsonify({'error': str(error)}), 500
 
+@api_bp.after_request
+def finalize_response(response):
+    """Add validators, answer conditional GETs with 304 and compress large JSON"""
+    if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+            or response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json'):
+        return response
+
+    if not response.get_etag()[0]:
+        # Weak so the same validator holds for every Content-Encoding
+        response.add_etag(weak=True)
+    response.make_conditional(request)
+    if response.status_code == 200:
+        compress_response(response)
+    response.vary.add('Accept-Encoding')
+    return response
+
+def compress_response(response):
+    """Encode the body with brotli or gzip if the client accepts it"""
+    if 'Content-Encoding' in response.headers:
+        return
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=5))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=6))
+    else:
+        return
+    response.headers['Content-Encoding'] = encoding
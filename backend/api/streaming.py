@@ -0,0 +1,60 @@
+# File: backend/api/streaming.py
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Entries are batched into chunks of about this size before being written
+CHUNK_SIZE = 64 * 1024
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _batched(pieces, chunk_size):
+    """Join small string pieces into byte chunks of roughly chunk_size"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def ndjson_chunks(items, chunk_size=CHUNK_SIZE):
+    """Encode items as newline-delimited JSON; a failure becomes a final error line.
+
+    Nothing is read from items until the server asks for the next chunk, so a
+    slow client holds back the listing instead of letting it pile up.
+    """
+    def lines():
+        try:
+            for item in items:
+                yield _dumps(item) + '\n'
+        except Exception as e:
+            logger.error(f"Error while streaming listing: {e}")
+            yield _dumps({'error': str(e)}) + '\n'
+
+    return _batched(lines(), chunk_size)
+
+
+def json_array_chunks(items, key='files', extra=None, chunk_size=CHUNK_SIZE):
+    """Encode items as {**extra, key: [...]} incrementally.
+
+    A failure mid-stream ends the response early, leaving the JSON
+    unterminated so clients cannot mistake it for a complete listing.
+    """
+    def pieces():
+        head = _dumps(extra or {})
+        yield (head[:-1] + ',' if len(head) > 2 else '{') + _dumps(key) + ':['
+        for i, item in enumerate(items):
+            yield (',' if i else '') + _dumps(item)
+        yield ']}'
+
+    return _batched(pieces(), chunk_size)
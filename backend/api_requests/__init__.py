@@ -12,6 +12,7 @@ from .handlers import (
     ConfigHandler,
     FileHandler,
     SyncHandler,
+    ThumbnailHandler,
     AuthHandler,
     HealthHandler,
     BucketHandler
@@ -31,6 +32,7 @@ __all__ = [
     'ConfigHandler',
     'FileHandler',
     'SyncHandler',
+    'ThumbnailHandler',
     'AuthHandler',
     'HealthHandler',
     'BucketHandler'
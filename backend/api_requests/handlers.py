@@ -1,7 +1,10 @@
-from flask import jsonify, request, send_from_directory
+from flask import Response, jsonify, request, send_file, stream_with_context, url_for
 import logging
 import os
+import re
 import json
+import uuid
+import hashlib
 import boto3
 import queue
 from urllib.parse import unquote
@@ -14,11 +17,20 @@ from .exceptions import (
     SyncError,
     ValidationError
 )
+from ..api.streaming import ndjson_chunks, json_array_chunks
+from ..aws.listing_handler import normalize_prefix
 from ..aws.s3_client import S3Client  # Import for temporary client creation
 from ..aws.storj_client import StorjClient  # Import for temporary client creation
 
 logger = logging.getLogger(__name__)
 
+# Listing versions restart with the process, so validators carry a per-process id
+_INSTANCE_ID = uuid.uuid4().hex
+
+MAX_SPRITE_KEYS = 1000
+SPRITE_NAME = re.compile(r'[0-9a-f]{16}\.jpg')
+SPRITE_MAX_AGE = 365 * 24 * 3600
+
 class BaseHandler:
     """Base class for all request handlers"""
     def __init__(self, aws_integration):
@@ -64,72 +76,117 @@ class BucketHandler(BaseHandler):
             
             # Check if a specific provider is requested
             provider = request.args.get('provider')
-            
-            # If provider is specified, temporarily switch to it
             current_provider = self.aws_integration.storage_provider
-            original_client = self.aws_integration.s3_client
-            temp_client = None
             
-            try:
-                # If a specific provider is requested and it's different from current
-                if provider and provider != current_provider:
-                    logger.debug(f"Temporarily switching to {provider} provider for bucket listing")
-                    
-                    if provider == 'storj':
-                        temp_client = StorjClient(self.aws_integration.config)
-                    elif provider == 'aws':
-                        temp_client = S3Client(self.aws_integration.config)
-                    
-                    # Use the temporary client if it was successfully created
-                    s3_client = temp_client.client if temp_client and temp_client.client else self.aws_integration.s3
-                else:
-                    # Use the current client
-                    s3_client = self.aws_integration.s3
+            buckets = self.aws_integration.provider_cache.get_or_load(
+                'buckets',
+                (provider or current_provider, current_provider),
+                lambda: self._fetch_buckets(provider, current_provider)
+            )
+            return jsonify(buckets)
+            
+        except Exception as e:
+            logger.error(f"Error listing buckets: {e}")
+            raise BucketOperationError(str(e))
+
+    def _fetch_buckets(self, provider, current_provider):
+        """List buckets from the provider, using a temporary client for another provider"""
+        temp_client = None
+        try:
+            # If a specific provider is requested and it's different from current
+            if provider and provider != current_provider:
+                logger.debug(f"Temporarily switching to {provider} provider for bucket listing")
                 
-                # List buckets using the selected client
-                response = s3_client.list_buckets()
-                buckets = []
+                if provider == 'storj':
+                    temp_client = StorjClient(self.aws_integration.config)
+                elif provider == 'aws':
+                    temp_client = S3Client(self.aws_integration.config)
                 
-                # Format bucket list with additional metadata
-                for bucket in response.get('Buckets', []):
-                    bucket_info = {
-                        'name': bucket['Name'],
-                        'creation_date': bucket['CreationDate'].isoformat() if 'CreationDate' in bucket else None,
-                    }
-                    
-                    # Mark zugacloud bucket as recommended for Storj
-                    if (provider == 'storj' or current_provider == 'storj') and bucket['Name'] == 'zugacloud':
-                        bucket_info['recommended'] = True
-                        bucket_info['description'] = 'Recommended Storj bucket'
-                    
-                    buckets.append(bucket_info)
+                # Use the temporary client if it was successfully created
+                s3_client = temp_client.client if temp_client and temp_client.client else self.aws_integration.s3
+            else:
+                # Use the current client
+                s3_client = self.aws_integration.s3
+            
+            # List buckets using the selected client
+            response = s3_client.list_buckets()
+            buckets = []
+            
+            # Format bucket list with additional metadata
+            for bucket in response.get('Buckets', []):
+                bucket_info = {
+                    'name': bucket['Name'],
+                    'creation_date': bucket['CreationDate'].isoformat() if 'CreationDate' in bucket else None,
+                }
                 
-                return jsonify(buckets)
+                # Mark zugacloud bucket as recommended for Storj
+                if (provider == 'storj' or current_provider == 'storj') and bucket['Name'] == 'zugacloud':
+                    bucket_info['recommended'] = True
+                    bucket_info['description'] = 'Recommended Storj bucket'
                 
-            finally:
-                # Clean up temporary client if one was created
-                if temp_client:
-                    del temp_client
+                buckets.append(bucket_info)
             
-        except Exception as e:
-            logger.error(f"Error listing buckets: {e}")
-            raise BucketOperationError(str(e))
+            return buckets
+            
+        finally:
+            # Clean up temporary client if one was created
+            if temp_client:
+                del temp_client
 
 class FileHandler(BaseHandler):
     """Handler for file operations"""
     
-    def list_files(self, path='/', bucket=None):
-        """List files in S3 bucket"""
+    def list_files(self, path='/', bucket=None, page_size=None, token=None, sort='name', order='asc'):
+        """List one folder of the S3 bucket, a page at a time"""
         try:
             if not self.aws_integration.s3:
                 return jsonify({'files': [], 'error': 'AWS not initialized'})
 
             bucket = bucket or self.aws_integration.bucket_name
-            return self.aws_integration.list_files(path, bucket)
+            try:
+                result = self.aws_integration.list_files(
+                    path,
+                    bucket,
+                    page_size=page_size,
+                    token=token,
+                    sort=sort,
+                    order=order
+                )
+            except ValueError as e:
+                raise ValidationError(str(e))
+
+            if not result.get('version'):
+                return jsonify(result)
+            # Cached snapshots carry a version, so the validator needs no serialization
+            etag = hashlib.sha1(
+                f"{_INSTANCE_ID}|{bucket}|{result['prefix']}|{result['version']}|{page_size}|{token}|{sort}|{order}".encode('utf-8')
+            ).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = jsonify(result)
+            response.set_etag(etag, weak=True)
+            return response
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
             raise FileOperationError(str(e))
 
+    def list_files_stream(self, path='/', bucket=None, stream_format='ndjson'):
+        """Stream a whole folder listing as NDJSON or a chunked JSON array"""
+        if stream_format not in ('ndjson', 'json'):
+            raise ValidationError(f"Unsupported stream format: {stream_format}")
+        if not self.aws_integration.s3:
+            raise FileOperationError('AWS not initialized')
+
+        bucket = bucket or self.aws_integration.bucket_name
+        entries = self.aws_integration.iter_files(path, bucket)
+        if stream_format == 'ndjson':
+            return Response(stream_with_context(ndjson_chunks(entries)), mimetype='application/x-ndjson')
+        body = json_array_chunks(entries, extra={'prefix': normalize_prefix(path), 'continuationToken': None})
+        return Response(stream_with_context(body), mimetype='application/json')
+
     def delete_local_file(self, file_path):
         """Delete a file from local storage"""
         try:
@@ -162,6 +219,7 @@ class FileHandler(BaseHandler):
                     Bucket=bucket_name,
                     Key=file_path
                 )
+                self.aws_integration.on_object_deleted(bucket_name, file_path)
                 return jsonify({'success': True})
             except self.aws_integration.s3.exceptions.NoSuchKey:
                 raise ResourceNotFoundError('File not found in S3')
@@ -187,6 +245,141 @@ class FileHandler(BaseHandler):
             logger.error(f"Error checking local file: {e}")
             raise FileOperationError(str(e))
 
+    def _local_path(self, file_key):
+        """Absolute path of a key inside the sync folder, or None without one"""
+        sync_folder = self.aws_integration.config.get('sync_folder')
+        if not sync_folder:
+            return None
+        root = os.path.realpath(sync_folder)
+        local_path = os.path.realpath(os.path.join(root, file_key.lstrip('/')))
+        if os.path.commonpath([root, local_path]) != root:
+            raise ValidationError('Invalid path')
+        return local_path
+
+    def _has_local_copy(self, file_key, bucket_name):
+        """Whether the sync folder holds this key of the synced bucket"""
+        if bucket_name != self.aws_integration.bucket_name or not self.aws_integration.config.get('prefer_local_playback', True):
+            return False
+        return self._local_exists([file_key])[file_key]
+
+    def _local_exists(self, file_keys):
+        """Return {key: bool} from the local index, stat-ing only while it is still building"""
+        index = self.aws_integration.local_index()
+        if index is None:
+            return {key: False for key in file_keys}
+        if index.ready:
+            return index.contains_many(file_keys)
+        return {key: os.path.isfile(self._local_path(key)) for key in file_keys}
+
+    def _playback_url(self, file_key, bucket_name):
+        """Return (url, source), preferring the synced local copy over a presigned URL"""
+        if self._has_local_copy(file_key, bucket_name):
+            return url_for('api.serve_local_file', file_key=file_key, _external=True), 'local'
+        if bucket_name == self.aws_integration.bucket_name and (
+                self.aws_integration.config.get('use_range_proxy')
+                or self.aws_integration.has_cached_head(bucket_name, file_key)):
+            # A prefetched head plays from disk through the proxy
+            return url_for('api.proxy_file', file_key=file_key, _external=True), 'proxy'
+        return self.aws_integration.generate_presigned_url(bucket_name, file_key), 'remote'
+
+    def serve_local_file(self, file_key):
+        """Serve a file from the sync folder with Range and conditional request support"""
+        local_path = self._local_path(file_key)
+        if not local_path:
+            raise ResourceNotFoundError('No sync folder configured')
+        if not os.path.isfile(local_path):
+            raise ResourceNotFoundError('File not found')
+        # send_file answers Range/If-* itself and hands the file to the server's
+        # wsgi.file_wrapper, which uses sendfile() where the server supports it
+        return send_file(
+            local_path,
+            mimetype=self.aws_integration.video.get_content_type(local_path),
+            conditional=True,
+            etag=True,
+            max_age=0
+        )
+
+    def proxy_file(self, file_key):
+        """Serve a remote object through the chunk cache, honouring Range requests"""
+        try:
+            bucket_name = self.aws_integration.bucket_name
+            if not bucket_name:
+                raise FileOperationError('No bucket configured')
+            try:
+                info = self.aws_integration.get_file_info(bucket_name, file_key)
+            except self.aws_integration.s3.exceptions.ClientError as e:
+                if e.response['Error']['Code'] == '404':
+                    raise ResourceNotFoundError('File not found')
+                raise FileOperationError(str(e))
+
+            size = info['size']
+            byte_range = request.range.range_for_length(size) if request.range else None
+            if request.range and byte_range is None and len(request.range.ranges) == 1:
+                response = Response(status=416)
+                response.headers['Content-Range'] = f"bytes */{size}"
+                return response
+            start, stop = byte_range or (0, size)
+
+            response = Response(
+                stream_with_context(self._proxy_body(bucket_name, file_key, info, start, stop)),
+                status=206 if byte_range else 200,
+                mimetype=self.aws_integration.video.get_content_type(file_key),
+                direct_passthrough=True
+            )
+            response.headers['Accept-Ranges'] = 'bytes'
+            response.content_length = stop - start
+            if byte_range:
+                response.content_range = f"bytes {start}-{stop - 1}/{size}"
+            if info.get('etag'):
+                response.set_etag(info['etag'].strip('"'))
+            return response
+        except (ResourceNotFoundError, FileOperationError):
+            raise
+        except Exception as e:
+            logger.error(f"Error proxying file: {str(e)}")
+            raise FileOperationError(str(e))
+
+    def _proxy_body(self, bucket_name, file_key, info, start, stop):
+        try:
+            yield from self.aws_integration.chunk_cache.iter_range(
+                bucket_name, file_key, info.get('etag'), info['size'], start, stop
+            )
+        except self.aws_integration.s3.exceptions.ClientError as e:
+            # Most likely the object was replaced (If-Match failed); forget the stale info
+            self.aws_integration.metadata.invalidate(bucket_name, file_key)
+            logger.error(f"Error proxying {file_key}: {e}")
+
+    def prefetch_files(self, file_keys):
+        """Queue the heads of visible videos for background download into the chunk cache"""
+        try:
+            if not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+            # Only the configured bucket is played through the proxy
+            bucket_name = self.aws_integration.bucket_name
+            if not bucket_name:
+                raise ValidationError('No bucket configured')
+            if not self.aws_integration.config.get('prefetch_enabled', True):
+                return jsonify({'queued': 0})
+            queued = self.aws_integration.prefetch_manager.enqueue(bucket_name, file_keys)
+            return jsonify({'queued': queued})
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error queuing prefetch: {e}")
+            raise FileOperationError(str(e))
+
+    def check_local_files(self, file_keys):
+        """Check which of many keys exist in the sync folder"""
+        try:
+            if not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+            return jsonify({'exists': self._local_exists(file_keys)})
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error checking local files: {e}")
+            raise FileOperationError(str(e))
+
     def get_file_info(self, file_key):
         """Get detailed file information including sync status"""
         try:
@@ -194,21 +387,7 @@ class FileHandler(BaseHandler):
                 raise ValidationError('No file key provided')
                 
             try:
-                metadata = self.aws_integration.s3.head_object(
-                    Bucket=self.aws_integration.bucket_name,
-                    Key=file_key
-                )
-                
-                file_info = {
-                    'key': file_key,
-                    'size': metadata['ContentLength'],
-                    'lastModified': metadata['LastModified'].isoformat(),
-                    'metadata': metadata.get('Metadata', {}),
-                    'originalName': metadata.get('Metadata', {}).get('OriginalName'),
-                    'uploadDate': metadata.get('Metadata', {}).get('UploadDate'),
-                    'videoHash': metadata.get('Metadata', {}).get('VideoHash')
-                }
-                
+                file_info = self.aws_integration.get_file_info(self.aws_integration.bucket_name, file_key)
                 return jsonify(file_info)
                 
             except self.aws_integration.s3.exceptions.ClientError as e:
@@ -216,10 +395,59 @@ class FileHandler(BaseHandler):
                     raise ResourceNotFoundError('File not found')
                 raise FileOperationError(str(e))
                     
+        except (ValidationError, ResourceNotFoundError):
+            raise
         except Exception as e:
             logger.error(f"Error getting file info: {str(e)}")
             raise FileOperationError(str(e))
 
+    def get_files_info(self, file_keys, bucket=None):
+        """Get file information for many keys at once"""
+        try:
+            if not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+
+            bucket = bucket or self.aws_integration.bucket_name
+            try:
+                files = self.aws_integration.get_files_info(bucket, file_keys)
+            except ValueError as e:
+                raise ValidationError(str(e))
+            return jsonify({'files': files})
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting file info: {str(e)}")
+            raise FileOperationError(str(e))
+
+    def search_files(self, query=None, bucket=None, all_buckets=False, prefix=None, ext=None,
+                     min_size=None, max_size=None, date_from=None, date_to=None, limit=None, offset=0):
+        """Search object keys and upload metadata from the local index"""
+        try:
+            if min_size is not None and max_size is not None and min_size > max_size:
+                raise ValidationError('min_size is larger than max_size')
+            if date_to and len(date_to) == 10:
+                date_to += 'T23:59:59.999999+00:00'  # A bare date includes the whole day
+
+            bucket = None if all_buckets else bucket or self.aws_integration.bucket_name
+            results, indexing = self.aws_integration.search_files(
+                query,
+                bucket,
+                prefix=prefix,
+                ext=ext,
+                min_size=min_size,
+                max_size=max_size,
+                date_from=date_from,
+                date_to=date_to,
+                limit=limit,
+                offset=offset
+            )
+            return jsonify({'results': results, 'indexing': indexing})
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching files: {str(e)}")
+            raise FileOperationError(str(e))
+
     def stream_file(self, file_key):
         """Generate streaming URL for a file"""
         try:
@@ -227,23 +455,87 @@ class FileHandler(BaseHandler):
             if not bucket_name:
                 raise FileOperationError('No bucket configured')
 
-            url = self.aws_integration.s3.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': bucket_name,
-                    'Key': file_key
-                },
-                ExpiresIn=3600
-            )
+            url, source = self._playback_url(file_key, bucket_name)
+            if not url:
+                raise FileOperationError('Could not generate streaming URL')
             
-            return jsonify({'url': url})
+            return jsonify({'url': url, 'source': source})
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error generating streaming URL: {str(e)}")
             raise FileOperationError(str(e))
 
+    def stream_files(self, file_keys, bucket=None):
+        """Generate streaming URLs for a page of files"""
+        try:
+            if not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+            bucket_name = bucket or self.aws_integration.config.get('bucket_name')
+            if not bucket_name:
+                raise FileOperationError('No bucket configured')
+
+            urls = {}
+            sources = {}
+            for key in dict.fromkeys(file_keys):
+                urls[key], sources[key] = self._playback_url(key, bucket_name)
+            return jsonify({'urls': urls, 'sources': sources})
+        except (ValidationError, FileOperationError):
+            raise
+        except Exception as e:
+            logger.error(f"Error generating streaming URLs: {str(e)}")
+            raise FileOperationError(str(e))
+
+    def get_hls_playlist(self, file_key, rendition=None):
+        """Return an HLS playlist for a packaged video"""
+        try:
+            if not file_key:
+                raise ValidationError('No file key provided')
+            hls = self.aws_integration.hls_manager
+            try:
+                if rendition:
+                    if not re.fullmatch(r'[\w-]+', rendition):
+                        raise ValidationError('Invalid rendition name')
+                    playlist = hls.get_media_playlist(file_key, rendition)
+                else:
+                    playlist = hls.get_master_playlist(
+                        file_key,
+                        lambda name: f"{request.base_url}?rendition={name}"
+                    )
+            except self.aws_integration.s3.exceptions.NoSuchKey:
+                raise ResourceNotFoundError('No HLS renditions for this file')
+
+            return Response(playlist, mimetype='application/vnd.apple.mpegurl')
+        except (ValidationError, ResourceNotFoundError):
+            raise
+        except Exception as e:
+            logger.error(f"Error getting HLS playlist: {str(e)}")
+            raise FileOperationError(str(e))
+
+    def package_hls(self, file_key):
+        """Package the local copy of a video as HLS in the background"""
+        try:
+            local_path = self._local_path(file_key)
+            if not local_path or not os.path.isfile(local_path):
+                raise ResourceNotFoundError('No local copy to package')
+            if not self.aws_integration.hls_manager.is_available():
+                raise FileOperationError('ffmpeg is not available')
+
+            self.aws_integration.hls_manager.package_in_background(local_path, file_key)
+            return jsonify({'status': 'started'})
+        except (ValidationError, ResourceNotFoundError, FileOperationError):
+            raise
+        except Exception as e:
+            logger.error(f"Error packaging HLS: {str(e)}")
+            raise FileOperationError(str(e))
+
 class SyncHandler(BaseHandler):
     """Handler for synchronization operations"""
-    
+
+    def __init__(self, aws_integration):
+        super().__init__(aws_integration)
+        self.growing_sync = None
+
     def start_sync(self, sync_folder, bucket_name):
         """Start synchronization process"""
         try:
@@ -253,7 +545,9 @@ class SyncHandler(BaseHandler):
             from ..sync.file_sync import FileSync
             file_sync = FileSync(self.aws_integration)
 
+            # Upload tuning options (part size, checksums, growing mode) come from the main config
             file_sync.update_config({
+                **self.aws_integration.config,
                 'aws_access_key': self.aws_integration.config.get('aws_access_key'),
                 'aws_secret_key': self.aws_integration.config.get('aws_secret_key'),
                 'region': self.aws_integration.config.get('region'),
@@ -271,6 +565,10 @@ class SyncHandler(BaseHandler):
                 except Exception as e:
                     logger.error(f"Error in sync thread: {e}")
 
+            # Recordings still being written are uploaded as they grow
+            if self.aws_integration.config.get('growing_file_mode'):
+                self._start_growing_sync(file_sync)
+
             sync_thread = threading.Thread(target=run_sync)
             sync_thread.start()
 
@@ -282,6 +580,121 @@ class SyncHandler(BaseHandler):
             logger.error(f"Error starting sync: {str(e)}")
             raise SyncError(str(e))
 
+    def _start_growing_sync(self, file_sync):
+        """Replace any running growing-file watcher with one for the new folder"""
+        if self.growing_sync:
+            self.growing_sync.stop_growing_watch()
+        if file_sync.start_growing_watch():
+            self.growing_sync = file_sync
+
+class ThumbnailHandler(BaseHandler):
+    """Handler for queueing thumbnail generation"""
+
+    @property
+    def service(self):
+        return self.aws_integration.thumbnail_manager.service
+
+    def _bucket(self):
+        bucket_name = self.aws_integration.bucket_name
+        if not bucket_name:
+            raise ValidationError('No bucket configured')
+        return bucket_name
+
+    def request_thumbnails(self, file_keys):
+        """Queue thumbnails for visible tiles, ahead of any backfill"""
+        try:
+            if not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+            bucket_name = self._bucket()
+            keys = [k for k in file_keys if self.aws_integration.is_video_file(k)]
+            # One concurrent batch of HEADs, instead of one per job as it starts
+            infos = self.aws_integration.get_files_info(bucket_name, keys) if keys else {}
+            queued = 0
+            for key, info in infos.items():
+                if 'error' not in info:
+                    self.service.submit(bucket_name, key, etag=info['etag'])
+                    queued += 1
+            return jsonify({'queued': queued})
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error queuing thumbnails: {e}")
+            raise FileOperationError(str(e))
+
+    def backfill_thumbnails(self, prefix):
+        """Start generating missing thumbnails for every video under a prefix"""
+        try:
+            if prefix is not None and not isinstance(prefix, str):
+                raise ValidationError('prefix must be a string')
+            progress = self.service.backfill(self._bucket(), (prefix or '').lstrip('/'))
+            return jsonify(dict(progress)), 202
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error starting thumbnail backfill: {e}")
+            raise FileOperationError(str(e))
+
+    def thumbnail_status(self):
+        thumbnail_manager = self.aws_integration.thumbnail_manager
+        return jsonify(dict(
+            self.service.status(),
+            shared=thumbnail_manager.shared.stats(),
+            sprites=thumbnail_manager.sprites.stats()
+        ))
+
+    def _with_urls(self, index):
+        for sheet in index['sheets']:
+            sheet['url'] = url_for('api.serve_sprite_sheet', name=sheet.pop('name'))
+        return jsonify(index)
+
+    def sprite_index(self, file_keys=None, prefix=None):
+        """Sprite sheets and tile coordinates for a page of keys or a whole folder"""
+        try:
+            etags = None
+            if file_keys is None:
+                if not isinstance(prefix, str):
+                    raise ValidationError('keys or prefix required')
+                snapshot = self.aws_integration.listing.snapshot(self._bucket(), normalize_prefix(prefix))
+                objects = [e for e in snapshot['entries'] if e['Type'] == 'object']
+                file_keys = [e['Key'] for e in objects]
+                etags = {e['Key']: e['ETag'] for e in objects}
+            elif not isinstance(file_keys, list) or not all(isinstance(k, str) and k for k in file_keys):
+                raise ValidationError('keys must be a list of file keys')
+            self._bucket()
+            keys = [k for k in dict.fromkeys(file_keys) if self.aws_integration.is_video_file(k)]
+            if len(keys) > MAX_SPRITE_KEYS:
+                raise ValidationError(f'At most {MAX_SPRITE_KEYS} keys per sprite index')
+            return self._with_urls(self.aws_integration.thumbnail_manager.build_sprite_index(keys, etags))
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error building sprite sheets: {e}")
+            raise FileOperationError(str(e))
+
+    def scrub_index(self, file_key):
+        """Sprite index of one video's hover-scrub strip"""
+        try:
+            if not self.aws_integration.is_video_file(file_key):
+                raise ValidationError('Not a video file')
+            self._bucket()
+            return self._with_urls(self.aws_integration.thumbnail_manager.scrub_index(file_key))
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error building scrub strip index for {file_key}: {e}")
+            raise FileOperationError(str(e))
+
+    def serve_sprite_sheet(self, name):
+        """Serve a sprite sheet; names are content hashes, so responses never go stale"""
+        if not SPRITE_NAME.fullmatch(name):
+            raise ResourceNotFoundError('Sprite sheet not found')
+        path = self.aws_integration.thumbnail_manager.sprites.sheet_path(name)
+        if not path:
+            raise ResourceNotFoundError('Sprite sheet not found')
+        response = send_file(path, mimetype='image/jpeg', max_age=SPRITE_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+
 class AuthHandler(BaseHandler):
     """Handler for authentication-related requests"""
     
@@ -360,9 +773,21 @@ class HealthHandler(BaseHandler):
                 'sync': 'healthy'
             }
             
+            bucket_name = self.aws_integration.bucket_name
+            bucket = None
+            if self.aws_integration.s3 and bucket_name:
+                # Both answers come from the provider metadata cache
+                bucket = {
+                    'name': bucket_name,
+                    'accessible': self.aws_integration.validate_bucket_access(bucket_name),
+                    'region': self.aws_integration.get_bucket_region(bucket_name)
+                }
+            
             return jsonify({
                 'status': 'ok',
-                'components': components
+                'components': components,
+                'bucket': bucket,
+                'caches': self.aws_integration.cache_stats()
             })
         except Exception as e:
             logger.error(f"Health check failed: {str(e)}")
@@ -1,3 +1,9 @@
-from .aws_integration import aws_integration
+def __getattr__(name):
+    # The singleton connects to storage and opens local indexes; build it on first use only
+    if name == 'aws_integration':
+        from .aws_integration import aws_integration
+        return aws_integration
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ['aws_integration'] 
\ No newline at end of file
+
+__all__ = ['aws_integration']
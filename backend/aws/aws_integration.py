@@ -3,12 +3,25 @@
 import logging
 import os
 import json
+import threading
 from pathlib import Path
 from .s3_client import S3Client
 from .storj_client import StorjClient
 from .video_handler import VideoHandler
 from .sync_handler import SyncHandler
+from .listing_handler import ListingHandler, is_hidden_key, normalize_prefix
+from .metadata_handler import DEFAULT_MAX_WORKERS, MetadataHandler
+from .provider_cache import ProviderMetadataCache
+from .range_proxy import ChunkCache, DEFAULT_CHUNK_SIZE, DEFAULT_READ_AHEAD
 from ..managers.thumbnail_manager import ThumbnailManager
+from ..managers.hls_manager import HLSManager
+from ..managers.prefetch_manager import PrefetchManager
+from ..managers.memory_cache import TTLCache
+from ..managers.prefix_stats import PrefixStatsTree
+from ..managers.search_index import SearchIndex
+from ..managers.single_flight import SingleFlight
+from ..managers.disk_cache import DiskLRUCache
+from ..sync.local_index import LocalPathIndex
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +45,77 @@ class AWSIntegration:
             
         self.s3 = self.s3_client.client  # For backward compatibility
         
+        # Directory listings survive client re-initialization
+        self.listing_cache = TTLCache(
+            max_entries=self.config.get('listing_cache_entries', 256),
+            ttl=self.config.get('listing_cache_ttl', 300)
+        )
+        self.metadata_cache = TTLCache(
+            max_entries=self.config.get('metadata_cache_entries', 10000),
+            ttl=self.config.get('metadata_cache_ttl', 600)
+        )
+        self.provider_cache = ProviderMetadataCache(
+            lambda: self.config,
+            ttl=self.config.get('provider_cache_ttl', 300)
+        )
+        # Presigned URLs carry their own expiry, so entries get a per-URL TTL
+        self.url_cache = TTLCache(max_entries=self.config.get('presign_cache_entries', 10000))
+
+        # Folder sizes/counts persist across restarts in the local data dir
+        self.prefix_stats = PrefixStatsTree(
+            os.path.join(self.data_dir, 'prefix_stats.db'),
+            rebuild_interval=self.config.get('prefix_stats_rebuild_interval', 24 * 3600)
+        )
+        self.search_index = SearchIndex(
+            os.path.join(self.data_dir, 'search_index.db'),
+            rebuild_interval=self.config.get('search_index_rebuild_interval', 24 * 3600)
+        )
+        self._index_rebuilds = set()
+        self._index_lock = threading.Lock()
+        self._local_index = None
+        self._local_index_for = (None, None)  # (configured sync_folder, its index)
+
+        # Identical concurrent requests share one computation
+        self.flights = SingleFlight()
+
+        # Byte ranges of remote objects fetched through the range proxy
+        self.chunk_disk_cache = DiskLRUCache(
+            os.path.join(self.data_dir, 'chunks'),
+            self.config.get('range_cache_max_bytes', 2 * 1024 ** 3)
+        )
+        self.chunk_cache = None
+        self.metadata = None
+
         # Initialize handlers
-        self.video = VideoHandler(self.s3_client)
-        self.sync = SyncHandler(self.s3_client)
+        self._init_handlers()
         self.thumbnail_manager = ThumbnailManager(self)
+        self.hls_manager = HLSManager(self)
+        self.prefetch_manager = PrefetchManager(self)
+
+    def _init_handlers(self):
+        """Create the handlers bound to the current storage client"""
+        self.video = VideoHandler(self.s3_client, self.url_cache)
+        self.sync = SyncHandler(self.s3_client)
+        self.listing = ListingHandler(self.s3_client, self.listing_cache, self.flights)
+        if self.metadata is not None:
+            self.metadata.shutdown()
+        self.metadata = MetadataHandler(
+            self.s3_client,
+            self.metadata_cache,
+            self.listing,
+            max_workers=self.config.get('metadata_max_workers', DEFAULT_MAX_WORKERS),
+            on_fetch=self._on_metadata_fetched,
+            flights=self.flights
+        )
+        if self.chunk_cache is not None:
+            self.chunk_cache.shutdown()
+        self.chunk_cache = ChunkCache(
+            self.s3_client,
+            self.chunk_disk_cache,
+            chunk_size=self.config.get('range_cache_chunk_size', DEFAULT_CHUNK_SIZE),
+            read_ahead=self.config.get('range_cache_read_ahead', DEFAULT_READ_AHEAD),
+            flights=self.flights
+        )
 
     def _check_and_prioritize_storj(self):
         """Check for Storj credentials and automatically set as provider if valid"""
@@ -62,6 +142,11 @@ class AWSIntegration:
         # Return True if either source has both keys
         return (env_access_key and env_secret_key) or (config_access_key and config_secret_key)
 
+    @property
+    def data_dir(self):
+        """Directory for local indexes and caches"""
+        return self.config.get('data_dir') or str(Path(__file__).resolve().parents[1] / '.cache')
+
     @property
     def bucket_name(self):
         """Get the current bucket name"""
@@ -105,6 +190,11 @@ class AWSIntegration:
         else:
             self.s3_client = S3Client(self.config)
         self.s3 = self.s3_client.client
+        self.listing_cache.clear()
+        self.metadata_cache.clear()
+        self.url_cache.clear()
+        self.provider_cache.clear()
+        self._init_handlers()
 
     def set_storage_provider(self, provider: str):
         """Change storage provider (aws/storj)"""
@@ -138,7 +228,173 @@ class AWSIntegration:
         return self.sync.compare_local_and_remote(local_folder, bucket_name)
 
     def calculate_folder_stats(self, bucket, prefix):
+        if self.ensure_bucket_index(bucket):
+            stats = self.prefix_stats.get_stats(bucket, [prefix]).get(prefix)
+            return (stats['TotalSize'], stats['FileCount']) if stats else (0, 0)
         return self.sync.calculate_folder_stats(bucket, prefix)
 
+    def validate_bucket_access(self, bucket_name):
+        return self.provider_cache.get_or_load(
+            'access', (self.storage_provider, bucket_name),
+            lambda: self.s3_client.validate_bucket_access(bucket_name)
+        )
+
+    def get_bucket_region(self, bucket_name):
+        """Region of a bucket, or None if the provider does not report one"""
+        def load():
+            try:
+                response = self.s3.get_bucket_location(Bucket=bucket_name)
+                # us-east-1 is reported as an empty constraint
+                return response.get('LocationConstraint') or 'us-east-1'
+            except Exception as e:
+                logger.warning(f"Could not get region for {bucket_name}: {e}")
+                return None
+        return self.provider_cache.get_or_load('region', (self.storage_provider, bucket_name), load)
+
+    def cache_stats(self):
+        """Hit/miss counters of the in-memory caches"""
+        return {
+            'provider': self.provider_cache.stats(),
+            'listing': self.listing_cache.stats(),
+            'metadata': self.metadata_cache.stats(),
+            'presign': self.url_cache.stats(),
+            'chunks': self.chunk_disk_cache.stats(),
+            'thumbnails': self.thumbnail_manager.store.stats()
+        }
+
+    def list_files(self, path, bucket, **options):
+        result = self.listing.list_directory(bucket, path, **options)
+        result['files'] = self._with_folder_stats(bucket, result['files'])
+        return result
+
+    def iter_files(self, path, bucket):
+        """Yield every entry of a folder as S3 pages arrive, without building the whole list"""
+        prefix = normalize_prefix(path)
+        for entries in self.listing.iter_pages(bucket, prefix):
+            yield from self._with_folder_stats(bucket, entries)
+
+    def _with_folder_stats(self, bucket, entries):
+        """Copy folder entries with FileCount/TotalSize from the prefix tree"""
+        folders = [e['Key'] for e in entries if e['Type'] == 'prefix']
+        if not folders or not self.ensure_bucket_index(bucket):
+            return entries
+        stats = self.prefix_stats.get_stats(bucket, folders)
+        # Entries may be shared with the listing cache, so never mutate them
+        return [
+            {**e, 'FileCount': stats[e['Key']]['FileCount'], 'TotalSize': stats[e['Key']]['TotalSize'],
+             'LastModified': stats[e['Key']]['LastModified']}
+            if e['Type'] == 'prefix' and e['Key'] in stats else e
+            for e in entries
+        ]
+
+    def ensure_bucket_index(self, bucket):
+        """Return True if the local bucket indexes are usable, else start building them"""
+        if self.prefix_stats.is_built(bucket) and self.search_index.is_built(bucket):
+            return True
+        with self._index_lock:
+            if bucket in self._index_rebuilds:
+                return False
+            self._index_rebuilds.add(bucket)
+        threading.Thread(target=self._rebuild_bucket_index, args=(bucket,), daemon=True).start()
+        return False
+
+    def _rebuild_bucket_index(self, bucket):
+        """Seed the prefix tree and search index from one full listing of the bucket.
+
+        Pages are staged as they arrive, and writes seen while the listing runs
+        are replayed on top of it when the indexes are swapped in.
+        """
+        indexes = (self.prefix_stats, self.search_index)
+        try:
+            for index in indexes:
+                index.start_rebuild(bucket)
+            paginator = self.s3_client.client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=bucket):
+                objects = [
+                    (obj['Key'], obj['Size'], obj['LastModified'].isoformat())
+                    for obj in page.get('Contents', [])
+                    if not is_hidden_key(obj['Key']) and not obj['Key'].endswith('/')
+                ]
+                for index in indexes:
+                    index.stage(bucket, objects)
+            for index in indexes:
+                index.finish_rebuild(bucket)
+            # Cached listings were served without folder stats; give them new versions
+            self.listing_cache.invalidate_where(lambda k: k[0] == bucket)
+        except Exception as e:
+            logger.error(f"Error indexing {bucket}: {e}")
+            for index in indexes:
+                index.abort_rebuild(bucket)
+        finally:
+            with self._index_lock:
+                self._index_rebuilds.discard(bucket)
+
+    def search_files(self, query=None, bucket=None, **filters):
+        """Search the local index; returns (results, still_indexing)"""
+        indexing = bool(bucket) and not self.ensure_bucket_index(bucket)
+        results = self.search_index.search(query, buckets=[bucket] if bucket else None, **filters)
+        return results, indexing
+
+    def get_file_info(self, bucket, key):
+        return self.metadata.get(bucket, key)
+
+    def get_files_info(self, bucket, keys):
+        return self.metadata.get_many(bucket, keys)
+
+    def has_cached_head(self, bucket, key):
+        """Whether the first chunk of an object is in the chunk cache, without a HEAD"""
+        info = self.metadata.peek(bucket, key)
+        return info is not None and self.chunk_cache.has_chunk(bucket, key, info.get('etag'), 0)
+
+    def _on_metadata_fetched(self, bucket, info):
+        """Keep the search index's OriginalName/UploadDate columns filled in"""
+        if not is_hidden_key(info['key']):
+            self.search_index.record_object(
+                bucket, info['key'], info['size'], info['lastModified'],
+                {'originalname': info['originalName'], 'uploaddate': info['uploadDate']}
+            )
+
+    def local_index(self):
+        """The watched index of the sync folder, started on first use.
+
+        The folder is resolved once per configured value, so repeat calls
+        only compare strings until sync_folder changes.
+        """
+        sync_folder = self.config.get('sync_folder')
+        folder, index = self._local_index_for
+        if index is not None and folder == sync_folder:
+            return index
+        if not sync_folder or not os.path.isdir(sync_folder):
+            return None
+        root = os.path.realpath(sync_folder)
+        with self._index_lock:
+            if self._local_index is None or self._local_index.root != root:
+                if self._local_index is not None:
+                    self._local_index.stop()
+                self._local_index = LocalPathIndex(root).start()
+            self._local_index_for = (sync_folder, self._local_index)
+            return self._local_index
+
+    # Write path: everything that adds or removes objects reports here
+    def on_object_written(self, bucket, key, size=None, last_modified=None, metadata=None):
+        """Update local views of the bucket after an object was written"""
+        self.listing.invalidate(bucket, key)
+        self.metadata.invalidate(bucket, key)
+        # A new URL keeps media caches from serving the old content
+        self.url_cache.invalidate_where(lambda k: k[:2] == (bucket, key))
+        self.thumbnail_manager.store.invalidate(bucket, key)
+        if size is not None and not is_hidden_key(key):
+            self.prefix_stats.record_object(bucket, key, size, last_modified)
+            self.search_index.record_object(bucket, key, size, last_modified, metadata)
+
+    def on_object_deleted(self, bucket, key):
+        """Update local views of the bucket after an object was deleted"""
+        self.listing.invalidate(bucket, key)
+        self.metadata.invalidate(bucket, key)
+        self.url_cache.invalidate_where(lambda k: k[:2] == (bucket, key))
+        self.thumbnail_manager.store.invalidate(bucket, key)
+        self.prefix_stats.remove_object(bucket, key)
+        self.search_index.remove_object(bucket, key)
+
 # Create a single instance
 aws_integration = AWSIntegration()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import os
+import base64
+import itertools
+import json
+import logging
+from ..managers.hls_manager import HLS_SUFFIX
+from ..managers.memory_cache import TTLCache
+from ..managers.shared_thumbnails import APP_PREFIX
+from ..managers.single_flight import SingleFlight
+from .video_handler import VIDEO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = {
+    # Code point order is S3's UTF-8 byte order, so snapshots and passed-through pages agree
+    'name': lambda e: e['Key'],
+    'size': lambda e: e.get('Size', 0),
+    'lastModified': lambda e: e.get('LastModified') or ''
+}
+# HLS output is a "<video>.hls/" folder next to the video; such folders are not shown
+HLS_FOLDER_SUFFIX = HLS_SUFFIX.rstrip('/')
+# ...and neither is what the app keeps for itself at the top of the bucket
+HIDDEN_PREFIXES = (APP_PREFIX,)
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+_versions = itertools.count(1)
+
+
+def normalize_prefix(path):
+    """Turn an API path ('/', 'a/b', '/a/b/') into an S3 prefix ('', 'a/b/')"""
+    path = (path or '').strip('/')
+    return f"{path}/" if path else ''
+
+
+def is_hls_folder(name):
+    """Whether a path component is the HLS folder of a video, such as clip.mp4.hls"""
+    if not name.endswith(HLS_FOLDER_SUFFIX):
+        return False
+    return os.path.splitext(name[:-len(HLS_FOLDER_SUFFIX)])[1].lower() in VIDEO_EXTENSIONS
+
+
+def is_hidden_key(key):
+    """Whether key belongs to a derived artifact rather than a user file.
+
+    Whole folder names are matched, so a user folder such as "foo.hls/"
+    that is not named after a video stays visible.
+    """
+    return key.startswith(HIDDEN_PREFIXES) or any(is_hls_folder(name) for name in key.split('/')[:-1])
+
+
+def parent_prefixes(key):
+    """Every directory prefix containing key, deepest first"""
+    parts = key.split('/')[:-1]
+    return [''.join(f"{p}/" for p in parts[:i]) for i in range(len(parts), -1, -1)]
+
+
+class ListingHandler:
+    """List one "directory" of a bucket at a time using Prefix + Delimiter.
+
+    Results are paged with opaque continuation tokens. Name-ordered pages
+    are passed straight through from S3; other sort orders, and any
+    directory that was listed in full recently, are served from a cached
+    snapshot of the whole directory.
+    """
+
+    def __init__(self, s3_client, cache=None, flights=None):
+        self.s3_client = s3_client
+        self.cache = cache if cache is not None else TTLCache(max_entries=256, ttl=300)
+        self.flights = flights if flights is not None else SingleFlight()
+
+    def iter_directory(self, bucket, prefix):
+        """Yield folder and file entries directly under prefix, in S3 order"""
+        for entries in self.iter_pages(bucket, prefix):
+            yield from entries
+
+    def iter_pages(self, bucket, prefix):
+        """Yield the entries of each S3 page under prefix; one page is in memory at a time"""
+        paginator = self.s3_client.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/'):
+            yield list(self._page_entries(page, prefix))
+
+    def get_cached(self, bucket, prefix):
+        """Return the cached snapshot of a directory, if any"""
+        return self.cache.get((bucket, prefix))
+
+    def snapshot(self, bucket, prefix, refresh=False):
+        """Return a full, versioned listing of a directory, caching it"""
+        snapshot = None if refresh else self.get_cached(bucket, prefix)
+        if snapshot is None:
+            # Tabs opening the same folder at once share one full listing
+            snapshot = self.flights.do(
+                ('snapshot', bucket, prefix),
+                lambda: self._store(bucket, prefix, list(self.iter_directory(bucket, prefix)))
+            )
+        return snapshot
+
+    def list_directory(self, bucket, path='/', page_size=DEFAULT_PAGE_SIZE, token=None,
+                       sort='name', order='asc'):
+        """Return one page of a directory listing"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Unsupported order: {order}")
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        prefix = normalize_prefix(path)
+        state = self._decode_token(token, bucket, prefix) if token else {}
+
+        snapshot = self.get_cached(bucket, prefix)
+        if 's3' in state or (not state and snapshot is None and sort == 'name' and order == 'asc'):
+            return self._list_from_s3(bucket, prefix, page_size, state.get('s3'))
+
+        if snapshot is None:
+            snapshot = self.snapshot(bucket, prefix)
+        if 'o' in state and state.get('v') != snapshot['version']:
+            # Offsets into another version would skip or repeat entries
+            raise ValueError("The folder changed since this page was listed; start again from the first page")
+        return self._list_from_snapshot(bucket, prefix, snapshot, page_size, state.get('o', 0), sort, order)
+
+    def invalidate(self, bucket, key):
+        """Drop cached listings affected by a change to key"""
+        for prefix in parent_prefixes(key):
+            self.cache.invalidate((bucket, prefix))
+
+    def _list_from_s3(self, bucket, prefix, page_size, s3_token):
+        params = {'Bucket': bucket, 'Prefix': prefix, 'Delimiter': '/', 'MaxKeys': page_size}
+        if s3_token:
+            params['ContinuationToken'] = s3_token
+        page = self.flights.do(
+            ('page', bucket, prefix, page_size, s3_token),
+            lambda: self.s3_client.client.list_objects_v2(**params)
+        )
+        entries = list(self._page_entries(page, prefix))
+        next_token = page.get('NextContinuationToken') if page.get('IsTruncated') else None
+
+        version = None
+        if not s3_token and not next_token:
+            # The whole directory fit in one page: keep it for later sorts and pages
+            version = self._store(bucket, prefix, entries)['version']
+
+        entries.sort(key=lambda e: e['Type'] != 'prefix')
+        return {
+            'files': entries,
+            'prefix': prefix,
+            'continuationToken': self._encode_token(bucket, prefix, {'s3': next_token}) if next_token else None,
+            'version': version
+        }
+
+    def _list_from_snapshot(self, bucket, prefix, snapshot, page_size, offset, sort, order):
+        entries = sorted(snapshot['entries'], key=SORT_KEYS[sort], reverse=order == 'desc')
+        # Folders always come first, whatever the sort
+        entries.sort(key=lambda e: e['Type'] != 'prefix')
+        page = entries[offset:offset + page_size]
+        next_offset = offset + page_size
+        token = None
+        if next_offset < len(entries):
+            token = self._encode_token(bucket, prefix, {'o': next_offset, 'v': snapshot['version']})
+        return {
+            'files': page,
+            'prefix': prefix,
+            'continuationToken': token,
+            'version': snapshot['version']
+        }
+
+    def _store(self, bucket, prefix, entries):
+        snapshot = {'version': next(_versions), 'entries': entries}
+        self.cache.set((bucket, prefix), snapshot)
+        return snapshot
+
+    def _page_entries(self, page, prefix):
+        for common in page.get('CommonPrefixes', []):
+            key = common['Prefix']
+            if not is_hidden_key(key):
+                yield {'Key': key, 'Type': 'prefix'}
+        for obj in page.get('Contents', []):
+            if obj['Key'] == prefix:
+                continue  # Folder marker object
+            yield {
+                'Key': obj['Key'],
+                'Size': obj['Size'],
+                'LastModified': obj['LastModified'].isoformat(),
+                'ETag': obj.get('ETag'),
+                'Type': 'object'
+            }
+
+    @staticmethod
+    def _encode_token(bucket, prefix, state):
+        payload = json.dumps(dict(state, b=bucket, p=prefix), separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_token(token, bucket, prefix):
+        try:
+            state = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid continuation token: {e}")
+        if state.get('b') != bucket or state.get('p') != prefix:
+            raise ValueError("Continuation token does not belong to this listing")
+        return state
@@ -0,0 +1,128 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from .listing_handler import parent_prefixes
+from ..managers.memory_cache import TTLCache
+from ..managers.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_KEYS = 1000
+DEFAULT_MAX_WORKERS = 16
+
+
+def describe_object(key, response):
+    """Shape a head_object response the way /api/files/info returns it"""
+    # S3 returns user metadata keys lower-cased (x-amz-meta-videohash)
+    user_metadata = {k.lower(): v for k, v in response.get('Metadata', {}).items()}
+    return {
+        'key': key,
+        'size': response['ContentLength'],
+        'lastModified': response['LastModified'].isoformat(),
+        'etag': response.get('ETag'),
+        'contentType': response.get('ContentType'),
+        'metadata': response.get('Metadata', {}),
+        'originalName': user_metadata.get('originalname'),
+        'uploadDate': user_metadata.get('uploaddate'),
+        'videoHash': user_metadata.get('videohash')
+    }
+
+
+class MetadataHandler:
+    """HEAD objects concurrently and cache the results per ETag.
+
+    A cached entry is reused until its TTL expires, or sooner if a cached
+    directory listing shows the object now has a different ETag. All batches
+    share one pool of max_workers threads, so concurrent requests never hold
+    more HEADs open than the storage client has connections for.
+    """
+
+    def __init__(self, s3_client, cache=None, listing=None, max_workers=DEFAULT_MAX_WORKERS, on_fetch=None,
+                 flights=None):
+        self.s3_client = s3_client
+        self.cache = cache if cache is not None else TTLCache(max_entries=10000, ttl=300)
+        self.listing = listing
+        self.max_workers = max_workers
+        self.on_fetch = on_fetch
+        self.flights = flights if flights is not None else SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='metadata')
+
+    def get(self, bucket, key):
+        """Return file info for one key; raises ClientError like head_object"""
+        cached = self._cached(bucket, key, self._listed_etags(bucket, [key]))
+        return cached if cached is not None else self._fetch(bucket, key)
+
+    def get_many(self, bucket, keys):
+        """Return {key: info} for many keys, with {'error': ...} for failures"""
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > MAX_BATCH_KEYS:
+            raise ValueError(f"At most {MAX_BATCH_KEYS} keys per request")
+
+        listed = self._listed_etags(bucket, keys)
+        results = {}
+        missing = []
+        for key in keys:
+            cached = self._cached(bucket, key, listed)
+            if cached is not None:
+                results[key] = cached
+            else:
+                missing.append(key)
+
+        for key, info in zip(missing, self._executor.map(lambda k: self._fetch_or_error(bucket, k), missing)):
+            results[key] = info
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def peek(self, bucket, key):
+        """Return cached file info without contacting storage, or None"""
+        return self.cache.get((bucket, key))
+
+    def invalidate(self, bucket, key):
+        self.cache.invalidate((bucket, key))
+
+    def _cached(self, bucket, key, listed_etags):
+        info = self.cache.get((bucket, key))
+        if info is None:
+            return None
+        listed = listed_etags.get(key)
+        if listed is not None and listed != info.get('etag'):
+            self.cache.invalidate((bucket, key))
+            return None
+        return info
+
+    def _fetch(self, bucket, key):
+        return self.flights.do(('head', bucket, key), self._head, bucket, key)
+
+    def _head(self, bucket, key):
+        response = self.s3_client.client.head_object(Bucket=bucket, Key=key)
+        info = describe_object(key, response)
+        self.cache.set((bucket, key), info)
+        if self.on_fetch:
+            self.on_fetch(bucket, info)
+        return info
+
+    def _fetch_or_error(self, bucket, key):
+        try:
+            return self._fetch(bucket, key)
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code in ('404', 'NoSuchKey', 'NotFound'):
+                return {'key': key, 'error': 'File not found'}
+            logger.error(f"Error reading metadata for {key}: {e}")
+            return {'key': key, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error reading metadata for {key}: {e}")
+            return {'key': key, 'error': str(e)}
+
+    def _listed_etags(self, bucket, keys):
+        """ETags for keys whose directory listing is currently cached"""
+        if self.listing is None:
+            return {}
+        etags = {}
+        for prefix in {parent_prefixes(key)[0] for key in keys}:
+            snapshot = self.listing.get_cached(bucket, prefix)
+            if snapshot:
+                etags.update((e['Key'], e.get('ETag')) for e in snapshot['entries'] if e['Type'] == 'object')
+        return etags
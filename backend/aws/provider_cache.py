@@ -0,0 +1,56 @@
+import os
+import json
+import hashlib
+import logging
+from ..managers.memory_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Config values and environment variables the storage clients build credentials from
+CREDENTIAL_CONFIG_KEYS = (
+    'storage_provider', 'prefer_env_vars', 'aws_access_key', 'aws_secret_key', 'region',
+    'storj_access_key', 'storj_secret_key', 'storj_endpoint'
+)
+CREDENTIAL_ENV_VARS = (
+    'AWS_ACCESS_KEY', 'AWS_SECRET_KEY', 'AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY',
+    'VENV_AWS_ACCESS_KEY', 'VENV_AWS_SECRET_KEY', 'AWS_DEFAULT_REGION', 'VENV_AWS_DEFAULT_REGION',
+    'STORJ_ACCESS_KEY', 'STORJ_SECRET_KEY', 'STORJ_ENDPOINT'
+)
+
+
+def credentials_fingerprint(config):
+    """Hash of everything that decides which credentials the clients use"""
+    values = {key: config.get(key) for key in CREDENTIAL_CONFIG_KEYS}
+    values.update((name, os.environ.get(name)) for name in CREDENTIAL_ENV_VARS)
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ProviderMetadataCache:
+    """TTL cache for slow provider calls: bucket lists, regions, access checks.
+
+    Entries are keyed by a fingerprint of the active credentials, so changed
+    credentials never see stale answers; clear() drops everything when the
+    storage client is re-initialized.
+    """
+
+    def __init__(self, get_config, ttl=300, failure_ttl=30, max_entries=256):
+        self.get_config = get_config  # The config dict may be replaced wholesale
+        self.failure_ttl = failure_ttl
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def get_or_load(self, kind, key, loader, ok=bool):
+        """Return the cached value for (kind, key) or load it; results failing ok() expire sooner"""
+        cache_key = (credentials_fingerprint(self.get_config()), kind, key)
+        value = self.cache.get(cache_key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.cache.set(cache_key, value, ttl=None if ok(value) else self.failure_ttl)
+        return value
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,97 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..managers.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024
+DEFAULT_READ_AHEAD = 2
+
+
+class ChunkCache:
+    """Fetch objects in fixed, aligned chunks kept in a DiskLRUCache.
+
+    Chunks are keyed by bucket, key, ETag and index, so a replaced object
+    never serves stale bytes. Concurrent readers of the same chunk share one
+    GET, and every read schedules the next few chunks in the background.
+    """
+
+    def __init__(self, s3_client, disk_cache, chunk_size=DEFAULT_CHUNK_SIZE, read_ahead=DEFAULT_READ_AHEAD,
+                 max_workers=4, flights=None):
+        self.s3_client = s3_client
+        self.disk_cache = disk_cache
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+        self.flights = flights if flights is not None else SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='read-ahead')
+        self._scheduled = set()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, bucket, key, etag, index):
+        return f"{bucket}\0{key}\0{etag}\0{self.chunk_size}\0{index}"
+
+    def chunk_count(self, size):
+        return (size + self.chunk_size - 1) // self.chunk_size
+
+    def has_chunk(self, bucket, key, etag, index):
+        return self.disk_cache.contains(self._cache_key(bucket, key, etag, index))
+
+    def get_chunk(self, bucket, key, etag, size, index):
+        """Return the bytes of one chunk, from disk or a single shared GET"""
+        cache_key = self._cache_key(bucket, key, etag, index)
+        data = self.disk_cache.get(cache_key)
+        if data is None:
+            data = self.flights.do(('chunk', cache_key), self._fetch, bucket, key, etag, size, index)
+        return data
+
+    def _fetch(self, bucket, key, etag, size, index):
+        cache_key = self._cache_key(bucket, key, etag, index)
+        # Another reader may have stored it while we waited to become leader
+        data = self.disk_cache.get(cache_key)
+        if data is not None:
+            return data
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, size) - 1
+        params = {'Bucket': bucket, 'Key': key, 'Range': f"bytes={start}-{end}"}
+        if etag:
+            params['IfMatch'] = etag
+        response = self.s3_client.client.get_object(**params)
+        data = response['Body'].read()
+        self.disk_cache.put(cache_key, data)
+        return data
+
+    def prefetch(self, bucket, key, etag, size, indexes):
+        """Fetch chunks in the background unless cached or already scheduled"""
+        for index in indexes:
+            if index >= self.chunk_count(size) or self.has_chunk(bucket, key, etag, index):
+                continue
+            token = (bucket, key, etag, index)
+            with self._lock:
+                if token in self._scheduled:
+                    continue
+                self._scheduled.add(token)
+            self._executor.submit(self._prefetch_one, token, size)
+
+    def _prefetch_one(self, token, size):
+        bucket, key, etag, index = token
+        try:
+            self.get_chunk(bucket, key, etag, size, index)
+        except Exception as e:
+            logger.debug(f"Read-ahead of {key} chunk {index} failed: {e}")
+        finally:
+            with self._lock:
+                self._scheduled.discard(token)
+
+    def iter_range(self, bucket, key, etag, size, start, stop):
+        """Yield the bytes of [start, stop) chunk by chunk, reading ahead as it goes"""
+        first = start // self.chunk_size
+        last = (stop - 1) // self.chunk_size
+        for index in range(first, last + 1):
+            self.prefetch(bucket, key, etag, size, range(index + 1, index + 1 + self.read_ahead))
+            data = self.get_chunk(bucket, key, etag, size, index)
+            chunk_start = index * self.chunk_size
+            yield data[max(start - chunk_start, 0):stop - chunk_start]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -2,10 +2,21 @@ import boto3
 import logging
 import os
 from botocore.config import Config
+from .metadata_handler import DEFAULT_MAX_WORKERS
 
 logger = logging.getLogger(__name__)
 
+# Connections beyond the metadata workers, for uploads, read-ahead and listings (botocore's default)
+POOL_HEADROOM = 10
+
+def pool_size(config):
+    """Connections the shared client needs: one per metadata worker plus headroom"""
+    return (config or {}).get('metadata_max_workers', DEFAULT_MAX_WORKERS) + POOL_HEADROOM
+
 class S3Client:
+    # S3 accepts CRC32/CRC32C/SHA256 additional checksums on uploads
+    supports_flexible_checksums = True
+
     def __init__(self, config=None):
         self.config = config
         self.client = None
@@ -50,7 +61,8 @@ class S3Client:
                     config=Config(
                         region_name=region,
                         signature_version='v4',
-                        retries={'max_attempts': 3, 'mode': 'standard'}
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                        max_pool_connections=pool_size(self.config)
                     )
                 )
                 logger.info("AWS S3 client initialized successfully")
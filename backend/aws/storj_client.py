@@ -2,11 +2,15 @@ import boto3
 import logging
 import os
 from botocore.config import Config
+from .s3_client import pool_size
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
 class StorjClient:
+    # The Storj gateway does not validate S3 additional checksums
+    supports_flexible_checksums = False
+
     def __init__(self, config=None):
         self.config = config
         self.client = None
@@ -54,7 +58,8 @@ class StorjClient:
                     config=Config(
                         s3={'addressing_style': 'path'},
                         signature_version='s3v4',
-                        retries={'max_attempts': 3, 'mode': 'standard'}
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                        max_pool_connections=pool_size(self.config)
                     )
                 )
                 logger.info("Storj client initialized successfully")
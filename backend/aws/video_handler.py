@@ -3,18 +3,22 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# A cached URL is handed out only while at least this share of its lifetime remains
+PRESIGN_REUSE_FRACTION = 0.5
+VIDEO_EXTENSIONS = {
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv',
+    '.m4v', '.webm', '.flv', '.mpeg', '.mpg', '.3gp'
+}
+
 class VideoHandler:
-    def __init__(self, s3_client):
+    def __init__(self, s3_client, url_cache=None):
         self.s3_client = s3_client
+        self.url_cache = url_cache
         
     def is_video_file(self, file_path: str) -> bool:
         """Check if a file is a video based on its extension"""
-        video_extensions = {
-            '.mp4', '.mkv', '.avi', '.mov', '.wmv',
-            '.m4v', '.webm', '.flv', '.mpeg', '.mpg', '.3gp'
-        }
         ext = os.path.splitext(file_path)[1].lower()
-        return ext in video_extensions
+        return ext in VIDEO_EXTENSIONS
         
     def get_content_type(self, file_path: str) -> str:
         """Get the appropriate content type based on file extension"""
@@ -37,9 +41,22 @@ class VideoHandler:
     def generate_streaming_url(self, bucket_name: str, object_key: str, expiration: int = 3600) -> str:
         """Generate a streaming URL for a video file"""
         content_type = self.get_content_type(object_key)
-        return self.s3_client.generate_presigned_url(
-            bucket_name,
-            object_key,
-            expiration,
-            content_type
-        ) 
\ No newline at end of file
+        return self.presign(bucket_name, object_key, expiration, content_type)
+
+    def presign(self, bucket_name: str, object_key: str, expiration: int = 3600, content_type: str = None) -> str:
+        """Return a presigned GET URL, reusing a cached one while most of its lifetime remains.
+
+        Handing out the same URL lets browser and media caches hit on repeat views,
+        and callers still get a URL that lasts for at least half of what they asked.
+        """
+        cache_key = (bucket_name, object_key, content_type, expiration)
+        if self.url_cache is not None:
+            url = self.url_cache.get(cache_key)
+            if url:
+                return url
+
+        url = self.s3_client.generate_presigned_url(bucket_name, object_key, expiration, content_type)
+        ttl = int(expiration * (1 - PRESIGN_REUSE_FRACTION))
+        if url and self.url_cache is not None and ttl > 0:
+            self.url_cache.set(cache_key, url, ttl=ttl)
+        return url 
\ No newline at end of file
@@ -0,0 +1,169 @@
+# File: backend/managers/disk_cache.py
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from .single_flight import PathLocks
+
+logger = logging.getLogger(__name__)
+
+
+class DiskLRUCache:
+    """Byte-capped blob cache on disk with least-recently-used eviction.
+
+    Blobs are stored one file per key under a hash-named path. The LRU order
+    lives in memory and is rebuilt from file modification times on start;
+    reads refresh a blob's mtime so the order survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # name -> size, least recently used first
+        self._lock = threading.Lock()
+        # Writers of one blob take turns, so its file and its accounting always agree
+        self._writes = PathLocks()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name[:2], name)
+
+    def _load(self):
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.partial'):
+                    os.remove(path)  # Write interrupted by a crash
+                    continue
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self.total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def contains(self, key):
+        with self._lock:
+            return self._name(key) in self._entries
+
+    def get(self, key):
+        """Return the cached bytes for key, or None"""
+        name = self._name(key)
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        path = self._path(name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            # Evicted or removed underneath us
+            with self._lock:
+                self._drop(name)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def path(self, key):
+        """Return the file holding key's blob, refreshing its recency, or None"""
+        name = self._name(key)
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+        path = self._path(name)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._drop(name)
+            return None
+        return path
+
+    def put(self, key, data):
+        """Store bytes for key, evicting old blobs beyond max_bytes"""
+        if len(data) > self.max_bytes:
+            return False
+        name = self._name(key)
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.partial"
+        with self._writes.hold(path):
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            self._add(name, len(data))
+        return True
+
+    def put_file(self, key, source_path):
+        """Move a finished file into the cache as key's blob; it must be on the same filesystem"""
+        size = os.path.getsize(source_path)
+        if size > self.max_bytes:
+            os.remove(source_path)
+            return False
+        name = self._name(key)
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._writes.hold(path):
+            os.replace(source_path, path)
+            self._add(name, size)
+        return True
+
+    def _add(self, name, size):
+        with self._lock:
+            self._drop(name, remove=False)
+            self._entries[name] = size
+            self.total_bytes += size
+            self._evict()
+
+    def delete(self, key):
+        name = self._name(key)
+        with self._writes.hold(self._path(name)), self._lock:
+            self._drop(name)
+
+    def _drop(self, name, remove=True):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self.total_bytes -= size
+            if remove:
+                self._remove_file(name)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self._remove_file(name)
+
+    def _remove_file(self, name):
+        try:
+            os.remove(self._path(name))
+        except OSError as e:
+            logger.debug(f"Could not remove cached blob {name}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
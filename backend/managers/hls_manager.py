@@ -0,0 +1,183 @@
+# File: backend/managers/hls_manager.py
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+HLS_SUFFIX = '.hls/'
+MASTER_PLAYLIST = 'master.m3u8'
+MEDIA_PLAYLIST = 'index.m3u8'
+DEFAULT_RENDITIONS = [{'name': 'source'}]  # Stream copy, no re-encode
+
+CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.m4s': 'video/iso.segment',
+    '.mp4': 'video/mp4',
+    '.ts': 'video/mp2t'
+}
+
+
+class HLSManager:
+    """Package uploaded videos as HLS renditions stored next to the original.
+
+    Each rendition is segmented by ffmpeg into ``<key>.hls/<name>/`` and a
+    master playlist is written to ``<key>.hls/master.m3u8``. Renditions
+    without a height are stream copies; renditions with a height/bitrate are
+    re-encoded with libx264 for adaptive switching.
+    """
+
+    def __init__(self, aws_integration):
+        self.aws_integration = aws_integration
+        self._packaging = set()
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        return self.aws_integration.config
+
+    @property
+    def ffmpeg_path(self):
+        return self.config.get('ffmpeg_path') or shutil.which('ffmpeg')
+
+    def is_available(self):
+        return bool(self.ffmpeg_path)
+
+    @staticmethod
+    def hls_prefix(video_key):
+        """Prefix holding the HLS output for a video"""
+        return f"{video_key}{HLS_SUFFIX}"
+
+    def package_in_background(self, local_path, video_key, bucket=None):
+        """Package a local file on a background thread"""
+        thread = threading.Thread(target=self.package, args=(local_path, video_key, bucket), daemon=True)
+        thread.start()
+        return thread
+
+    def package(self, local_path, video_key, bucket=None):
+        """Segment a local video into HLS renditions and upload them"""
+        if not self.is_available():
+            logger.warning("ffmpeg not found, skipping HLS packaging")
+            return False
+        bucket = bucket or self.aws_integration.bucket_name
+        with self._lock:
+            if video_key in self._packaging:
+                return False
+            self._packaging.add(video_key)
+
+        try:
+            renditions = self.config.get('hls_renditions') or DEFAULT_RENDITIONS
+            segment_type = self.config.get('hls_segment_type', 'fmp4')
+            with tempfile.TemporaryDirectory() as temp_dir:
+                variants = []
+                for rendition in renditions:
+                    out_dir = os.path.join(temp_dir, rendition['name'])
+                    os.makedirs(out_dir)
+                    self._segment(local_path, out_dir, rendition, segment_type)
+                    variants.append((rendition, self._measure_bandwidth(out_dir)))
+
+                with open(os.path.join(temp_dir, MASTER_PLAYLIST), 'w') as f:
+                    f.write(self._master_playlist(variants))
+
+                self._upload_directory(temp_dir, bucket, self.hls_prefix(video_key))
+            logger.info(f"Packaged {video_key} as HLS ({len(renditions)} renditions)")
+            return True
+        except Exception as e:
+            logger.error(f"Error packaging {video_key} as HLS: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._packaging.discard(video_key)
+
+    def _segment(self, local_path, out_dir, rendition, segment_type):
+        cmd = [self.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y', '-i', local_path,
+               '-map', '0:v:0', '-map', '0:a:0?']
+        if rendition.get('height'):
+            cmd += ['-vf', f"scale=-2:{int(rendition['height'])}", '-c:v', 'libx264', '-preset', 'veryfast',
+                    '-c:a', 'aac', '-b:a', '128k']
+            if rendition.get('bitrate'):
+                cmd += ['-b:v', str(rendition['bitrate'])]
+        else:
+            cmd += ['-c', 'copy']
+
+        extension = 'm4s' if segment_type == 'fmp4' else 'ts'
+        cmd += ['-f', 'hls', '-hls_time', str(self.config.get('hls_segment_seconds', 6)),
+                '-hls_playlist_type', 'vod',
+                '-hls_segment_filename', os.path.join(out_dir, f"segment_%05d.{extension}")]
+        if segment_type == 'fmp4':
+            cmd += ['-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', 'init.mp4']
+        cmd.append(os.path.join(out_dir, MEDIA_PLAYLIST))
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+
+    def _measure_bandwidth(self, out_dir):
+        """Peak bits per second over the segments of a rendition"""
+        peak = 0
+        with open(os.path.join(out_dir, MEDIA_PLAYLIST)) as f:
+            duration = None
+            for line in f:
+                line = line.strip()
+                if line.startswith('#EXTINF:'):
+                    duration = float(line[8:].split(',')[0])
+                elif line and not line.startswith('#') and duration:
+                    size = os.path.getsize(os.path.join(out_dir, line))
+                    peak = max(peak, int(size * 8 / duration))
+                    duration = None
+        return peak or 1
+
+    def _master_playlist(self, variants):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:7', '#EXT-X-INDEPENDENT-SEGMENTS']
+        for rendition, bandwidth in variants:
+            attributes = f"BANDWIDTH={bandwidth}"
+            if rendition.get('height'):
+                attributes += f",NAME=\"{rendition['name']}\""
+            lines.append(f"#EXT-X-STREAM-INF:{attributes}")
+            lines.append(f"{rendition['name']}/{MEDIA_PLAYLIST}")
+        return '\n'.join(lines) + '\n'
+
+    def _upload_directory(self, directory, bucket, prefix):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                key = prefix + os.path.relpath(path, directory).replace('\\', '/')
+                content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+                self.aws_integration.s3.upload_file(path, bucket, key, ExtraArgs={'ContentType': content_type})
+
+    def get_master_playlist(self, video_key, rendition_url, bucket=None):
+        """Return the master playlist with variant URIs produced by rendition_url(name)"""
+        playlist = self._read_playlist(bucket, self.hls_prefix(video_key) + MASTER_PLAYLIST)
+        lines = []
+        for line in playlist.splitlines():
+            if line and not line.startswith('#'):
+                line = rendition_url(line.split('/')[0])
+            lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    def get_media_playlist(self, video_key, rendition, bucket=None, expiration=3600):
+        """Return a rendition playlist whose segment URIs are presigned URLs"""
+        bucket = bucket or self.aws_integration.bucket_name
+        base = f"{self.hls_prefix(video_key)}{rendition}/"
+        playlist = self._read_playlist(bucket, base + MEDIA_PLAYLIST)
+
+        def presign(name):
+            return self.aws_integration.video.presign(bucket, base + name, expiration)
+
+        lines = []
+        for line in playlist.splitlines():
+            if line.startswith('#EXT-X-MAP:'):
+                line = re.sub(r'URI="([^"]+)"', lambda m: f'URI="{presign(m.group(1))}"', line)
+            elif line and not line.startswith('#'):
+                line = presign(line)
+            lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    def _read_playlist(self, bucket, key):
+        bucket = bucket or self.aws_integration.bucket_name
+        response = self.aws_integration.s3.get_object(Bucket=bucket, Key=key)
+        return response['Body'].read().decode('utf-8')
@@ -0,0 +1,626 @@
+# File: backend/managers/keyframe_extractor.py
+import os
+import struct
+import logging
+import tempfile
+import cv2
+import requests
+from ..sync.faststart import FASTSTART_EXTENSIONS, parse_box
+
+logger = logging.getLogger(__name__)
+
+MATROSKA_EXTENSIONS = {'.mkv', '.webm'}
+# Where in the video to take the thumbnail, as a fraction of its duration
+DEFAULT_POSITION = 0.1
+MAX_TOP_LEVEL_BOXES = 64
+MAX_INDEX_SIZE = 32 * 1024 * 1024
+MAX_FRAME_BYTES = 8 * 1024 * 1024
+# Gaps between samples smaller than this are read rather than split into two requests
+MERGE_GAP = 64 * 1024
+MKV_HEAD_SIZE = 16 * 1024
+PREVIEW_READ_SIZE = 512 * 1024
+ANNEX_B_START = b'\x00\x00\x00\x01'
+# Assumed frame rate when the container does not say
+DEFAULT_SOURCE_FPS = 25
+
+
+class KeyframeError(Exception):
+    """The container could not be indexed; callers fall back to a plain download"""
+
+
+class RangeReader:
+    """Read byte ranges of a URL, counting what was transferred"""
+
+    def __init__(self, url, session=None, timeout=30):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.size = None
+        self.bytes_read = 0
+        self.requests = 0
+
+    def read(self, offset, length):
+        if self.size is not None:
+            length = min(length, self.size - offset)
+        if length <= 0:
+            return b''
+        headers = {'Range': f"bytes={offset}-{offset + length - 1}"}
+        with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code != 206:
+                # Never fall into downloading a whole object
+                raise KeyframeError(f"Range request answered with {response.status_code}")
+            content_range = response.headers.get('Content-Range', '')
+            if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+                self.size = int(content_range.rsplit('/', 1)[1])
+            data = response.content[:length]
+        self.bytes_read += len(data)
+        self.requests += 1
+        return data
+
+    def read_ranges(self, ranges):
+        """Read (offset, size) pieces, merging ones that are close together"""
+        pieces = sorted(set(ranges))
+        merged = []
+        for offset, size in pieces:
+            if merged and offset - (merged[-1][0] + merged[-1][1]) <= MERGE_GAP:
+                start = merged[-1][0]
+                merged[-1] = (start, max(merged[-1][1], offset + size - start))
+            else:
+                merged.append((offset, size))
+        blocks = [(start, self.read(start, size)) for start, size in merged]
+        result = {}
+        for offset, size in pieces:
+            for start, data in blocks:
+                if start <= offset and offset + size <= start + len(data):
+                    result[offset] = data[offset - start:offset - start + size]
+                    break
+            else:
+                raise KeyframeError(f"Short read at offset {offset}")
+        return [result[offset] for offset, _ in ranges]
+
+
+def _sampling(count, source_fps, sample_fps):
+    """Return (source frames to fetch, decode step) for count frames at sample_fps"""
+    step = max(1, round(source_fps / sample_fps)) if sample_fps and source_fps else 1
+    return (count - 1) * step + 1, step
+
+
+# --- MP4 / MOV ---------------------------------------------------------------
+
+def _full_box_table(payload, fmt, header=8):
+    """Entries of a version/flags + count table box such as stts or stco"""
+    count = struct.unpack_from('>I', payload, 4)[0]
+    size = struct.calcsize(fmt)
+    if header + count * size > len(payload):
+        raise KeyframeError("Truncated sample table")
+    return list(struct.iter_unpack(fmt, payload[header:header + count * size]))
+
+
+def _child(box, box_type):
+    return next((c for c in box.children or [] if c.type == box_type), None)
+
+
+def _find_moov(reader):
+    offset = 0
+    for _ in range(MAX_TOP_LEVEL_BOXES):
+        header = reader.read(offset, 16)
+        if len(header) < 8:
+            break
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = reader.size - offset
+        if size < header_size:
+            break
+        if box_type == b'moov':
+            if size > MAX_INDEX_SIZE:
+                raise KeyframeError(f"moov box too large ({size} bytes)")
+            return parse_box(b'moov', reader.read(offset + header_size, size - header_size))
+        offset += size
+    raise KeyframeError("No moov box found")
+
+
+def _video_track(moov):
+    for trak in moov.children:
+        if trak.type != b'trak':
+            continue
+        mdia = _child(trak, b'mdia')
+        hdlr = mdia and _child(mdia, b'hdlr')
+        if hdlr and hdlr.payload[8:12] == b'vide':
+            return mdia
+    raise KeyframeError("No video track")
+
+
+def _sample_entry(stbl):
+    """Return (format, {child type: payload}) of the first video sample description"""
+    stsd = _child(stbl, b'stsd').payload
+    entry_size, entry_format = struct.unpack_from('>I4s', stsd, 8)
+    entry = stsd[16:8 + entry_size]
+    children = {}
+    offset = 78  # fixed VisualSampleEntry fields after the 8-byte header
+    while offset + 8 <= len(entry):
+        size, child_type = struct.unpack_from('>I4s', entry, offset)
+        if size < 8:
+            break
+        children[child_type] = entry[offset + 8:offset + size]
+        offset += size
+    return entry_format, children
+
+
+def _read_descriptor(data, offset):
+    """Return (tag, payload start, payload end) of an MPEG-4 descriptor"""
+    tag = data[offset]
+    offset += 1
+    size = 0
+    for _ in range(4):
+        byte = data[offset]
+        offset += 1
+        size = (size << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, offset, offset + size
+
+
+def _mpeg4_decoder_config(esds):
+    """DecoderSpecificInfo (the VOL header) from an esds payload"""
+    tag, start, end = _read_descriptor(esds, 4)
+    if tag != 3:
+        raise KeyframeError("Malformed esds")
+    flags = esds[start + 2]
+    offset = start + 3
+    if flags & 0x80:
+        offset += 2
+    if flags & 0x40:
+        offset += 1 + esds[offset]
+    if flags & 0x20:
+        offset += 2
+    tag, start, end = _read_descriptor(esds, offset)
+    if tag != 4:
+        raise KeyframeError("Malformed esds")
+    tag, start, end = _read_descriptor(esds, start + 13)
+    return esds[start:end] if tag == 5 else b''
+
+
+def _avc_parameter_sets(avcc):
+    length_size = (avcc[4] & 3) + 1
+    offset = 6
+    nals = []
+    for count_mask in (0x1F, 0xFF):
+        count = avcc[offset - 1] & count_mask
+        for _ in range(count):
+            size = struct.unpack_from('>H', avcc, offset)[0]
+            nals.append(avcc[offset + 2:offset + 2 + size])
+            offset += 2 + size
+        offset += 1
+    return length_size, nals
+
+
+def _hevc_parameter_sets(hvcc):
+    length_size = (hvcc[21] & 3) + 1
+    offset = 23
+    nals = []
+    for _ in range(hvcc[22]):
+        count = struct.unpack_from('>H', hvcc, offset + 1)[0]
+        offset += 3
+        for _ in range(count):
+            size = struct.unpack_from('>H', hvcc, offset)[0]
+            nals.append(hvcc[offset + 2:offset + 2 + size])
+            offset += 2 + size
+    return length_size, nals
+
+
+def _to_annex_b(sample, length_size):
+    """Replace the length prefixes of an MP4 sample's NAL units with start codes"""
+    out = []
+    offset = 0
+    while offset + length_size <= len(sample):
+        size = int.from_bytes(sample[offset:offset + length_size], 'big')
+        offset += length_size
+        out.append(ANNEX_B_START + sample[offset:offset + size])
+        offset += size
+    return b''.join(out)
+
+
+def _elementary_stream(entry_format, children):
+    """Return (file suffix, stream header, sample converter) for a sample description"""
+    if entry_format in (b'avc1', b'avc3') and b'avcC' in children:
+        length_size, nals = _avc_parameter_sets(children[b'avcC'])
+        return '.h264', b''.join(ANNEX_B_START + n for n in nals), lambda s: _to_annex_b(s, length_size)
+    if entry_format in (b'hvc1', b'hev1') and b'hvcC' in children:
+        length_size, nals = _hevc_parameter_sets(children[b'hvcC'])
+        return '.hevc', b''.join(ANNEX_B_START + n for n in nals), lambda s: _to_annex_b(s, length_size)
+    if entry_format == b'mp4v' and b'esds' in children:
+        return '.m4v', _mpeg4_decoder_config(children[b'esds']), lambda s: s
+    raise KeyframeError(f"Unsupported codec {entry_format!r}")
+
+
+def _sample_locations(stbl):
+    """Return [(offset, size)] for every sample, in decode order"""
+    stsz = _child(stbl, b'stsz')
+    if stsz is None:
+        raise KeyframeError("No stsz box")
+    uniform_size, count = struct.unpack_from('>II', stsz.payload, 4)
+    sizes = [uniform_size] * count if uniform_size else [s for s, in _full_box_table(stsz.payload[4:], '>I')]
+    chunk_box = _child(stbl, b'stco') or _child(stbl, b'co64')
+    if chunk_box is None:
+        raise KeyframeError("No chunk offset table")
+    chunk_offsets = [o for o, in _full_box_table(chunk_box.payload, '>I' if chunk_box.type == b'stco' else '>Q')]
+    stsc = _full_box_table(_child(stbl, b'stsc').payload, '>III')
+
+    locations = []
+    sample = 0
+    for i, (first_chunk, per_chunk, _) in enumerate(stsc):
+        last_chunk = stsc[i + 1][0] - 1 if i + 1 < len(stsc) else len(chunk_offsets)
+        for chunk in range(first_chunk - 1, last_chunk):
+            offset = chunk_offsets[chunk]
+            for size in sizes[sample:sample + per_chunk]:
+                locations.append((offset, size))
+                offset += size
+            sample += per_chunk
+    return locations
+
+
+class _Mp4Index:
+    """Sample tables of an MP4/MOV video track, read once per file"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        mdia = _video_track(_find_moov(reader))
+        mdhd = _child(mdia, b'mdhd').payload
+        self.timescale = struct.unpack_from('>I', mdhd, 20 if mdhd[0] == 1 else 12)[0]
+        stbl = _child(_child(mdia, b'minf'), b'stbl')
+        self.suffix, self.header, self.convert = _elementary_stream(*_sample_entry(stbl))
+
+        # Decode time of every sample from the run-length stts table
+        self.times = []
+        elapsed = 0
+        for run, delta in _full_box_table(_child(stbl, b'stts').payload, '>II'):
+            for _ in range(run):
+                self.times.append(elapsed)
+                elapsed += delta
+        self.duration = elapsed
+        self.fps = self.timescale * len(self.times) / elapsed if elapsed else 0
+        stss = _child(stbl, b'stss')
+        self.sync = [n - 1 for n, in _full_box_table(stss.payload, '>I')] if stss is not None else None
+        self.locations = _sample_locations(stbl)
+
+    def stream(self, position, count, sample_fps=None):
+        """Return (suffix, elementary stream, decode step) for frames from a keyframe near position"""
+        target = position * self.duration if position < 1 else position * self.timescale
+        source_count, step = _sampling(count, self.fps, sample_fps)
+        sample = max((i for i, t in enumerate(self.times) if t <= target), default=0)
+        if self.sync:
+            sample = max((s for s in self.sync if s <= sample), default=self.sync[0])
+
+        locations = self.locations[sample:sample + source_count]
+        if not locations or sum(size for _, size in locations) > MAX_FRAME_BYTES:
+            raise KeyframeError("No usable samples")
+        samples = self.reader.read_ranges(locations)
+        return self.suffix, self.header + b''.join(self.convert(s) for s in samples), step
+
+
+# --- Matroska / WebM ------------------------------------------------------------
+
+EBML_HEADER = 0x1A45DFA3
+EBML_SEGMENT = 0x18538067
+EBML_SEEK_HEAD = 0x114D9B74
+EBML_SEEK = 0x4DBB
+EBML_SEEK_ID = 0x53AB
+EBML_SEEK_POSITION = 0x53AC
+EBML_INFO = 0x1549A966
+EBML_TIMESTAMP_SCALE = 0x2AD7B1
+EBML_DURATION = 0x4489
+EBML_TRACKS = 0x1654AE6B
+EBML_TRACK_ENTRY = 0xAE
+EBML_TRACK_NUMBER = 0xD7
+EBML_TRACK_TYPE = 0x83
+EBML_DEFAULT_DURATION = 0x23E383
+EBML_CUES = 0x1C53BB6B
+EBML_CUE_POINT = 0xBB
+EBML_CUE_TIME = 0xB3
+EBML_CUE_TRACK_POSITIONS = 0xB7
+EBML_CUE_TRACK = 0xF7
+EBML_CUE_CLUSTER_POSITION = 0xF1
+EBML_CUE_RELATIVE_POSITION = 0xF0
+EBML_CLUSTER = 0x1F43B675
+EBML_CLUSTER_TIMESTAMP = 0xE7
+EBML_SIMPLE_BLOCK = 0xA3
+EBML_BLOCK_GROUP = 0xA0
+EBML_BLOCK = 0xA1
+EBML_UNKNOWN_SIZE = b'\x01\xff\xff\xff\xff\xff\xff\xff'
+
+
+def _read_vint(data, offset, keep_marker=False):
+    """Return (value, length) of an EBML variable-length integer"""
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or offset + length > len(data):
+        raise KeyframeError("Bad EBML integer")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = None  # unknown size
+    return value, length
+
+
+def _element_header(data, offset):
+    """Return (id, payload size, header length) of the element at offset"""
+    element_id, id_length = _read_vint(data, offset, keep_marker=True)
+    size, size_length = _read_vint(data, offset + id_length)
+    return element_id, size, id_length + size_length
+
+
+def _iter_elements(data, start=0, end=None):
+    """Yield (id, offset, payload start, payload end) for the complete elements in data"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset < end:
+        try:
+            element_id, size, header = _element_header(data, offset)
+        except (KeyframeError, IndexError):
+            return
+        if size is None:
+            yield element_id, offset, offset + header, end
+            return
+        if offset + header + size > end:
+            return
+        yield element_id, offset, offset + header, offset + header + size
+        offset += header + size
+
+
+def _fields(data, start, end):
+    """{id: payload} of the child elements in data[start:end]"""
+    return {i: data[a:b] for i, _, a, b in _iter_elements(data, start, end)}
+
+
+def _uint(data):
+    return int.from_bytes(data, 'big')
+
+
+def _read_element(reader, offset):
+    """Read the whole element at an absolute offset; returns (bytes, header length)"""
+    head = reader.read(offset, 16)
+    _, size, header = _element_header(head, 0)
+    if size is None or size > MAX_INDEX_SIZE:
+        raise KeyframeError("Element too large to index")
+    return reader.read(offset, header + size), header
+
+
+def _block_track(data, element_id, start, end):
+    """Track number of a SimpleBlock or of the Block inside a BlockGroup"""
+    if element_id == EBML_BLOCK_GROUP:
+        block = next(((a, b) for i, _, a, b in _iter_elements(data, start, end) if i == EBML_BLOCK), None)
+        if block is None:
+            return None
+        start = block[0]
+    return _read_vint(data, start)[0]
+
+
+def _mkv_level1_positions(head):
+    """Return (segment offset, segment payload offset, {id: absolute offset}) from the file head"""
+    ebml_id, size, header = _element_header(head, 0)
+    if ebml_id != EBML_HEADER:
+        raise KeyframeError("Not an EBML file")
+    segment_offset = header + size
+    segment_id, _, header = _element_header(head, segment_offset)
+    if segment_id != EBML_SEGMENT:
+        raise KeyframeError("No Matroska segment")
+    segment_start = segment_offset + header
+
+    # Elements before the first cluster, plus whatever the SeekHead points at
+    positions = {}
+    for element_id, offset, start, end in _iter_elements(head, segment_start):
+        if element_id == EBML_CLUSTER:
+            break
+        positions.setdefault(element_id, offset)
+        if element_id != EBML_SEEK_HEAD:
+            continue
+        for seek_id, _, seek_start, seek_end in _iter_elements(head, start, end):
+            fields = _fields(head, seek_start, seek_end) if seek_id == EBML_SEEK else {}
+            if EBML_SEEK_ID in fields and EBML_SEEK_POSITION in fields:
+                target = _read_vint(fields[EBML_SEEK_ID], 0, keep_marker=True)[0]
+                positions.setdefault(target, segment_start + _uint(fields[EBML_SEEK_POSITION]))
+    return segment_offset, segment_start, positions
+
+
+class _MkvIndex:
+    """Info, Tracks and Cues of a Matroska/WebM file, read once per file"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.head = reader.read(0, MKV_HEAD_SIZE)
+        self.segment_offset, self.segment_start, positions = _mkv_level1_positions(self.head)
+        if not all(k in positions for k in (EBML_INFO, EBML_TRACKS, EBML_CUES)):
+            raise KeyframeError("Matroska file has no cues")
+        (self.info, info_header), (self.tracks, tracks_header), (cues, cues_header) = (
+            _read_element(reader, positions[k]) for k in (EBML_INFO, EBML_TRACKS, EBML_CUES)
+        )
+
+        info_fields = _fields(self.info, info_header, len(self.info))
+        self.scale = _uint(info_fields.get(EBML_TIMESTAMP_SCALE, b'')) or 1000000
+        duration = info_fields.get(EBML_DURATION)
+        self.duration = struct.unpack('>d' if len(duration) == 8 else '>f', duration)[0] if duration else 0
+
+        self.video_track = None
+        for element_id, _, start, end in _iter_elements(self.tracks, tracks_header):
+            fields = _fields(self.tracks, start, end) if element_id == EBML_TRACK_ENTRY else {}
+            if _uint(fields.get(EBML_TRACK_TYPE, b'')) == 1:
+                self.video_track = _uint(fields.get(EBML_TRACK_NUMBER, b''))
+                frame_duration = _uint(fields.get(EBML_DEFAULT_DURATION, b''))
+                break
+        if self.video_track is None:
+            raise KeyframeError("No video track")
+        self.fps = 1e9 / frame_duration if frame_duration else DEFAULT_SOURCE_FPS
+
+        # Cue points mark keyframes of the video track
+        self.cue_points = []
+        for element_id, _, start, end in _iter_elements(cues, cues_header):
+            if element_id != EBML_CUE_POINT:
+                continue
+            point = _fields(cues, start, end)
+            for field_id, _, a, b in _iter_elements(cues, start, end):
+                track = _fields(cues, a, b) if field_id == EBML_CUE_TRACK_POSITIONS else {}
+                if _uint(track.get(EBML_CUE_TRACK, b'')) == self.video_track:
+                    self.cue_points.append((
+                        _uint(point.get(EBML_CUE_TIME, b'')),
+                        _uint(track.get(EBML_CUE_CLUSTER_POSITION, b'')),
+                        _uint(track.get(EBML_CUE_RELATIVE_POSITION, b''))
+                    ))
+        if not self.cue_points:
+            raise KeyframeError("No cue for the video track")
+        self.cue_points.sort()
+
+    def stream(self, position, count, sample_fps=None):
+        """Return (suffix, minimal Matroska file, decode step) for frames from the cue before position"""
+        reader = self.reader
+        source_count, step = _sampling(count, self.fps, sample_fps)
+        target = position * self.duration if position < 1 else position * 1e9 / self.scale
+        cue = max((c for c in self.cue_points if c[0] <= target), default=self.cue_points[0])
+
+        cluster_offset = self.segment_start + cue[1]
+        cluster_head = reader.read(cluster_offset, 32)
+        cluster_id, cluster_size, header = _element_header(cluster_head, 0)
+        if cluster_id != EBML_CLUSTER:
+            raise KeyframeError("Cue does not point at a cluster")
+        timestamp = _fields(cluster_head, header, len(cluster_head)).get(EBML_CLUSTER_TIMESTAMP)
+        if timestamp is None:
+            raise KeyframeError("Cluster timestamp not found")
+        data_start = cluster_offset + header
+        block_start = data_start + cue[2]
+        cluster_end = data_start + cluster_size if cluster_size is not None else reader.size
+        if source_count == 1:
+            # Just the keyframe's block
+            _, block_size, block_header = _element_header(reader.read(block_start, 16), 0)
+            read_size = block_header + (block_size or 0)
+        else:
+            read_size = PREVIEW_READ_SIZE
+
+        # Read on from the keyframe until enough frames are complete
+        data = b''
+        while True:
+            more = reader.read(block_start + len(data), min(read_size, MAX_FRAME_BYTES - len(data)))
+            data += more
+            blocks, clusters, found = _mkv_blocks(data, cluster_end - block_start, self.video_track, source_count)
+            if found >= source_count or not more or len(data) >= MAX_FRAME_BYTES:
+                break
+        if not found:
+            raise KeyframeError("No block at the cue position")
+
+        # A minimal file: EBML header, Info, Tracks, the keyframe's cluster and any later ones read
+        cluster_body = bytes([EBML_CLUSTER_TIMESTAMP, 0x80 | len(timestamp)]) + timestamp + b''.join(blocks)
+        return '.mkv', b''.join([
+            self.head[:self.segment_offset],
+            struct.pack('>I', EBML_SEGMENT), EBML_UNKNOWN_SIZE,
+            self.info, self.tracks,
+            struct.pack('>I', EBML_CLUSTER), b'\x01' + len(cluster_body).to_bytes(7, 'big'), cluster_body,
+            *clusters
+        ]), step
+
+
+def _mkv_blocks(data, first_cluster_end, video_track, count):
+    """Split bytes read from a keyframe block onward into the blocks left in its
+    cluster and the complete clusters after it, stopping at count video frames.
+
+    Returns (blocks, clusters, video frames found).
+    """
+    blocks, clusters, found = [], [], 0
+    for element_id, offset, start, end in _iter_elements(data, 0, min(first_cluster_end, len(data))):
+        if element_id not in (EBML_SIMPLE_BLOCK, EBML_BLOCK_GROUP):
+            continue
+        blocks.append(data[offset:end])
+        if _block_track(data, element_id, start, end) == video_track:
+            found += 1
+            if found >= count:
+                return blocks, clusters, found
+    if first_cluster_end >= len(data):
+        return blocks, clusters, found
+    for element_id, offset, start, end in _iter_elements(data, first_cluster_end):
+        if element_id != EBML_CLUSTER:
+            continue
+        clusters.append(data[offset:end])
+        found += sum(
+            1 for block_id, _, a, b in _iter_elements(data, start, end)
+            if block_id in (EBML_SIMPLE_BLOCK, EBML_BLOCK_GROUP) and _block_track(data, block_id, a, b) == video_track
+        )
+        if found >= count:
+            break
+    return blocks, clusters, found
+
+
+# --- Decoding ---------------------------------------------------------------------
+
+def _open_index(url, suffix, session=None):
+    suffix = suffix.lower()
+    reader = RangeReader(url, session)
+    if suffix in FASTSTART_EXTENSIONS:
+        return _parsing(_Mp4Index, reader)
+    if suffix in MATROSKA_EXTENSIONS:
+        return _parsing(_MkvIndex, reader)
+    raise KeyframeError(f"Unsupported container {suffix}")
+
+
+def _parsing(func, *args):
+    """Call a container parser, reporting malformed data as KeyframeError"""
+    try:
+        return func(*args)
+    except (struct.error, IndexError, AttributeError, TypeError, ZeroDivisionError) as e:
+        raise KeyframeError(f"Could not parse container: {e}")
+
+
+def iter_frames(url, suffix, count=1, position=DEFAULT_POSITION, session=None, sample_fps=None):
+    """Decode up to count frames starting at a keyframe near position.
+
+    position is a fraction of the duration when below 1, otherwise seconds.
+    With sample_fps, frames are spaced to that rate instead of consecutive.
+    Only the container index and the bytes of the chosen samples are fetched,
+    before this returns; frames are decoded lazily as the iterator is read.
+    Raises KeyframeError when the container cannot be handled.
+    """
+    index = _open_index(url, suffix, session)
+    stream_suffix, stream, step = _parsing(index.stream, position, count, sample_fps)
+    logger.debug(f"Fetched {index.reader.bytes_read} bytes in {index.reader.requests} requests")
+    return _decode(stream_suffix, stream, count, step)
+
+
+def extract_keyframes(url, suffix, positions, session=None):
+    """Decode one keyframe near each position, reading the container index once.
+
+    Positions whose keyframe fails to decode are skipped.
+    """
+    index = _open_index(url, suffix, session)
+    frames = []
+    for position in positions:
+        stream_suffix, stream, step = _parsing(index.stream, position, 1)
+        frames.extend(_decode(stream_suffix, stream, 1, step))
+    return frames
+
+
+def _decode(stream_suffix, stream, count, step):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        stream_path = os.path.join(temp_dir, f"keyframe{stream_suffix}")
+        with open(stream_path, 'wb') as f:
+            f.write(stream)
+        cap = cv2.VideoCapture(stream_path)
+        try:
+            yield from sample_frames(cap, count, step)
+        finally:
+            cap.release()
+
+
+def sample_frames(cap, count, step=1):
+    """Yield every step-th frame of a capture, up to count frames"""
+    index = 0
+    while count > 0:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        if index % step == 0:
+            yield frame
+            count -= 1
+        index += 1
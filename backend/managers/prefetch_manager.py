@@ -0,0 +1,198 @@
+# File: backend/managers/prefetch_manager.py
+import os
+import time
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from ..sync.faststart import FASTSTART_EXTENSIONS
+from ..sync.upload_activity import upload_activity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEAD_BYTES = 4 * 1024 * 1024
+DEFAULT_BYTES_PER_SECOND = 2 * 1024 * 1024
+MAX_QUEUE = 500
+# A moov box larger than this is left to on-demand reads
+MAX_MOOV_PREFETCH = 16 * 1024 * 1024
+MAX_TOP_LEVEL_BOXES = 32
+# Seconds without upload traffic before prefetch resumes
+UPLOAD_QUIET_SECONDS = 2
+
+
+class TokenBucket:
+    """Bandwidth budget: consume() blocks until enough bytes have accrued"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount, stop_event=None):
+        """Wait for amount bytes of budget; False if stopped while waiting.
+
+        Requests larger than the bucket may proceed once it is full and run
+        it into debt, which later requests pay back.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return True
+                wait = (needed - self.tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class PrefetchManager:
+    """Warm the chunk cache with the start of videos the user is looking at.
+
+    For each queued video the first ``prefetch_head_bytes`` are fetched, and
+    for MP4/MOV files whose moov box sits after the media data the chunks
+    holding moov are fetched as well, so playback through the range proxy
+    starts from disk. A single worker spends a token-bucket budget and waits
+    while uploads are running. Queuing a new page replaces the old one.
+    """
+
+    def __init__(self, aws_integration):
+        self.aws_integration = aws_integration
+        self._queue = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._budget = TokenBucket(self.bytes_per_second, self.bytes_per_second)
+        self.fetched_bytes = 0
+
+    @property
+    def config(self):
+        return self.aws_integration.config
+
+    @property
+    def head_bytes(self):
+        return self.config.get('prefetch_head_bytes', DEFAULT_HEAD_BYTES)
+
+    @property
+    def bytes_per_second(self):
+        return self.config.get('prefetch_bytes_per_second', DEFAULT_BYTES_PER_SECOND)
+
+    def enqueue(self, bucket, keys, replace=True):
+        """Queue videos for prefetch; by default drop what an earlier page queued"""
+        keys = [k for k in keys if self.aws_integration.is_video_file(k)][:MAX_QUEUE]
+        with self._lock:
+            if replace:
+                self._queue.clear()
+            for key in keys:
+                self._queue[(bucket, key)] = None
+            while len(self._queue) > MAX_QUEUE:
+                self._queue.popitem(last=False)
+        self._ensure_worker()
+        self._wakeup.set()
+        return len(keys)
+
+    def pending(self):
+        with self._lock:
+            return len(self._queue)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+                self._thread.start()
+
+    def _next(self):
+        with self._lock:
+            if not self._queue:
+                return None
+            return self._queue.popitem(last=False)[0]
+
+    def _run(self):
+        while not self._stop.is_set():
+            item = self._next()
+            if item is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            try:
+                self._prefetch(*item)
+            except Exception as e:
+                logger.debug(f"Prefetch of {item[1]} failed: {e}")
+
+    def _fetch_chunk(self, bucket, key, etag, size, index):
+        """Fetch one chunk within the budget and only while no upload is running"""
+        cache = self.aws_integration.chunk_cache
+        if cache.has_chunk(bucket, key, etag, index):
+            return cache.get_chunk(bucket, key, etag, size, index)
+        while not upload_activity.wait_idle(UPLOAD_QUIET_SECONDS, timeout=1):
+            if self._stop.is_set():
+                return None
+        self._budget.capacity = max(self.bytes_per_second, cache.chunk_size)
+        self._budget.rate = self.bytes_per_second
+        if not self._budget.consume(cache.chunk_size, self._stop):
+            return None
+        data = cache.get_chunk(bucket, key, etag, size, index)
+        self.fetched_bytes += len(data)
+        return data
+
+    def _prefetch(self, bucket, key):
+        info = self.aws_integration.get_file_info(bucket, key)
+        etag, size = info.get('etag'), info['size']
+        chunk_size = self.aws_integration.chunk_cache.chunk_size
+        head_chunks = min(-(-self.head_bytes // chunk_size), -(-size // chunk_size))
+        for index in range(head_chunks):
+            if self._fetch_chunk(bucket, key, etag, size, index) is None:
+                return
+        if os.path.splitext(key)[1].lower() in FASTSTART_EXTENSIONS:
+            self._prefetch_moov(bucket, key, etag, size)
+
+    def _read(self, bucket, key, etag, size, offset, length):
+        """Read bytes across chunk boundaries through the budgeted fetch"""
+        chunk_size = self.aws_integration.chunk_cache.chunk_size
+        parts = []
+        for index in range(offset // chunk_size, (offset + length - 1) // chunk_size + 1):
+            data = self._fetch_chunk(bucket, key, etag, size, index)
+            if data is None:
+                return None
+            parts.append(data)
+        start = offset - (offset // chunk_size) * chunk_size
+        return b''.join(parts)[start:start + length]
+
+    def _prefetch_moov(self, bucket, key, etag, size):
+        """Walk the top-level boxes to find moov and fetch its chunks"""
+        offset = 0
+        for _ in range(MAX_TOP_LEVEL_BOXES):
+            if offset + 8 > size:
+                return
+            header = self._read(bucket, key, etag, size, offset, 8)
+            if header is None:
+                return
+            box_size, box_type = struct.unpack('>I4s', header)
+            if box_size == 1:
+                # 64-bit size follows the type
+                large = self._read(bucket, key, etag, size, offset + 8, 8)
+                if large is None or len(large) < 8:
+                    return
+                box_size = struct.unpack('>Q', large)[0]
+            elif box_size == 0:
+                box_size = size - offset
+            if box_size < 8:
+                return
+            if box_type == b'moov':
+                if box_size <= MAX_MOOV_PREFETCH:
+                    self._read(bucket, key, etag, size, offset, min(box_size, size - offset))
+                return
+            offset += box_size
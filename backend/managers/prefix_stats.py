@@ -0,0 +1,214 @@
+# File: backend/managers/prefix_stats.py
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def ancestor_prefixes(key):
+    """Every folder prefix containing key, from the root down ('', 'a/', 'a/b/')"""
+    parts = key.split('/')[:-1]
+    return [''.join(f"{p}/" for p in parts[:i]) for i in range(len(parts) + 1)]
+
+
+class PrefixStatsTree:
+    """Persistent per-prefix totals (bytes, object count, last change).
+
+    One row per folder prefix holds the aggregate of everything below it.
+    Writes touch only the ancestors of the changed key, and reads are a
+    single indexed lookup per folder, so folder stats never require
+    listing the objects beneath them.
+
+    A rebuild streams the listing into a staging table and swaps it in at
+    the end; writes recorded meanwhile are replayed on top of it.
+    """
+
+    def __init__(self, db_path, rebuild_interval=24 * 3600):
+        self.db_path = db_path
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        # bucket -> (folder totals, writes to replay) while a rebuild runs
+        self._rebuilds = {}
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, key)
+                );
+                CREATE TABLE IF NOT EXISTS staged_objects (
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, key)
+                );
+                CREATE TABLE IF NOT EXISTS prefixes (
+                    bucket TEXT NOT NULL,
+                    prefix TEXT NOT NULL,
+                    total_size INTEGER NOT NULL,
+                    file_count INTEGER NOT NULL,
+                    last_modified TEXT,
+                    PRIMARY KEY (bucket, prefix)
+                );
+                CREATE TABLE IF NOT EXISTS buckets (
+                    bucket TEXT PRIMARY KEY,
+                    built_at REAL NOT NULL
+                );
+            """)
+
+    def is_built(self, bucket):
+        """Whether the bucket has a reasonably fresh full build"""
+        with self._lock:
+            row = self._conn.execute('SELECT built_at FROM buckets WHERE bucket = ?', (bucket,)).fetchone()
+        return bool(row) and datetime.now(timezone.utc).timestamp() - row[0] < self.rebuild_interval
+
+    def rebuild(self, bucket, objects):
+        """Replace a bucket's tree from an iterable of (key, size, last_modified)"""
+        self.start_rebuild(bucket)
+        try:
+            self.stage(bucket, objects)
+        except BaseException:
+            self.abort_rebuild(bucket)
+            raise
+        self.finish_rebuild(bucket)
+
+    def start_rebuild(self, bucket):
+        """Begin staging a new tree; the current one keeps serving reads and writes"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM staged_objects WHERE bucket = ?', (bucket,))
+            self._rebuilds[bucket] = ({}, [])
+
+    def stage(self, bucket, objects):
+        """Add one batch of (key, size, last_modified) from the listing"""
+        totals = self._rebuilds[bucket][0]
+        rows = []
+        for key, size, last_modified in objects:
+            rows.append((bucket, key, size))
+            for prefix in ancestor_prefixes(key):
+                total = totals.setdefault(prefix, [0, 0, None])
+                total[0] += size
+                total[1] += 1
+                if last_modified and (total[2] is None or last_modified > total[2]):
+                    total[2] = last_modified
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO staged_objects VALUES (?, ?, ?)', rows)
+
+    def finish_rebuild(self, bucket):
+        """Swap the staged tree in and replay the writes made since start_rebuild"""
+        with self._lock, self._conn:
+            totals, writes = self._rebuilds.pop(bucket)
+            self._conn.execute('DELETE FROM objects WHERE bucket = ?', (bucket,))
+            self._conn.execute('DELETE FROM prefixes WHERE bucket = ?', (bucket,))
+            self._conn.execute(
+                'INSERT INTO objects SELECT bucket, key, size FROM staged_objects WHERE bucket = ?', (bucket,)
+            )
+            self._conn.execute('DELETE FROM staged_objects WHERE bucket = ?', (bucket,))
+            self._conn.executemany(
+                'INSERT INTO prefixes VALUES (?, ?, ?, ?, ?)',
+                [(bucket, prefix, t[0], t[1], t[2]) for prefix, t in totals.items()]
+            )
+            for write in writes:
+                if write[0] == 'record':
+                    self._record(bucket, *write[1:])
+                else:
+                    self._remove(bucket, write[1])
+            self._conn.execute(
+                'INSERT OR REPLACE INTO buckets VALUES (?, ?)',
+                (bucket, datetime.now(timezone.utc).timestamp())
+            )
+        count = totals[''][1] if '' in totals else 0
+        logger.info(f"Rebuilt folder stats for {bucket}: {count} objects, {len(totals)} folders")
+
+    def abort_rebuild(self, bucket):
+        """Drop a partly staged tree, keeping the current one"""
+        with self._lock, self._conn:
+            self._rebuilds.pop(bucket, None)
+            self._conn.execute('DELETE FROM staged_objects WHERE bucket = ?', (bucket,))
+
+    def record_object(self, bucket, key, size, last_modified=None):
+        """Add or replace one object, updating its ancestors"""
+        last_modified = last_modified or _now()
+        with self._lock, self._conn:
+            self._record(bucket, key, size, last_modified)
+            if bucket in self._rebuilds:
+                self._rebuilds[bucket][1].append(('record', key, size, last_modified))
+
+    def remove_object(self, bucket, key):
+        """Remove one object, updating its ancestors"""
+        with self._lock, self._conn:
+            self._remove(bucket, key)
+            if bucket in self._rebuilds:
+                self._rebuilds[bucket][1].append(('remove', key))
+
+    def _record(self, bucket, key, size, last_modified):
+        row = self._conn.execute(
+            'SELECT size FROM objects WHERE bucket = ? AND key = ?', (bucket, key)
+        ).fetchone()
+        size_delta = size - (row[0] if row else 0)
+        count_delta = 0 if row else 1
+        self._conn.execute('INSERT OR REPLACE INTO objects VALUES (?, ?, ?)', (bucket, key, size))
+        self._apply_delta(bucket, key, size_delta, count_delta, last_modified)
+
+    def _remove(self, bucket, key):
+        row = self._conn.execute(
+            'SELECT size FROM objects WHERE bucket = ? AND key = ?', (bucket, key)
+        ).fetchone()
+        if not row:
+            return
+        self._conn.execute('DELETE FROM objects WHERE bucket = ? AND key = ?', (bucket, key))
+        self._apply_delta(bucket, key, -row[0], -1, _now())
+
+    def get_stats(self, bucket, prefixes):
+        """Return {prefix: {'TotalSize', 'FileCount', 'LastModified'}} for known prefixes"""
+        prefixes = list(prefixes)
+        if not prefixes:
+            return {}
+        stats = {}
+        with self._lock:
+            # Chunked IN queries stay under SQLite's variable limit
+            for i in range(0, len(prefixes), 500):
+                chunk = prefixes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT prefix, total_size, file_count, last_modified FROM prefixes "
+                    f"WHERE bucket = ? AND prefix IN ({','.join('?' * len(chunk))})",
+                    [bucket] + chunk
+                ).fetchall()
+                for prefix, total_size, file_count, last_modified in rows:
+                    stats[prefix] = {
+                        'TotalSize': total_size,
+                        'FileCount': file_count,
+                        'LastModified': last_modified
+                    }
+        return stats
+
+    def _apply_delta(self, bucket, key, size_delta, count_delta, last_modified):
+        prefixes = ancestor_prefixes(key)
+        for prefix in prefixes:
+            self._conn.execute("""
+                INSERT INTO prefixes (bucket, prefix, total_size, file_count, last_modified)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (bucket, prefix) DO UPDATE SET
+                    total_size = total_size + excluded.total_size,
+                    file_count = file_count + excluded.file_count,
+                    last_modified = MAX(COALESCE(last_modified, ''), excluded.last_modified)
+            """, (bucket, prefix, size_delta, count_delta, last_modified))
+        # Folders that became empty no longer exist in the bucket
+        self._conn.execute(
+            f"DELETE FROM prefixes WHERE bucket = ? AND file_count <= 0 "
+            f"AND prefix IN ({','.join('?' * (len(prefixes) - 1))})",
+            [bucket] + prefixes[1:]
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,153 @@
+# File: backend/managers/preview_encoders.py
+import os
+import logging
+import functools
+import tempfile
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_FORMAT = 'webp'
+DEFAULT_PREVIEW_DURATION = 3.0
+DEFAULT_PREVIEW_FPS = 8
+
+
+class PreviewEncoder:
+    """Encode a short looping preview from BGR frames as they are decoded.
+
+    Frames arrive already scaled to the tile size; subclasses write them out
+    incrementally where the format allows.
+    """
+
+    extension = None
+    mimetype = None
+
+    def __init__(self, path, fps, size):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.frames = 0
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def add(self, frame):
+        self._add(frame)
+        self.frames += 1
+
+    def _add(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the file; False if nothing was written"""
+        raise NotImplementedError
+
+
+class _PillowEncoder(PreviewEncoder):
+    """Animated image formats; Pillow writes them in one go, so tile-sized RGB frames are kept"""
+
+    pillow_format = None
+    save_options = {}
+
+    @classmethod
+    def available(cls):
+        try:
+            from PIL import features
+            return cls.pillow_format != 'WEBP' or features.check('webp')
+        except ImportError:
+            return False
+
+    def __init__(self, path, fps, size):
+        super().__init__(path, fps, size)
+        self._images = []
+
+    def _add(self, frame):
+        from PIL import Image
+        # OpenCV decodes to BGR; image formats expect RGB
+        self._images.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+
+    def close(self):
+        if not self._images:
+            return False
+        first, rest = self._images[0], self._images[1:]
+        first.save(
+            self.path, format=self.pillow_format, save_all=True, append_images=rest,
+            duration=int(1000 / self.fps), loop=0, **self.save_options
+        )
+        self._images = []
+        return True
+
+
+class WebPEncoder(_PillowEncoder):
+    extension = '.webp'
+    mimetype = 'image/webp'
+    pillow_format = 'WEBP'
+    save_options = {'quality': 70, 'method': 4}
+
+
+class GIFEncoder(_PillowEncoder):
+    extension = '.gif'
+    mimetype = 'image/gif'
+    pillow_format = 'GIF'
+    save_options = {'optimize': True}
+
+
+class MP4Encoder(PreviewEncoder):
+    """H.264 MP4 loop written frame by frame through OpenCV's FFmpeg backend"""
+
+    extension = '.mp4'
+    mimetype = 'video/mp4'
+    fourcc = 'avc1'
+    _available = None
+
+    @classmethod
+    def available(cls):
+        # OpenCV builds differ in which H.264 encoders they ship; try one once
+        if cls._available is None:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                writer = cv2.VideoWriter(
+                    os.path.join(temp_dir, 'probe.mp4'), cv2.VideoWriter_fourcc(*cls.fourcc), 8, (64, 64)
+                )
+                cls._available = writer.isOpened()
+                if cls._available:
+                    writer.write(np.zeros((64, 64, 3), np.uint8))
+                writer.release()
+        return cls._available
+
+    def __init__(self, path, fps, size):
+        super().__init__(path, fps, size)
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.fourcc), fps, size)
+        if not self._writer.isOpened():
+            raise RuntimeError(f"No {self.fourcc} encoder available")
+
+    def _add(self, frame):
+        self._writer.write(frame)
+
+    def close(self):
+        self._writer.release()
+        return self.frames > 0
+
+
+ENCODERS = {
+    'webp': WebPEncoder,
+    'mp4': MP4Encoder,
+    'gif': GIFEncoder
+}
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_format(preview_format):
+    """Return preview_format if this install can encode it, else a supported fallback"""
+    for name in (preview_format, 'webp', 'gif'):
+        encoder = ENCODERS.get(name)
+        if encoder is not None and encoder.available():
+            if name != preview_format:
+                logger.warning(f"Preview format {preview_format!r} unavailable; using {name}")
+            return name
+    raise RuntimeError("No preview encoder available")
+
+
+def get_encoder(preview_format):
+    return ENCODERS[resolve_format(preview_format)]
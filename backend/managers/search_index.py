@@ -0,0 +1,247 @@
+# File: backend/managers/search_index.py
+import os
+import sqlite3
+import threading
+import itertools
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Trigram FTS needs at least three characters to match anything
+MIN_FTS_QUERY = 3
+
+
+def file_extension(key):
+    name = key.rsplit('/', 1)[-1]
+    return name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SearchIndex:
+    """Local SQLite index of object keys and upload metadata across buckets.
+
+    Rows carry size, last-modified and extension columns for range filters;
+    substring matches on the key and OriginalName go through an FTS5 trigram
+    table when SQLite supports it, and fall back to LIKE scans otherwise.
+    """
+
+    def __init__(self, db_path, rebuild_interval=24 * 3600):
+        self.db_path = db_path
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._generations = itertools.count(int(datetime.now(timezone.utc).timestamp()))
+        # bucket -> (generation, writes to replay) while a rebuild runs
+        self._rebuilds = {}
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    bucket TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    ext TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_modified TEXT,
+                    original_name TEXT,
+                    upload_date TEXT,
+                    generation INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (bucket, key)
+                );
+                CREATE INDEX IF NOT EXISTS files_ext ON files (bucket, ext);
+                CREATE INDEX IF NOT EXISTS files_size ON files (bucket, size);
+                CREATE INDEX IF NOT EXISTS files_modified ON files (bucket, last_modified);
+                CREATE TABLE IF NOT EXISTS buckets (
+                    bucket TEXT PRIMARY KEY,
+                    built_at REAL NOT NULL
+                );
+            """)
+        self.fts_enabled = self._create_fts()
+
+    def _create_fts(self):
+        try:
+            with self._conn:
+                self._conn.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                        key, original_name, content='files', content_rowid='rowid', tokenize='trigram'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS files_ai AFTER INSERT ON files BEGIN
+                        INSERT INTO files_fts (rowid, key, original_name)
+                        VALUES (new.rowid, new.key, new.original_name);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS files_ad AFTER DELETE ON files BEGIN
+                        INSERT INTO files_fts (files_fts, rowid, key, original_name)
+                        VALUES ('delete', old.rowid, old.key, old.original_name);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS files_au AFTER UPDATE OF key, original_name ON files BEGIN
+                        INSERT INTO files_fts (files_fts, rowid, key, original_name)
+                        VALUES ('delete', old.rowid, old.key, old.original_name);
+                        INSERT INTO files_fts (rowid, key, original_name)
+                        VALUES (new.rowid, new.key, new.original_name);
+                    END;
+                """)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 trigram tokenizer unavailable, search will scan: {e}")
+            return False
+
+    def is_built(self, bucket):
+        """Whether the bucket has a reasonably fresh full build"""
+        with self._lock:
+            row = self._conn.execute('SELECT built_at FROM buckets WHERE bucket = ?', (bucket,)).fetchone()
+        return bool(row) and datetime.now(timezone.utc).timestamp() - row[0] < self.rebuild_interval
+
+    def rebuild(self, bucket, objects):
+        """Sync a bucket's rows with an iterable of (key, size, last_modified).
+
+        Metadata recorded earlier for keys that still exist is kept.
+        """
+        self.start_rebuild(bucket)
+        try:
+            self.stage(bucket, objects)
+        except BaseException:
+            self.abort_rebuild(bucket)
+            raise
+        self.finish_rebuild(bucket)
+
+    def start_rebuild(self, bucket):
+        """Begin a rebuild; rows staged from now on are stamped with a new generation"""
+        with self._lock:
+            self._rebuilds[bucket] = (next(self._generations), [])
+
+    def stage(self, bucket, objects):
+        """Upsert one batch of (key, size, last_modified) from the listing"""
+        generation = self._rebuilds[bucket][0]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO files (bucket, key, ext, size, last_modified, generation)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (bucket, key) DO UPDATE SET
+                    size = excluded.size,
+                    last_modified = excluded.last_modified,
+                    generation = excluded.generation
+            """, ((bucket, key, file_extension(key), size, last_modified, generation)
+                  for key, size, last_modified in objects))
+
+    def finish_rebuild(self, bucket):
+        """Drop rows the listing no longer has and replay the writes made since start_rebuild"""
+        with self._lock, self._conn:
+            generation, writes = self._rebuilds.pop(bucket)
+            self._conn.execute('DELETE FROM files WHERE bucket = ? AND generation != ?', (bucket, generation))
+            for write in writes:
+                if write[0] == 'record':
+                    self._record(bucket, *write[1:])
+                else:
+                    self._remove(bucket, write[1])
+            self._conn.execute(
+                'INSERT OR REPLACE INTO buckets VALUES (?, ?)',
+                (bucket, datetime.now(timezone.utc).timestamp())
+            )
+        logger.info(f"Rebuilt search index for {bucket}")
+
+    def abort_rebuild(self, bucket):
+        """Stop a rebuild; rows staged so far stay until the next one"""
+        with self._lock:
+            self._rebuilds.pop(bucket, None)
+
+    def record_object(self, bucket, key, size, last_modified=None, metadata=None):
+        """Add or update one object and, if given, its upload metadata"""
+        metadata = {k.lower(): v for k, v in (metadata or {}).items()}
+        last_modified = last_modified or datetime.now(timezone.utc).isoformat()
+        with self._lock, self._conn:
+            self._record(bucket, key, size, last_modified, metadata)
+            if bucket in self._rebuilds:
+                self._rebuilds[bucket][1].append(('record', key, size, last_modified, metadata))
+
+    def remove_object(self, bucket, key):
+        with self._lock, self._conn:
+            self._remove(bucket, key)
+            if bucket in self._rebuilds:
+                self._rebuilds[bucket][1].append(('remove', key))
+
+    def _record(self, bucket, key, size, last_modified, metadata):
+        self._conn.execute("""
+            INSERT INTO files (bucket, key, ext, size, last_modified, original_name, upload_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (bucket, key) DO UPDATE SET
+                size = excluded.size,
+                last_modified = excluded.last_modified,
+                original_name = COALESCE(excluded.original_name, original_name),
+                upload_date = COALESCE(excluded.upload_date, upload_date)
+        """, (bucket, key, file_extension(key), size, last_modified,
+              metadata.get('originalname'), metadata.get('uploaddate')))
+
+    def _remove(self, bucket, key):
+        self._conn.execute('DELETE FROM files WHERE bucket = ? AND key = ?', (bucket, key))
+
+    def search(self, query=None, buckets=None, prefix=None, ext=None, min_size=None, max_size=None,
+               date_from=None, date_to=None, limit=DEFAULT_LIMIT, offset=0):
+        """Return matching files, most recently modified first"""
+        where = []
+        params = []
+        join = ''
+        if query:
+            if self.fts_enabled and len(query) >= MIN_FTS_QUERY:
+                join = 'JOIN files_fts ON files_fts.rowid = files.rowid'
+                where.append('files_fts MATCH ?')
+                params.append('"' + query.replace('"', '""') + '"')
+            else:
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                where.append("(files.key LIKE ? ESCAPE '\\' OR files.original_name LIKE ? ESCAPE '\\')")
+                params += [f"%{escaped}%"] * 2
+        if buckets:
+            where.append(f"files.bucket IN ({','.join('?' * len(buckets))})")
+            params += list(buckets)
+        if prefix:
+            where.append('files.key >= ? AND files.key < ?')
+            params += [prefix, prefix_upper_bound(prefix)]
+        if ext:
+            exts = [e.lower().lstrip('.') for e in ([ext] if isinstance(ext, str) else ext)]
+            where.append(f"files.ext IN ({','.join('?' * len(exts))})")
+            params += exts
+        if min_size is not None:
+            where.append('files.size >= ?')
+            params.append(min_size)
+        if max_size is not None:
+            where.append('files.size <= ?')
+            params.append(max_size)
+        if date_from:
+            where.append('files.last_modified >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('files.last_modified <= ?')
+            params.append(date_to)
+
+        sql = (
+            'SELECT files.bucket, files.key, files.size, files.last_modified, files.original_name, '
+            f'files.upload_date FROM files {join}'
+        )
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY files.last_modified DESC LIMIT ? OFFSET ?'
+        params += [max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT)), max(0, int(offset or 0))]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                'Bucket': bucket,
+                'Key': key,
+                'Size': size,
+                'LastModified': last_modified,
+                'OriginalName': original_name,
+                'UploadDate': upload_date,
+                'Type': 'object'
+            }
+            for bucket, key, size, last_modified, original_name, upload_date in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
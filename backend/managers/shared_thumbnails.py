@@ -0,0 +1,171 @@
+# File: backend/managers/shared_thumbnails.py
+import json
+import hashlib
+import logging
+import threading
+import time
+from botocore.exceptions import ClientError
+from .memory_cache import TTLCache
+from .preview_encoders import ENCODERS
+
+logger = logging.getLogger(__name__)
+
+# Objects the app keeps in the bucket for itself; listings never show them
+APP_PREFIX = '.zugacloud/'
+SHARED_PREFIX = APP_PREFIX + 'thumbnails/'
+# The full listing is taken rarely; ETags it lacks are looked up one at a time
+INDEX_TTL = 24 * 3600
+MISS_TTL = 300
+CONTENT_TYPES = {'.jpg': 'image/jpeg', '.scrub.jpg': 'image/jpeg'}
+# Shared thumbnails are named by content, so they never change once written
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _bare_etag(etag):
+    return (etag or '').strip('"')
+
+
+class SharedThumbnails:
+    """Thumbnails published to the bucket so each one is rendered once per team.
+
+    Objects are named <SHARED_PREFIX><settings>/<etag><suffix>, where settings
+    is a hash of the render settings. Copies of a video share an ETag and so
+    share thumbnails. One paginated listing of the settings prefix shows which
+    ETags are already there; it is cached and updated with what this install
+    publishes. An ETag the listing lacks is checked with a listing of just
+    that ETag, and a miss is remembered for ttl seconds.
+    """
+
+    def __init__(self, thumbnail_manager, ttl=MISS_TTL, index_ttl=INDEX_TTL):
+        self.thumbnail_manager = thumbnail_manager
+        self.cache = TTLCache(max_entries=64, ttl=index_ttl)
+        self.misses = TTLCache(max_entries=10000, ttl=ttl)
+        # Indexes are shared by every job; entries are frozensets replaced under this lock
+        self._lock = threading.Lock()
+        self._listed_at = {}
+        self.fetched = 0
+        self.published = 0
+
+    @property
+    def aws_integration(self):
+        return self.thumbnail_manager.aws_integration
+
+    @property
+    def client(self):
+        return self.aws_integration.s3_client.client
+
+    def suffixes(self):
+        return {
+            'static': '.jpg',
+            'animated': ENCODERS[self.thumbnail_manager.preview_format].extension,
+            'scrub': '.scrub.jpg'
+        }
+
+    def prefix(self):
+        params = json.dumps(self.thumbnail_manager.render_params(), sort_keys=True)
+        return f"{SHARED_PREFIX}{hashlib.sha256(params.encode('utf-8')).hexdigest()[:16]}/"
+
+    def object_key(self, etag, kind):
+        return f"{self.prefix()}{_bare_etag(etag)}{self.suffixes()[kind]}"
+
+    def available(self, bucket):
+        """Return {etag: frozenset of kinds} published under the current settings"""
+        prefix = self.prefix()
+        index = self.cache.get((bucket, prefix))
+        if index is None:
+            # Every job that starts while the listing runs waits for the same one
+            index = self.aws_integration.flights.do(('shared-thumbnails', bucket, prefix), self._list, bucket, prefix)
+        return index
+
+    def kinds_for(self, bucket, etag):
+        """Return the kinds published for one ETag, checking the bucket if the index lacks it"""
+        prefix = self.prefix()
+        etag = _bare_etag(etag)
+        kinds = self.available(bucket).get(etag)
+        if kinds is None and not self._listed_recently(bucket, prefix) and \
+                self.misses.get((bucket, prefix, etag)) is None:
+            found = self.aws_integration.flights.do(
+                ('shared-thumbnails', bucket, prefix + etag), self._list_objects, bucket, prefix, etag
+            )
+            kinds = found.get(etag)
+            if kinds is None:
+                self.misses.set((bucket, prefix, etag), True)
+            else:
+                self._update(bucket, prefix, etag, kinds)
+        return frozenset(kinds or ())
+
+    def _listed_recently(self, bucket, prefix):
+        # A listing younger than a miss is as good as a lookup
+        return time.monotonic() - self._listed_at.get((bucket, prefix), float('-inf')) < self.misses.ttl
+
+    def _list(self, bucket, prefix):
+        index = self._list_objects(bucket, prefix)
+        self.cache.set((bucket, prefix), index)
+        self._listed_at[(bucket, prefix)] = time.monotonic()
+        return index
+
+    def _list_objects(self, bucket, prefix, etag=''):
+        kinds = {suffix: kind for kind, suffix in self.suffixes().items()}
+        index = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix + etag):
+            for obj in page.get('Contents', []):
+                name, dot, rest = obj['Key'][len(prefix):].partition('.')
+                kind = kinds.get(dot + rest)
+                if name and kind and (not etag or name == etag):
+                    index.setdefault(name, set()).add(kind)
+        return {name: frozenset(kinds) for name, kinds in index.items()}
+
+    def _update(self, bucket, prefix, etag, kinds):
+        with self._lock:
+            index = self.cache.get((bucket, prefix))
+            if index is not None:
+                index[etag] = frozenset(kinds)
+        self.misses.invalidate((bucket, prefix, etag))
+
+    def fetch(self, bucket, etag, thumb_id, animated=False):
+        """Copy published thumbnails into the local store; True if they cover the job"""
+        if not _bare_etag(etag):
+            return False
+        published = self.kinds_for(bucket, etag)
+        if 'static' not in published or animated and 'animated' not in published:
+            return False
+        store = self.thumbnail_manager.store
+        for kind in published if animated else ('static',):
+            if store.contains(thumb_id, kind):
+                continue
+            try:
+                response = self.client.get_object(Bucket=bucket, Key=self.object_key(etag, kind))
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+                    # Removed since the listing; render locally instead
+                    self._update(bucket, self.prefix(), _bare_etag(etag), published - {kind})
+                    return False
+                raise
+            store.put(thumb_id, kind, response['Body'].read())
+        self.fetched += 1
+        return True
+
+    def publish(self, bucket, etag, thumb_id):
+        """Upload the stored thumbnails of a video for other installs"""
+        if not _bare_etag(etag):
+            return
+        store = self.thumbnail_manager.store
+        published = set(self.kinds_for(bucket, etag))
+        # The static thumbnail marks a complete set, so it goes last
+        for kind in ('scrub', 'animated', 'static'):
+            path = store.path(thumb_id, kind)
+            if path is None or kind in published:
+                continue
+            suffix = self.suffixes()[kind]
+            content_type = CONTENT_TYPES.get(suffix) or ENCODERS[self.thumbnail_manager.preview_format].mimetype
+            self.client.upload_file(path, bucket, self.object_key(etag, kind), ExtraArgs={
+                'ContentType': content_type,
+                'CacheControl': CACHE_CONTROL
+            })
+            published.add(kind)
+        self._update(bucket, self.prefix(), _bare_etag(etag), published)
+        self.published += 1
+
+    def stats(self):
+        return {'fetched': self.fetched, 'published': self.published}
@@ -0,0 +1,171 @@
+# File: backend/managers/sprite_sheets.py
+import json
+import hashlib
+import logging
+import cv2
+import numpy as np
+from .disk_cache import DiskLRUCache
+from .thumbnail_render import SCRUB_HEIGHT, SCRUB_WIDTH
+from .thumbnail_service import PRIORITY_VISIBLE
+
+logger = logging.getLogger(__name__)
+
+TILE_WIDTH = 400
+TILE_HEIGHT = 225
+SHEET_COLUMNS = 8
+SHEET_TILES = 64
+SHEET_QUALITY = 80
+DEFAULT_SHEET_BYTES = 256 * 1024 ** 2
+
+
+def _content_name(data):
+    # Sheets are named by their bytes, so a URL never changes meaning and can be cached forever
+    return f"{hashlib.sha1(data).hexdigest()[:16]}.jpg"
+
+
+class SpriteSheets:
+    """Pack thumbnails into JPEG sprite sheets with a JSON index of tile coordinates.
+
+    A page of keys is laid out in order, SHEET_TILES per sheet, with a slot
+    kept for keys whose thumbnail is still rendering. A manifest per page
+    records the thumbnail id in each slot, so a rebuild reuses unchanged
+    sheets. Changed sheets are painted again from the stored thumbnails,
+    never from the previous sheet, so tiles are only ever JPEG-encoded
+    once on top of their thumbnail. Sheets and
+    manifests share one byte-capped DiskLRUCache, so pages nobody opens
+    any more age out.
+    """
+
+    def __init__(self, thumbnail_manager, directory, max_bytes=DEFAULT_SHEET_BYTES):
+        self.thumbnail_manager = thumbnail_manager
+        self.cache = DiskLRUCache(directory, max_bytes)
+
+    @property
+    def aws_integration(self):
+        return self.thumbnail_manager.aws_integration
+
+    def sheet_path(self, name):
+        """File holding a sheet, or None once it has been evicted"""
+        return self.cache.path(name)
+
+    @property
+    def store(self):
+        return self.thumbnail_manager.store
+
+    def build(self, bucket, keys, etags=None):
+        """Return the sprite index for a page of keys, rebuilding changed sheets.
+
+        etags maps keys to ETags already known from a listing; the rest are
+        looked up. Keys without a thumbnail are queued at visible priority and
+        listed as pending; asking again once they render repaints just their
+        sheet. Keys that no longer exist are left blank.
+        """
+        group = hashlib.sha1('\n'.join([bucket, *keys]).encode()).hexdigest()[:16]
+        # Tabs showing the same page share one build
+        return self.aws_integration.flights.do(
+            ('sprites', group), self._build, bucket, list(keys), dict(etags or {}), group
+        )
+
+    def _build(self, bucket, keys, etags, group):
+        manifest_key = f"manifest:{group}"
+        previous = self._load_manifest(manifest_key)
+
+        unknown = [key for key in keys if key not in etags]
+        if unknown:
+            infos = self.aws_integration.get_files_info(bucket, unknown)
+            etags.update((key, info['etag']) for key, info in infos.items() if 'error' not in info)
+        ids = [self.thumbnail_manager.thumbnail_id(bucket, key, etags[key]) if key in etags else None
+               for key in keys]
+        # A slot's signature is the id of the thumbnail painted into it
+        signatures = [thumb_id if thumb_id and self.store.contains(thumb_id, 'static') else None
+                      for thumb_id in ids]
+        pending = [key for key, thumb_id, signature in zip(keys, ids, signatures) if thumb_id and not signature]
+        for key in pending:
+            self.thumbnail_manager.service.submit(bucket, key, PRIORITY_VISIBLE, etag=etags[key])
+
+        sheets = []
+        for number, start in enumerate(range(0, len(keys), SHEET_TILES)):
+            members = keys[start:start + SHEET_TILES]
+            old = previous[number] if number < len(previous) else None
+            sheets.append(self._sheet(members, signatures[start:start + SHEET_TILES], old))
+        self.cache.put(manifest_key, json.dumps({'sheets': sheets}).encode())
+
+        tiles = {}
+        for slot, key in enumerate(keys):
+            if signatures[slot] is not None:
+                number, index = divmod(slot, SHEET_TILES)
+                row, column = divmod(index, SHEET_COLUMNS)
+                tiles[key] = {'sheet': number, 'x': column * TILE_WIDTH, 'y': row * TILE_HEIGHT}
+        return {
+            'tileWidth': TILE_WIDTH,
+            'tileHeight': TILE_HEIGHT,
+            'sheets': [{'name': s['name'], 'width': s['width'], 'height': s['height']} for s in sheets],
+            'tiles': tiles,
+            'pending': pending
+        }
+
+    def _sheet(self, members, signatures, old):
+        """Return the manifest entry of one sheet, painting it only if members changed"""
+        columns = min(SHEET_COLUMNS, len(members))
+        width, height = columns * TILE_WIDTH, -(-len(members) // columns) * TILE_HEIGHT
+        entry = {'members': members, 'signatures': signatures, 'width': width, 'height': height}
+        if old and old['members'] == members and old['signatures'] == signatures and \
+                self.sheet_path(old['name']):
+            return dict(entry, name=old['name'])
+
+        image = np.zeros((height, width, 3), np.uint8)
+        for index in range(len(members)):
+            row, column = divmod(index, SHEET_COLUMNS)
+            data = self.store.get(signatures[index], 'static') if signatures[index] is not None else None
+            tile = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) if data else None
+            if tile is None:
+                tile = np.zeros((TILE_HEIGHT, TILE_WIDTH, 3), np.uint8)
+            elif tile.shape[:2] != (TILE_HEIGHT, TILE_WIDTH):
+                tile = cv2.resize(tile, (TILE_WIDTH, TILE_HEIGHT), interpolation=cv2.INTER_AREA)
+            image[row * TILE_HEIGHT:(row + 1) * TILE_HEIGHT, column * TILE_WIDTH:(column + 1) * TILE_WIDTH] = tile
+
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, SHEET_QUALITY])
+        if not ok:
+            raise RuntimeError("Could not encode sprite sheet")
+        return dict(entry, name=self._publish(encoded.tobytes()))
+
+    def scrub(self, bucket, key):
+        """Return the sprite index of a video's scrub strip.
+
+        A missing strip is queued with the animated preview, which renders it,
+        and the key is listed as pending.
+        """
+        data = self.store.get(self.thumbnail_manager.thumbnail_id(bucket, key), 'scrub')
+        index = {'tileWidth': SCRUB_WIDTH, 'tileHeight': SCRUB_HEIGHT, 'sheets': [], 'frames': [], 'pending': []}
+        if not data:
+            self.thumbnail_manager.service.submit(bucket, key, PRIORITY_VISIBLE, animated=True)
+            index['pending'].append(key)
+            return index
+
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise RuntimeError(f"Unreadable scrub strip for {key}")
+        height, width = image.shape[:2]
+        index['sheets'].append({'name': self._publish(data), 'width': width, 'height': height})
+        index['frames'] = [{'sheet': 0, 'x': x, 'y': 0} for x in range(0, width, SCRUB_WIDTH)]
+        return index
+
+    def _publish(self, data):
+        """Store sheet bytes under their content name, once"""
+        name = _content_name(data)
+        if not self.cache.contains(name):
+            self.cache.put(name, data)
+        return name
+
+    def _load_manifest(self, key):
+        data = self.cache.get(key)
+        if data is None:
+            return []
+        try:
+            return json.loads(data).get('sheets', [])
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable sprite {key}: {e}")
+            return []
+
+    def stats(self):
+        return self.cache.stats()
@@ -1,50 +1,174 @@
 import asyncio
-import aiohttp
-import cv2
 import os
-import tempfile
 import logging
-import sys
-from concurrent.futures import ThreadPoolExecutor
-import requests
+import uuid
+from .shared_thumbnails import SharedThumbnails
+from .preview_encoders import (
+    DEFAULT_PREVIEW_DURATION, DEFAULT_PREVIEW_FORMAT, DEFAULT_PREVIEW_FPS, ENCODERS, resolve_format
+)
+from .sprite_sheets import DEFAULT_SHEET_BYTES, SpriteSheets
+from .thumbnail_render import SCRUB_FRAMES, THUMBNAIL_WIDTH, render_thumbnails
+from .thumbnail_service import ThumbnailService
+from .thumbnail_store import DEFAULT_MAX_BYTES, DEFAULT_MEMORY_BYTES, THUMBNAIL_KINDS, ThumbnailStore, thumbnail_id
 
 logger = logging.getLogger(__name__)
 
 class ThumbnailManager:
     def __init__(self, aws_integration):
         self.aws_integration = aws_integration
-        self.thumbnail_cache = {}
-        self.preview_cache = {}
-        
-        # Define base directory
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        # Define separate directories for static and animated thumbnails
-        self.thumbnails_base = os.path.join(base_path, 'frontend', 'assets', 'thumbnails')
-        self.static_dir = os.path.join(self.thumbnails_base, 'static')
-        self.animated_dir = os.path.join(self.thumbnails_base, 'animated')
+        config = aws_integration.config
+
+        # Thumbnails are content-addressed by (bucket, key, ETag, render settings)
+        # in a byte-capped store; workers render into the staging directory first
+        data_dir = aws_integration.data_dir
+        self.store = ThumbnailStore(
+            os.path.join(data_dir, 'thumbnails'),
+            max_bytes=config.get('thumbnail_cache_max_bytes', DEFAULT_MAX_BYTES),
+            memory_bytes=config.get('thumbnail_memory_max_bytes', DEFAULT_MEMORY_BYTES)
+        )
+        self.staging_dir = os.path.join(data_dir, 'thumbnail_staging')
         
         self.ensure_thumbnail_directories()
+
+        # Animated previews use the configured encoder, or one this install supports
+        self.preview_format = resolve_format(config.get('preview_format', DEFAULT_PREVIEW_FORMAT))
+
+        # Decoding is CPU-bound, so rendering runs in worker processes
+        self.service = ThumbnailService(
+            self,
+            render_thumbnails,
+            workers=config.get('thumbnail_workers'),
+            max_queue=config.get('thumbnail_queue_size', 10000)
+        )
+
+        # Thumbnails rendered by any install are published to the bucket for the rest
+        self.shared = SharedThumbnails(self, ttl=config.get('shared_thumbnails_ttl', 300))
+
+        # Grid pages and scrub strips are served as packed sprite sheets
+        self.sprites = SpriteSheets(
+            self,
+            os.path.join(data_dir, 'sprites'),
+            max_bytes=config.get('sprite_cache_max_bytes', DEFAULT_SHEET_BYTES)
+        )
         
     def ensure_thumbnail_directories(self):
-        """Create thumbnail directories if they don't exist"""
+        """Create the staging directory, clearing renders a previous run left behind"""
         try:
-            os.makedirs(self.static_dir, exist_ok=True)
-            os.makedirs(self.animated_dir, exist_ok=True)
-            logger.info(f"Thumbnail directories ensured at: {self.thumbnails_base}")
+            os.makedirs(self.staging_dir, exist_ok=True)
+            # Left over from renders interrupted by a restart
+            for name in os.listdir(self.staging_dir):
+                os.remove(os.path.join(self.staging_dir, name))
+            logger.info(f"Thumbnail staging directory ensured at: {self.staging_dir}")
         except Exception as e:
             logger.error(f"Error creating thumbnail directories: {e}")
+
+    def thumbnail_id(self, bucket, video_key, etag=None):
+        """Content address of a video's thumbnails; looks the ETag up when not given"""
+        if etag is None:
+            etag = self.aws_integration.get_file_info(bucket, video_key).get('etag')
+        thumb_id = thumbnail_id(bucket, video_key, etag, self.render_params())
+        self.store.track(bucket, video_key, thumb_id)
+        return thumb_id
             
-    def get_thumbnail_paths(self, video_key):
-        """Get paths for both static and animated thumbnails"""
-        # Create a safe filename from the video key
-        safe_name = video_key.replace('/', '_').replace('\\', '_')
+    def get_thumbnail_paths(self, thumb_id):
+        """Staging paths a worker renders the static, animated and scrub-strip thumbnails to"""
+        return {
+            'static': os.path.join(self.staging_dir, f"{thumb_id}.jpg"),
+            'animated': os.path.join(self.staging_dir, f"{thumb_id}{ENCODERS[self.preview_format].extension}"),
+            'scrub': os.path.join(self.staging_dir, f"{thumb_id}.scrub.jpg")
+        }
+
+    def stored_thumbnails(self, thumb_id, animated=False):
+        """(static_path, animated_path) from the store, or None if a render is needed"""
+        static_path = self.store.path(thumb_id, 'static')
+        animated_path = self.store.path(thumb_id, 'animated') if animated else None
+        if static_path is None or animated and animated_path is None:
+            return None
+        return static_path, animated_path
+
+    def store_rendered(self, thumb_id, result, staging_id=None):
+        """Move a worker's rendered files into the store; returns the stored paths"""
+        paths = self.get_thumbnail_paths(staging_id or thumb_id)
+        for kind in THUMBNAIL_KINDS:
+            if os.path.exists(paths[kind]):
+                self.store.put_file(thumb_id, kind, paths[kind])
+        static_path, animated_path = result
+        return (
+            self.store.path(thumb_id, 'static') if static_path else None,
+            self.store.path(thumb_id, 'animated') if animated_path else None
+        )
+
+    def render_local(self, local_path):
+        """Start rendering thumbnails from a local copy before its ETag is known.
+
+        Returns a handle for adopt_local once the upload finishes, or for
+        discard_local if it fails.
+        """
+        staging_id = f"local-{uuid.uuid4().hex}"
+        return staging_id, self.service.render_file(local_path, self.get_thumbnail_paths(staging_id))
+
+    def adopt_local(self, render, bucket, video_key, etag):
+        """Store a local render under the uploaded object and publish it, once it finishes"""
+        staging_id, future = render
+
+        def adopt(f):
+            try:
+                thumb_id = self.thumbnail_id(bucket, video_key, etag)
+                if self.store_rendered(thumb_id, f.result(), staging_id)[0]:
+                    self.service.publish(bucket, video_key, thumb_id, etag)
+            except Exception as e:
+                logger.error(f"Error storing thumbnails rendered from the local copy of {video_key}: {e}")
+            finally:
+                self._discard_staging(staging_id)
+
+        future.add_done_callback(adopt)
+
+    def discard_local(self, render):
+        staging_id, future = render
+        future.add_done_callback(lambda f: self._discard_staging(staging_id))
+
+    def _discard_staging(self, staging_id):
+        for path in self.get_thumbnail_paths(staging_id).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _shared_enabled(self):
+        return self.aws_integration.config.get('shared_thumbnails', True)
+
+    def fetch_shared(self, bucket, video_key, thumb_id, animated=False, etag=None):
+        """Copy thumbnails another install published into the store; True if found"""
+        if not self._shared_enabled():
+            return False
+        try:
+            if etag is None:
+                etag = self.aws_integration.get_file_info(bucket, video_key).get('etag')
+            return self.shared.fetch(bucket, etag, thumb_id, animated)
+        except Exception as e:
+            logger.warning(f"Could not read shared thumbnails for {video_key}: {e}")
+            return False
+
+    def publish_shared(self, bucket, video_key, thumb_id, etag=None):
+        """Upload a video's rendered thumbnails to the bucket's shared tier"""
+        if not self._shared_enabled():
+            return
+        try:
+            if etag is None:
+                etag = self.aws_integration.get_file_info(bucket, video_key).get('etag')
+            self.shared.publish(bucket, etag, thumb_id)
+        except Exception as e:
+            logger.warning(f"Could not publish thumbnails for {video_key}: {e}")
+
+    def render_params(self):
+        """Everything that changes the rendered output, as part of the content address"""
+        return dict(self.render_options(), width=THUMBNAIL_WIDTH, scrub_frames=SCRUB_FRAMES)
+
+    def render_options(self):
+        """Preview settings passed to render_thumbnails in the worker processes"""
+        config = self.aws_integration.config
         return {
-            'static': os.path.join(self.static_dir, f"{safe_name}.jpg"),
-            'animated': os.path.join(self.animated_dir, f"{safe_name}.gif")
+            'preview_format': self.preview_format,
+            'preview_duration': config.get('preview_duration', DEFAULT_PREVIEW_DURATION),
+            'preview_fps': config.get('preview_fps', DEFAULT_PREVIEW_FPS)
         }
             
     async def generate_thumbnails(self, video_key):
@@ -53,65 +177,10 @@ class ThumbnailManager:
             logger.error("No bucket name configured")
             return None, None
 
-        paths = self.get_thumbnail_paths(video_key)
-        
-        # Check if thumbnails already exist
-        if os.path.exists(paths['static']) and os.path.exists(paths['animated']):
-            logger.info(f"Thumbnails already exist for {video_key}")
-            return paths['static'], paths['animated']
-        
         try:
-            url = self.aws_integration.generate_presigned_url(
-                self.aws_integration.bucket_name,
-                video_key
+            return await asyncio.wrap_future(
+                self.service.submit(self.aws_integration.bucket_name, video_key, animated=True)
             )
-            if not url:
-                logger.error(f"Failed to generate URL for {video_key}")
-                return None, None
-
-            # Create a temporary directory that will be automatically cleaned up
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_video_path = os.path.join(temp_dir, f"temp_video{os.path.splitext(video_key)[1]}")
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        # Download first few seconds for animated preview
-                        chunk = await response.content.read(1024*1024*5)  # Read 5MB
-                        
-                        # Write to temp file
-                        with open(temp_video_path, 'wb') as f:
-                            f.write(chunk)
-                        
-                        # Generate static thumbnail
-                        cap = cv2.VideoCapture(temp_video_path)
-                        ret, frame = cap.read()
-                        if ret:
-                            # Resize frame maintaining aspect ratio
-                            height = int(400 * 9/16)
-                            frame = cv2.resize(frame, (400, height), interpolation=cv2.INTER_AREA)
-                            cv2.imwrite(paths['static'], frame)
-                            logger.info(f"Generated static thumbnail for {video_key}")
-                            
-                            # Generate animated preview (GIF)
-                            frames = []
-                            for _ in range(30):  # Capture 30 frames
-                                ret, frame = cap.read()
-                                if not ret:
-                                    break
-                                frame = cv2.resize(frame, (400, height))
-                                frames.append(frame)
-                            
-                            if frames:
-                                # Convert frames to GIF
-                                import imageio
-                                imageio.mimsave(paths['animated'], frames, fps=10)
-                                logger.info(f"Generated animated thumbnail for {video_key}")
-                            
-                            cap.release()
-                            return paths['static'], paths['animated']
-                        
-            return None, None
-                    
         except Exception as e:
             logger.error(f"Error generating thumbnails for {video_key}: {e}")
             return None, None
@@ -122,43 +191,16 @@ class ThumbnailManager:
             logger.error("No bucket name configured")
             return None
 
-        thumbnail_path = self.get_thumbnail_paths(video_key)['static']
-        
-        if os.path.exists(thumbnail_path):
-            return thumbnail_path
-
         try:
-            url = self.aws_integration.generate_presigned_url(
-                self.aws_integration.bucket_name,
-                video_key
-            )
-            if not url:
-                return None
-
-            # Create a temporary directory that will be automatically cleaned up
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_video_path = os.path.join(temp_dir, f"temp_video{os.path.splitext(video_key)[1]}")
-                
-                # Download video chunk
-                response = requests.get(url, stream=True)
-                chunk = next(response.iter_content(chunk_size=1024*1024))
-                
-                # Write to temp file
-                with open(temp_video_path, 'wb') as f:
-                    f.write(chunk)
-                
-                # Extract first frame
-                cap = cv2.VideoCapture(temp_video_path)
-                ret, frame = cap.read()
-                if ret:
-                    height = int(400 * 9/16)
-                    frame = cv2.resize(frame, (400, height))
-                    cv2.imwrite(thumbnail_path, frame)
-                    cap.release()
-                    return thumbnail_path
-                
-            return None
-                    
+            return self.service.submit(self.aws_integration.bucket_name, video_key).result()[0]
         except Exception as e:
             logger.error(f"Error generating thumbnail for {video_key}: {e}")
             return None
+
+    def build_sprite_index(self, video_keys, etags=None):
+        """Pack the static thumbnails of a page of keys into sprite sheets"""
+        return self.sprites.build(self.aws_integration.bucket_name, video_keys, etags)
+
+    def scrub_index(self, video_key):
+        """Sprite index of a video's hover-scrub strip"""
+        return self.sprites.scrub(self.aws_integration.bucket_name, video_key)
@@ -0,0 +1,161 @@
+# File: backend/managers/thumbnail_render.py
+"""Worker side of thumbnail rendering.
+
+ThumbnailService workers are spawned processes that import this module to
+unpickle render_thumbnails, so it must stay importable without building the
+app: it imports only decoding and encoding helpers, never the API or storage
+integration.
+"""
+import cv2
+import os
+import tempfile
+import logging
+import numpy as np
+import requests
+from .keyframe_extractor import DEFAULT_POSITION, KeyframeError, extract_keyframes, iter_frames, sample_frames
+from .preview_encoders import DEFAULT_PREVIEW_DURATION, DEFAULT_PREVIEW_FORMAT, DEFAULT_PREVIEW_FPS, get_encoder
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 400
+STATIC_HEAD_BYTES = 1024 * 1024
+ANIMATED_HEAD_BYTES = 5 * 1024 * 1024
+SCRUB_FRAMES = 10
+SCRUB_WIDTH = 160
+SCRUB_HEIGHT = 90
+
+
+def _write_atomic(path, writer):
+    """Call writer(temp_path) and move the result into place.
+
+    The service runs one job per video, so no lock is needed across worker
+    processes; the temp file keeps the extension for the encoder.
+    """
+    base, ext = os.path.splitext(path)
+    temp_path = f"{base}.{os.getpid()}.partial{ext}"
+    try:
+        if writer(temp_path) is False:
+            return False
+        os.replace(temp_path, path)
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _frames_from_head(url, suffix, count, sample_fps=None):
+    """Decode the first frames from a plain download of the start of the video"""
+    head_bytes = ANIMATED_HEAD_BYTES if count > 1 else STATIC_HEAD_BYTES
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_video_path = os.path.join(temp_dir, f"temp_video{suffix}")
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(temp_video_path, 'wb') as f:
+                received = 0
+                for chunk in response.iter_content(chunk_size=256 * 1024):
+                    f.write(chunk)
+                    received += len(chunk)
+                    if received >= head_bytes:
+                        break
+
+        cap = cv2.VideoCapture(temp_video_path)
+        try:
+            source_fps = cap.get(cv2.CAP_PROP_FPS)
+            step = max(1, round(source_fps / sample_fps)) if sample_fps and source_fps > 0 else 1
+            yield from sample_frames(cap, count, step)
+        finally:
+            cap.release()
+
+
+def _frames_from_file(path, count, position=DEFAULT_POSITION, sample_fps=None):
+    """Decode frames of a local copy, seeking to a fraction of its length"""
+    cap = cv2.VideoCapture(path)
+    try:
+        total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if total > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(total * position))
+        source_fps = cap.get(cv2.CAP_PROP_FPS)
+        step = max(1, round(source_fps / sample_fps)) if sample_fps and source_fps > 0 else 1
+        yield from sample_frames(cap, count, step)
+    finally:
+        cap.release()
+
+
+def _write_scrub_strip(url, suffix, scrub_path, frames=SCRUB_FRAMES):
+    """Write one row of small frames spread over the whole video, for hover scrubbing"""
+    positions = [(i + 0.5) / frames for i in range(frames)]
+    if os.path.isfile(url):
+        images = [image for image in (next(_frames_from_file(url, 1, p), None) for p in positions)
+                  if image is not None]
+    else:
+        try:
+            images = extract_keyframes(url, suffix, positions)
+        except KeyframeError as e:
+            # Without an index there is nothing to seek with; the head alone makes no scrub strip
+            logger.info(f"No scrub strip for {suffix} video: {e}")
+            return None
+    if not images:
+        return None
+    strip = np.hstack([
+        cv2.resize(image, (SCRUB_WIDTH, SCRUB_HEIGHT), interpolation=cv2.INTER_AREA) for image in images
+    ])
+    if not _write_atomic(scrub_path, lambda path: cv2.imwrite(path, strip)):
+        return None
+    return scrub_path
+
+
+def render_thumbnails(url, suffix, static_path, animated_path=None, preview_format=DEFAULT_PREVIEW_FORMAT,
+                      preview_duration=DEFAULT_PREVIEW_DURATION, preview_fps=DEFAULT_PREVIEW_FPS,
+                      scrub_path=None):
+    """Decode frames of a video and write its thumbnails.
+
+    Runs in a ThumbnailService worker process. url may be the path of a
+    local copy, which is read directly. Otherwise frames come from a keyframe
+    located through the container index with Range reads; containers the
+    extractor cannot handle fall back to downloading the start of the file.
+    The preview covers preview_duration seconds sampled at preview_fps, and
+    each frame is scaled and handed to the encoder as soon as it decodes.
+    With scrub_path, a strip of keyframes across the video is written too.
+    Returns (static_path, animated_path), with None for anything that could
+    not be produced.
+    """
+    count = max(1, int(preview_duration * preview_fps)) if animated_path else 1
+    frames = None
+    if os.path.isfile(url):
+        frames = _frames_from_file(url, count, sample_fps=preview_fps)
+        first = next(frames, None)
+        if first is None:
+            return None, None
+    else:
+        try:
+            frames = iter_frames(url, suffix, count, sample_fps=preview_fps)
+            first = next(frames, None)
+        except KeyframeError as e:
+            logger.info(f"Keyframe extraction unavailable ({e}); downloading the start of the video")
+            first = None
+    if first is None:
+        frames = _frames_from_head(url, suffix, count, preview_fps)
+        first = next(frames, None)
+    if first is None:
+        return None, None
+
+    # Resize frames to a 16:9 tile
+    size = (THUMBNAIL_WIDTH, int(THUMBNAIL_WIDTH * 9 / 16))
+    first = cv2.resize(first, size, interpolation=cv2.INTER_AREA)
+    _write_atomic(static_path, lambda path: cv2.imwrite(path, first))
+    if scrub_path:
+        _write_scrub_strip(url, suffix, scrub_path)
+    if not animated_path:
+        return static_path, None
+
+    def write_preview(path):
+        encoder = get_encoder(preview_format)(path, preview_fps, size)
+        encoder.add(first)
+        for frame in frames:
+            encoder.add(cv2.resize(frame, size, interpolation=cv2.INTER_AREA))
+        # A single frame is no animation; the static thumbnail already covers it
+        return encoder.close() and encoder.frames > 1
+
+    if not _write_atomic(animated_path, write_preview):
+        return static_path, None
+    return static_path, animated_path
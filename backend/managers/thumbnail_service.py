@@ -0,0 +1,342 @@
+# File: backend/managers/thumbnail_service.py
+import os
+import heapq
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from ..aws.listing_handler import is_hidden_key
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_VISIBLE = 0
+PRIORITY_UPLOAD = 5
+PRIORITY_BACKFILL = 10
+DEFAULT_MAX_QUEUE = 10000
+# Queue slots a backfill leaves free so visible tiles never have to wait behind it
+VISIBLE_RESERVE = 1000
+
+
+class QueueFull(Exception):
+    """The thumbnail queue had no room for a job"""
+
+
+class _Job:
+    __slots__ = ('bucket', 'key', 'etag', 'priority', 'animated', 'future', 'entry', 'paths', 'followup')
+
+    def __init__(self, bucket, key, etag, priority, animated, paths=None):
+        self.bucket = bucket
+        self.key = key
+        self.etag = etag
+        self.priority = priority
+        self.animated = animated
+        self.future = Future()
+        self.entry = None
+        # Staging paths of a local file render; bucket is None for those
+        self.paths = paths
+        # (future, priority) of an animated request that arrived while this static-only job rendered
+        self.followup = None
+
+
+class ThumbnailService:
+    """Render thumbnails in a process pool fed from a bounded priority queue.
+
+    Jobs are keyed by (bucket, key): asking for a key that is already queued or
+    rendering returns the same future, raising its priority if needed. Visible
+    tiles go ahead of backfills, and a backfill blocks once the queue is nearly
+    full instead of growing it. When the queue is full a new job displaces the
+    lowest-priority one, which fails with ``QueueFull`` for its waiters. Renders
+    of local files during uploads queue between the two.
+    """
+
+    def __init__(self, thumbnail_manager, render, workers=None, max_queue=DEFAULT_MAX_QUEUE, executor=None):
+        self.thumbnail_manager = thumbnail_manager
+        # render(url, suffix, static_path, animated_path, **options) must be picklable (module level)
+        self.render = render
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor = executor
+        self._io = None
+        self._heap = []
+        self._jobs = {}  # (bucket, key) -> _Job, queued or rendering
+        self._queued = 0
+        self._running = 0
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._dispatcher = None
+        self._backfills = {}
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def aws_integration(self):
+        return self.thumbnail_manager.aws_integration
+
+    def submit(self, bucket, key, priority=PRIORITY_VISIBLE, animated=False, block=False, etag=None):
+        """Queue a key and return a future of its stored (static_path, animated_path).
+
+        Passing the ETag from a listing saves a HEAD when the job starts.
+        """
+        displaced = None
+        with self._changed:
+            job = self._jobs.get((bucket, key))
+            if job is not None:
+                if job.entry is not None and (priority < job.priority or animated and not job.animated):
+                    # Re-queue at the better priority; the old heap entry is skipped when popped
+                    job.entry[-1] = None
+                    job.priority = min(priority, job.priority)
+                    job.animated = job.animated or animated
+                    self._push(job)
+                elif job.entry is None and animated and not job.animated:
+                    # Already rendering without the preview; queue it once this render ends
+                    waiter, best = job.followup or (Future(), priority)
+                    job.followup = (waiter, min(best, priority))
+                    return waiter
+                return job.future
+
+            limit = self.max_queue - VISIBLE_RESERVE if priority >= PRIORITY_BACKFILL else self.max_queue
+            while block and self._queued >= max(limit, 1):
+                self._changed.wait()
+            if self._queued >= self.max_queue:
+                displaced = self._displace(priority)
+                if displaced is None:
+                    future = Future()
+                    future.set_exception(QueueFull(key))
+                    return future
+
+            job = _Job(bucket, key, etag, priority, animated)
+            self._jobs[(bucket, key)] = job
+            self._queued += 1
+            self._push(job)
+            self._ensure_dispatcher()
+            self._changed.notify_all()
+        # Outside the lock: future callbacks may submit again
+        if displaced is not None:
+            displaced.future.set_exception(QueueFull(displaced.key))
+        return job.future
+
+    def _push(self, job):
+        job.entry = [job.priority, next(self._counter), job]
+        heapq.heappush(self._heap, job.entry)
+
+    def _displace(self, priority):
+        """Remove and return the newest lowest-priority queued job if it ranks below priority"""
+        live = [entry for entry in self._heap if entry[-1] is not None]
+        worst = max(live, key=lambda e: (e[0], e[1]), default=None)
+        if worst is None or worst[0] <= priority:
+            return None
+        job = worst[-1]
+        worst[-1] = None
+        job.entry = None
+        self._forget(job)
+        self._queued -= 1
+        return job
+
+    def _forget(self, job):
+        if self._jobs.get((job.bucket, job.key)) is job:
+            del self._jobs[(job.bucket, job.key)]
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, name='thumbnail-dispatch', daemon=True)
+            self._dispatcher.start()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs Flask, boto3 and watchdog threads is unsafe.
+                # Workers import only thumbnail_render, never the app
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _submit_render(self, *args, **kwargs):
+        """Hand a render to the worker pool, replacing the pool if a dead worker broke it"""
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(self.render, *args, **kwargs)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(self.render, *args, **kwargs)
+
+    def _discard_executor(self, executor):
+        with self._lock:
+            if self._executor is not executor:
+                return  # Already replaced
+            self._executor = None
+        logger.warning("A thumbnail worker died; starting a new pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_io(self):
+        if self._io is None:
+            # HEADs, shared-tier downloads and uploads block, so they run off the dispatcher
+            self._io = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='thumbnail-io')
+        return self._io
+
+    def _dispatch(self):
+        while True:
+            with self._changed:
+                # Keep every worker busy with one job in hand, and no more
+                while not self._heap or self._running >= self.workers:
+                    self._changed.wait()
+                job = heapq.heappop(self._heap)[-1]
+                if job is None:
+                    continue
+                job.entry = None
+                self._queued -= 1
+                self._running += 1
+                self._changed.notify_all()
+            self._get_io().submit(self._start, job)
+
+    def _start(self, job):
+        if job.paths is not None:
+            self._start_file(job)
+            return
+        try:
+            thumb_id = self.thumbnail_manager.thumbnail_id(job.bucket, job.key, job.etag)
+            stored = self.thumbnail_manager.stored_thumbnails(thumb_id, job.animated)
+            if stored is None and self.thumbnail_manager.fetch_shared(
+                    job.bucket, job.key, thumb_id, job.animated, job.etag):
+                # Another install already rendered it
+                stored = self.thumbnail_manager.stored_thumbnails(thumb_id, job.animated)
+            if stored is not None:
+                self._finish(job, result=stored)
+                return
+            paths = self.thumbnail_manager.get_thumbnail_paths(thumb_id)
+            url = self.aws_integration.video.presign(job.bucket, job.key)
+            options = dict(self.thumbnail_manager.render_options())
+            if job.animated and 'scrub' in paths:
+                # Hovered tiles get their scrub strip along with the preview
+                options['scrub_path'] = paths['scrub']
+            executor, future = self._submit_render(
+                url,
+                os.path.splitext(job.key)[1],
+                paths['static'],
+                paths['animated'] if job.animated else None,
+                **options
+            )
+            future.add_done_callback(lambda f: self._finish(job, future=f, thumb_id=thumb_id, executor=executor))
+        except Exception as e:
+            self._finish(job, error=e)
+
+    def _start_file(self, job):
+        try:
+            options = dict(self.thumbnail_manager.render_options(), scrub_path=job.paths['scrub'])
+            executor, future = self._submit_render(
+                job.key, os.path.splitext(job.key)[1], job.paths['static'], job.paths['animated'], **options
+            )
+            future.add_done_callback(lambda f: self._finish(job, future=f, executor=executor))
+        except Exception as e:
+            self._finish(job, error=e)
+
+    def _finish(self, job, result=None, future=None, error=None, thumb_id=None, executor=None):
+        if future is not None:
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._discard_executor(executor)
+            elif error is None and job.paths is not None:
+                # Local renders stay in staging until the caller adopts them
+                result = future.result()
+            elif error is None:
+                try:
+                    result = self.thumbnail_manager.store_rendered(thumb_id, future.result())
+                    if result[0]:
+                        self.publish(job.bucket, job.key, thumb_id, job.etag)
+                except Exception as e:
+                    error = e
+        with self._changed:
+            self._forget(job)
+            self._running -= 1
+            if error is not None or not result or not result[0]:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._changed.notify_all()
+        if error is not None:
+            logger.error(f"Error generating thumbnails for {job.key}: {error}")
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result or (None, None))
+        if job.followup is not None:
+            waiter, priority = job.followup
+            self._chain(self.submit(job.bucket, job.key, priority, animated=True, etag=job.etag), waiter)
+
+    @staticmethod
+    def _chain(source, target):
+        def copy(f):
+            if f.exception() is not None:
+                target.set_exception(f.exception())
+            else:
+                target.set_result(f.result())
+        source.add_done_callback(copy)
+
+    def publish(self, bucket, key, thumb_id, etag=None):
+        """Upload stored thumbnails to the shared tier in the background"""
+        return self._get_io().submit(self.thumbnail_manager.publish_shared, bucket, key, thumb_id, etag)
+
+    def render_file(self, local_path, paths):
+        """Queue a render of a local file's thumbnails, preview and scrub strip to paths.
+
+        The job takes a worker slot like any other, after visible tiles and
+        before backfills. It is never deduplicated, and it fails with
+        ``QueueFull`` rather than wait once the backfill share of the queue
+        is used up, so a sync never stalls on thumbnails.
+        """
+        with self._changed:
+            if self._queued >= max(self.max_queue - VISIBLE_RESERVE, 1):
+                future = Future()
+                future.set_exception(QueueFull(local_path))
+                return future
+            job = _Job(None, local_path, None, PRIORITY_UPLOAD, True, paths=paths)
+            self._queued += 1
+            self._push(job)
+            self._ensure_dispatcher()
+            self._changed.notify_all()
+        return job.future
+
+    def backfill(self, bucket, prefix=''):
+        """Queue every video under prefix at backfill priority, in a background thread"""
+        with self._lock:
+            running = self._backfills.get((bucket, prefix))
+            if running and running['running']:
+                return running
+            progress = {'bucket': bucket, 'prefix': prefix, 'running': True, 'listed': 0, 'queued': 0}
+            self._backfills[(bucket, prefix)] = progress
+        threading.Thread(target=self._backfill, args=(progress,), name='thumbnail-backfill', daemon=True).start()
+        return progress
+
+    def _backfill(self, progress):
+        try:
+            paginator = self.aws_integration.s3_client.client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=progress['bucket'], Prefix=progress['prefix']):
+                for obj in page.get('Contents', []):
+                    progress['listed'] += 1
+                    key = obj['Key']
+                    if is_hidden_key(key) or not self.aws_integration.is_video_file(key):
+                        continue
+                    thumb_id = self.thumbnail_manager.thumbnail_id(progress['bucket'], key, obj.get('ETag'))
+                    if self.thumbnail_manager.stored_thumbnails(thumb_id) is not None:
+                        continue
+                    self.submit(progress['bucket'], key, PRIORITY_BACKFILL, block=True, etag=obj.get('ETag'))
+                    progress['queued'] += 1
+        except Exception as e:
+            logger.error(f"Error backfilling thumbnails under {progress['prefix']}: {e}")
+            progress['error'] = str(e)
+        finally:
+            progress['running'] = False
+
+    def status(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': self._queued,
+                'running': self._running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'backfills': [dict(p) for p in self._backfills.values()]
+            }
@@ -0,0 +1,113 @@
+# File: backend/managers/thumbnail_store.py
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from .disk_cache import DiskLRUCache
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_KINDS = ('static', 'animated', 'scrub')
+DEFAULT_MAX_BYTES = 1024 ** 3
+DEFAULT_MEMORY_BYTES = 32 * 1024 ** 2
+
+
+def thumbnail_id(bucket, key, etag, params):
+    """Content address of a video's thumbnails; changes with the object or the render settings"""
+    data = json.dumps([bucket, key, etag, params], sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class ThumbnailStore:
+    """Rendered thumbnails keyed by content address.
+
+    Blobs live in a byte-capped DiskLRUCache, with the hottest ones also held
+    in a small in-memory LRU. The id last seen for each (bucket, key) is
+    remembered, so a new ETag or an object write drops the old blobs at once
+    rather than leaving them to age out.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.disk = DiskLRUCache(directory, max_bytes)
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # (id, kind) -> bytes, least recently used first
+        self._memory_total = 0
+        self._current = {}  # (bucket, key) -> id
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _blob(thumb_id, kind):
+        return f"{thumb_id}:{kind}"
+
+    def contains(self, thumb_id, kind):
+        return self.disk.contains(self._blob(thumb_id, kind))
+
+    def path(self, thumb_id, kind):
+        """File holding a thumbnail, or None; it may be evicted once returned"""
+        return self.disk.path(self._blob(thumb_id, kind))
+
+    def get(self, thumb_id, kind):
+        """Return a thumbnail's bytes, or None"""
+        with self._lock:
+            data = self._memory.get((thumb_id, kind))
+            if data is not None:
+                self._memory.move_to_end((thumb_id, kind))
+                return data
+        data = self.disk.get(self._blob(thumb_id, kind))
+        if data is not None:
+            self._remember_bytes(thumb_id, kind, data)
+        return data
+
+    def put(self, thumb_id, kind, data):
+        if self.disk.put(self._blob(thumb_id, kind), data):
+            self._remember_bytes(thumb_id, kind, data)
+
+    def put_file(self, thumb_id, kind, source_path):
+        """Move a rendered file into the store"""
+        self._forget_bytes(thumb_id, kind)
+        return self.disk.put_file(self._blob(thumb_id, kind), source_path)
+
+    def _remember_bytes(self, thumb_id, kind, data):
+        if len(data) > self.memory_bytes // 16:
+            return  # Large previews would push out many tiles
+        with self._lock:
+            old = self._memory.pop((thumb_id, kind), None)
+            if old is not None:
+                self._memory_total -= len(old)
+            self._memory[(thumb_id, kind)] = data
+            self._memory_total += len(data)
+            while self._memory_total > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_total -= len(evicted)
+
+    def _forget_bytes(self, thumb_id, kind):
+        with self._lock:
+            old = self._memory.pop((thumb_id, kind), None)
+            if old is not None:
+                self._memory_total -= len(old)
+
+    def track(self, bucket, key, thumb_id):
+        """Record the current id of an object, dropping the thumbnails of its previous version"""
+        with self._lock:
+            previous = self._current.get((bucket, key))
+            self._current[(bucket, key)] = thumb_id
+        if previous is not None and previous != thumb_id:
+            self.delete(previous)
+
+    def invalidate(self, bucket, key):
+        """Drop the thumbnails of an object that was rewritten or deleted"""
+        with self._lock:
+            previous = self._current.pop((bucket, key), None)
+        if previous is not None:
+            self.delete(previous)
+
+    def delete(self, thumb_id):
+        for kind in THUMBNAIL_KINDS:
+            self._forget_bytes(thumb_id, kind)
+            self.disk.delete(self._blob(thumb_id, kind))
+
+    def stats(self):
+        with self._lock:
+            memory = {'entries': len(self._memory), 'bytes': self._memory_total, 'maxBytes': self.memory_bytes}
+        return dict(self.disk.stats(), memory=memory)
@@ -0,0 +1,50 @@
+# File: backend/sync/checksums.py
+import base64
+import hashlib
+import logging
+import zlib
+
+try:
+    import crc32c as _crc32c  # Optional: hardware-accelerated CRC32C
+except ImportError:
+    _crc32c = None
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ALGORITHMS = ('SHA256', 'CRC32C', 'CRC32')
+
+
+def resolve_algorithm(requested):
+    """Return the checksum algorithm to send with parts, or None when disabled"""
+    if not requested:
+        return None
+    algorithm = str(requested).upper()
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise ValueError(f"Unsupported checksum algorithm: {requested}")
+    if algorithm == 'CRC32C' and _crc32c is None:
+        logger.warning("crc32c package not installed, using SHA256 upload checksums")
+        return 'SHA256'
+    return algorithm
+
+
+def part_checksum(algorithm, data):
+    """Compute the base64 checksum S3 expects for one part"""
+    if algorithm == 'SHA256':
+        raw = hashlib.sha256(data).digest()
+    elif algorithm == 'CRC32C':
+        raw = _crc32c.crc32c(data).to_bytes(4, 'big')
+    elif algorithm == 'CRC32':
+        raw = (zlib.crc32(data) & 0xffffffff).to_bytes(4, 'big')
+    else:
+        raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+    return base64.b64encode(raw).decode('ascii')
+
+
+def checksum_field(algorithm):
+    """Name of the request/response field carrying a checksum, e.g. ChecksumSHA256"""
+    return f"Checksum{algorithm}"
+
+
+def new_file_digest():
+    """Digest used for the whole-file VideoHash metadata"""
+    return hashlib.sha256()
@@ -0,0 +1,190 @@
+# File: backend/sync/faststart.py
+import os
+import struct
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+FASTSTART_EXTENSIONS = {'.mp4', '.mov', '.m4v'}
+# Boxes on the path from moov to the chunk offset tables
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+MAX_MOOV_SIZE = 256 * 1024 * 1024
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class Box:
+    """An ISO-BMFF box; containers hold children, leaves hold their payload"""
+
+    def __init__(self, box_type, payload=b'', children=None):
+        self.type = box_type
+        self.payload = payload
+        self.children = children
+
+    def serialize(self):
+        body = b''.join(child.serialize() for child in self.children) if self.children is not None else self.payload
+        return struct.pack('>I4s', len(body) + 8, self.type) + body
+
+    def find_all(self, box_type):
+        """Yield every descendant box of the given type"""
+        for child in self.children or []:
+            if child.type == box_type:
+                yield child
+            yield from child.find_all(box_type)
+
+
+def read_box_header(f, offset, end):
+    """Return (type, size, header_size) of the box at offset, or None at end"""
+    if end - offset < 8:
+        return None
+    f.seek(offset)
+    size, box_type = struct.unpack('>I4s', f.read(8))
+    header_size = 8
+    if size == 1:
+        size = struct.unpack('>Q', f.read(8))[0]
+        header_size = 16
+    elif size == 0:
+        size = end - offset
+    if size < header_size or offset + size > end:
+        raise ValueError(f"Corrupt box {box_type!r} at offset {offset}")
+    return box_type, size, header_size
+
+
+def iter_top_level_boxes(f, file_size):
+    """Yield (type, offset, size, header_size) for each top-level box"""
+    offset = 0
+    while True:
+        header = read_box_header(f, offset, file_size)
+        if header is None:
+            return
+        box_type, size, header_size = header
+        yield box_type, offset, size, header_size
+        offset += size
+
+
+def parse_box(box_type, data):
+    """Parse a box payload, descending only into the containers we patch"""
+    if box_type not in CONTAINER_BOXES:
+        return Box(box_type, payload=data)
+    children = []
+    offset = 0
+    while offset + 8 <= len(data):
+        size, child_type = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header_size or offset + size > len(data):
+            raise ValueError(f"Corrupt box {child_type!r} inside {box_type!r}")
+        children.append(parse_box(child_type, data[offset + header_size:offset + size]))
+        offset += size
+    return Box(box_type, children=children)
+
+
+def _shift_chunk_offsets(moov, shift, start, end):
+    """Add shift to chunk offsets pointing into [start, end); False on 32-bit overflow"""
+    for stco in moov.find_all(b'stco'):
+        count = struct.unpack_from('>I', stco.payload, 4)[0]
+        offsets = list(struct.unpack_from(f'>{count}I', stco.payload, 8))
+        offsets = [o + shift if start <= o < end else o for o in offsets]
+        if offsets and max(offsets) > 0xFFFFFFFF:
+            return False
+        stco.payload = stco.payload[:8] + struct.pack(f'>{count}I', *offsets)
+    for co64 in moov.find_all(b'co64'):
+        count = struct.unpack_from('>I', co64.payload, 4)[0]
+        offsets = struct.unpack_from(f'>{count}Q', co64.payload, 8)
+        offsets = [o + shift if start <= o < end else o for o in offsets]
+        co64.payload = co64.payload[:8] + struct.pack(f'>{count}Q', *offsets)
+    return True
+
+
+def _copy_range(src, dst, start, length):
+    src.seek(start)
+    remaining = length
+    while remaining:
+        chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise ValueError("Unexpected end of file while copying")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def find_moov_layout(f, file_size):
+    """Return (moov box tuple, first mdat offset) from the top-level boxes"""
+    moov = None
+    first_mdat = None
+    for box in iter_top_level_boxes(f, file_size):
+        if box[0] == b'moov':
+            moov = box
+        elif box[0] == b'mdat' and first_mdat is None:
+            first_mdat = box[1]
+    return moov, first_mdat
+
+
+def needs_faststart(file_path):
+    """Whether the file is an ISO-BMFF container with moov after its media data"""
+    if os.path.splitext(file_path)[1].lower() not in FASTSTART_EXTENSIONS:
+        return False
+    try:
+        with open(file_path, 'rb') as f:
+            moov, first_mdat = find_moov_layout(f, os.path.getsize(file_path))
+        return moov is not None and first_mdat is not None and moov[1] > first_mdat
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Could not inspect {file_path} for faststart: {e}")
+        return False
+
+
+def faststart(src_path, dst_path):
+    """Write a copy of src_path with moov moved before the media data.
+
+    The media data is streamed, never re-encoded; only the moov box is held
+    in memory. Returns False (and writes nothing) when the file is already
+    faststart, is not ISO-BMFF, or would need 64-bit offsets it lacks.
+    """
+    file_size = os.path.getsize(src_path)
+    with open(src_path, 'rb') as src:
+        moov_box, first_mdat = find_moov_layout(src, file_size)
+        if moov_box is None or first_mdat is None or moov_box[1] < first_mdat:
+            return False
+        _, moov_offset, moov_size, header_size = moov_box
+        if moov_size > MAX_MOOV_SIZE:
+            logger.warning(f"moov box of {src_path} is too large to relocate ({moov_size} bytes)")
+            return False
+
+        src.seek(moov_offset + header_size)
+        moov = parse_box(b'moov', src.read(moov_size - header_size))
+        new_moov_size = len(moov.serialize())
+        if new_moov_size != moov_size:
+            # Keep the output byte-for-byte the same size so size-based sync still matches
+            logger.info(f"Skipping faststart for {src_path}: moov uses 64-bit box headers")
+            return False
+        # Media between the insertion point and the old moov moves forward
+        if not _shift_chunk_offsets(moov, new_moov_size, first_mdat, moov_offset):
+            logger.info(f"Skipping faststart for {src_path}: offsets would need 64-bit tables")
+            return False
+        moov_bytes = moov.serialize()
+
+        with open(dst_path, 'wb') as dst:
+            _copy_range(src, dst, 0, first_mdat)
+            dst.write(moov_bytes)
+            _copy_range(src, dst, first_mdat, moov_offset - first_mdat)
+            _copy_range(src, dst, moov_offset + moov_size, file_size - moov_offset - moov_size)
+    return True
+
+
+def faststart_copy(file_path, temp_dir=None):
+    """Remux a file into a temporary faststart copy and return its path, or None"""
+    if not needs_faststart(file_path):
+        return None
+    fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(file_path)[1], dir=temp_dir)
+    os.close(fd)
+    try:
+        if faststart(file_path, temp_path):
+            logger.info(f"Created faststart copy of {file_path}")
+            return temp_path
+    except Exception as e:
+        logger.error(f"Faststart remux failed for {file_path}: {e}")
+    os.remove(temp_path)
+    return None
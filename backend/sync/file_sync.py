@@ -10,7 +10,12 @@ import boto3
 from botocore.exceptions import ClientError
 import logging
 import hashlib
+from datetime import datetime, timezone
 from .sync_queue import sync_queue  # Import the shared queue
+from .multipart_uploader import MultipartUploader
+from .part_reader import DEFAULT_PART_SIZE
+from .growing_upload import DEFAULT_GROWING_PART_SIZE, GrowingFileWatcher
+from .faststart import faststart_copy
 
 # Windows-specific imports
 if os.name == 'nt':  # Only import on Windows
@@ -35,6 +40,7 @@ class FileSync:
         self.sync_folder = None
         self.bucket_name = None
         self.config = {}
+        self.growing_watcher = None
         self.initialize_s3_client()
 
     def initialize_s3_client(self):
@@ -398,6 +404,59 @@ exit /b 0
     def stop_sync(self):
         """Stop the synchronization process."""
         self.stop_event.set()
+        self.stop_growing_watch()
+
+    def start_growing_watch(self):
+        """Upload new recordings in the sync folder while they are still being written."""
+        if self.growing_watcher:
+            return True
+        if not self.sync_folder or not self.bucket_name:
+            logger.error("Missing sync folder or bucket name for growing file mode")
+            return False
+
+        def on_complete(key, result):
+            self.aws_integration.on_object_written(
+                self.bucket_name, key, size=result.get('size'),
+                metadata={'OriginalName': os.path.basename(key)}
+            )
+            self.update_queue.put(("status", {
+                "type": "completed",
+                "message": f"Uploaded {os.path.basename(key)} as it was recorded",
+                "progress": 100,
+                "details": {
+                    "currentFile": key,
+                    "progress": "100%",
+                    "size": self._format_size(result['size'])
+                }
+            }))
+
+        def on_error(key, error):
+            self.update_queue.put(("status", {
+                "type": "error",
+                "message": f"Failed to upload {key} while recording: {error}"
+            }))
+
+        self.growing_watcher = GrowingFileWatcher(
+            self._create_uploader(),
+            self.sync_folder,
+            self.bucket_name,
+            self.aws_integration.video.is_video_file,
+            content_type_for=self.aws_integration.video.get_content_type,
+            part_size=self.config.get('growing_part_size', DEFAULT_GROWING_PART_SIZE),
+            stable_seconds=self.config.get('growing_stable_seconds', 10),
+            poll_interval=self.config.get('growing_poll_interval', 2),
+            full_verify=self.config.get('growing_full_verify', False),
+            on_complete=on_complete,
+            on_error=on_error
+        )
+        self.growing_watcher.start()
+        return True
+
+    def stop_growing_watch(self):
+        """Stop watching for growing recordings."""
+        if self.growing_watcher:
+            self.growing_watcher.stop()
+            self.growing_watcher = None
 
     def sync(self, to_upload):
         """Start the sync process."""
@@ -424,6 +483,10 @@ exit /b 0
             }))
 
             for index, file_path in enumerate(to_upload, 1):
+                if self.growing_watcher and self.growing_watcher.is_tracking(file_path):
+                    logger.info(f"Skipping {file_path}: it is being uploaded while recording")
+                    continue
+
                 if self.stop_event.is_set():
                     self.update_queue.put(("status", {
                         "type": "status",
@@ -476,14 +539,44 @@ exit /b 0
                 }
             }))
 
+        # Optional pre-upload stage: move moov ahead of the media for instant playback
+        upload_path = file_path
+        if self.config.get('faststart'):
+            upload_path = faststart_copy(file_path, self.config.get('faststart_temp_dir')) or file_path
+
+        # Optional side job: render thumbnails from the local copy while it is in the page cache
+        thumbnails = None
+        if self.config.get('upload_thumbnails') and self.aws_integration.video.is_video_file(key):
+            try:
+                thumbnails = self.aws_integration.thumbnail_manager.render_local(file_path)
+            except Exception as e:
+                logger.warning(f"Could not start thumbnails for {key}: {e}")
+
         try:
-            self.s3_client.upload_file(
-                file_path, 
-                bucket, 
-                key, 
-                Callback=callback
+            uploader = self._create_uploader()
+            metadata = {
+                'OriginalName': os.path.basename(file_path),
+                'UploadDate': datetime.now(timezone.utc).isoformat()
+            }
+            result = uploader.upload_file(
+                upload_path,
+                bucket,
+                key,
+                extra_args={'ContentType': self.aws_integration.video.get_content_type(key)},
+                callback=callback,
+                metadata=metadata
             )
             
+            self.aws_integration.on_object_written(bucket, key, size=result['size'], metadata=metadata)
+            if thumbnails is not None:
+                # Stored under the new ETag and published next to the video
+                self.aws_integration.thumbnail_manager.adopt_local(thumbnails, bucket, key, result.get('etag'))
+                thumbnails = None
+
+            # Optional post-upload stage: segment the local copy for adaptive streaming
+            if self.config.get('hls_packaging') and self.aws_integration.video.is_video_file(key):
+                self.aws_integration.hls_manager.package_in_background(file_path, key, bucket)
+
             # Add completion message after successful upload
             self.update_queue.put(("status", {
                 "type": "completed",
@@ -497,6 +590,33 @@ exit /b 0
             }))
         except Exception as e:
             raise Exception(f"Failed to upload {key}: {str(e)}")
+        finally:
+            if thumbnails is not None:
+                self.aws_integration.thumbnail_manager.discard_local(thumbnails)
+            if upload_path != file_path:
+                try:
+                    os.remove(upload_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove faststart copy {upload_path}: {e}")
+
+    def _create_uploader(self):
+        """Create a multipart uploader from the current configuration."""
+        return MultipartUploader(
+            self.s3_client,
+            part_size=self.config.get('multipart_chunksize', DEFAULT_PART_SIZE),
+            max_concurrency=self.config.get('max_concurrency', 8),
+            use_mmap=self.config.get('upload_use_mmap', True),
+            checksum_algorithm=self._get_checksum_algorithm(),
+            # Storing VideoHash on multipart uploads rewrites the whole object server-side
+            hash_metadata=self.config.get('video_hash_metadata', False)
+        )
+
+    def _get_checksum_algorithm(self):
+        """Checksum algorithm for uploads, if the storage provider supports one."""
+        provider_client = getattr(self.aws_integration, 's3_client', None)
+        if not getattr(provider_client, 'supports_flexible_checksums', False):
+            return None
+        return self.config.get('upload_checksum_algorithm', 'SHA256')
 
     def get_local_files(self, folder):
         """Get list of local files."""
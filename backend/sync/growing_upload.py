@@ -0,0 +1,323 @@
+# File: backend/sync/growing_upload.py
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timezone
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from .checksums import new_file_digest
+from .part_reader import MAX_PARTS, MIN_PART_SIZE, Part, PartStream
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROWING_PART_SIZE = 32 * 1024 * 1024
+
+
+class GrowingFileUpload:
+    """Multipart upload of a file that is still being written.
+
+    Full parts are uploaded as soon as enough new bytes exist. When the file
+    has stopped changing for ``stable_seconds`` the uploaded parts are checked
+    against the file, any that changed are uploaded again, the tail is sent
+    and the upload is completed.
+
+    Recorders append and then patch their headers on close, so by default
+    only the first and last full parts are re-read at completion; earlier
+    parts are re-checked one per poll while recording. ``full_verify``
+    re-reads every part instead.
+    """
+
+    def __init__(self, uploader, file_path, bucket, key, part_size=DEFAULT_GROWING_PART_SIZE,
+                 stable_seconds=10, extra_args=None, metadata=None, full_verify=False):
+        self.uploader = uploader
+        self.file_path = file_path
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(int(part_size), MIN_PART_SIZE)
+        self.stable_seconds = stable_seconds
+        self.extra_args = dict(extra_args or {})
+        self.metadata = metadata
+        self.full_verify = full_verify
+        self.upload_id = None
+        self.parts = {}  # part number -> {'entry', 'digest'}
+        self.digest_states = {}  # part number -> whole-file digest state after that part
+        self.uploaded_bytes = 0
+        self.verify_cursor = 1
+        self.result = None
+        self._buffer = bytearray(self.part_size)
+        self._last_stat = None
+        self._stable_since = None
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def poll(self, now=None):
+        """Upload whatever is ready; return True once the upload has completed"""
+        if self.done:
+            return True
+        now = time.monotonic() if now is None else now
+        stat = os.stat(self.file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        if signature != self._last_stat:
+            self._last_stat = signature
+            self._stable_since = now
+        elif now - self._stable_since >= self.stable_seconds:
+            self.finalize(stat.st_size)
+            return True
+
+        if stat.st_size < self.uploaded_bytes:
+            raise ValueError(f"{self.file_path} shrank below already uploaded data")
+
+        self._ensure_started()
+        with open(self.file_path, 'rb', buffering=0) as f:
+            # Parts before the last one must be full-size; keep one back for the tail
+            while (stat.st_size - self.uploaded_bytes >= self.part_size
+                   and len(self.parts) < MAX_PARTS - 1):
+                number = len(self.parts) + 1
+                self._upload_part(f, number, self.uploaded_bytes, self.part_size)
+                self.uploaded_bytes += self.part_size
+            # Re-check one earlier part per poll so rewrites are caught early
+            self._verify_next(f)
+        return False
+
+    def finalize(self, size=None):
+        """Re-upload changed parts, send the tail and complete the upload"""
+        size = os.path.getsize(self.file_path) if size is None else size
+        if size < self.uploaded_bytes:
+            raise ValueError(f"{self.file_path} shrank below already uploaded data")
+        self._ensure_started()
+
+        with open(self.file_path, 'rb', buffering=0) as f:
+            first_changed = None
+            if self.full_verify:
+                to_verify = sorted(self.parts)
+            else:
+                to_verify = sorted({min(self.parts), max(self.parts)}) if self.parts else []
+            for number in to_verify:
+                if self._part_changed(f, number):
+                    self._upload_part(f, number, (number - 1) * self.part_size, self.part_size)
+                    first_changed = first_changed or number
+
+            tail = size - self.uploaded_bytes
+            if tail or not self.parts:
+                number = len(self.parts) + 1
+                self._upload_part(f, number, self.uploaded_bytes, tail)
+                self.uploaded_bytes += tail
+
+            if first_changed:
+                self._rebuild_digests(f, first_changed)
+
+        parts = [self.parts[n]['entry'] for n in sorted(self.parts)]
+        response = self.uploader.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+        etag = response.get('ETag')
+        video_hash = self.digest_states[max(self.digest_states)].hexdigest()
+        if self.metadata is not None and self.uploader.hash_metadata:
+            metadata = dict(self.metadata, VideoHash=video_hash)
+            etag = self.uploader.replace_metadata(self.bucket, self.key, size, metadata, self.extra_args)
+        self.result = {'etag': etag, 'size': size, 'video_hash': video_hash}
+        logger.info(f"Completed growing upload of {self.key} ({len(parts)} parts)")
+        return self.result
+
+    def abort(self):
+        """Abort the multipart upload if one was started"""
+        if self.upload_id and not self.done:
+            self.uploader.abort(self.bucket, self.key, self.upload_id)
+            self.upload_id = None
+
+    def _ensure_started(self):
+        if self.upload_id:
+            return
+        params = dict(self.extra_args)
+        if self.metadata is not None:
+            self.metadata = dict(self.metadata)
+            self.metadata.setdefault('UploadDate', datetime.now(timezone.utc).isoformat())
+            params['Metadata'] = self.metadata
+        if self.uploader.checksum_algorithm:
+            params['ChecksumAlgorithm'] = self.uploader.checksum_algorithm
+        self.upload_id = self.uploader.s3_client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            **params
+        )['UploadId']
+        logger.info(f"Started growing upload of {self.key}")
+
+    def _read(self, f, offset, size):
+        """Read ``size`` bytes at ``offset`` into the reusable buffer"""
+        if size > len(self._buffer):
+            self._buffer = bytearray(size)
+        view = memoryview(self._buffer)[:size]
+        f.seek(offset)
+        read = 0
+        while read < size:
+            n = f.readinto(view[read:])
+            if not n:
+                break
+            read += n
+        return view[:read]
+
+    def _upload_part(self, f, number, offset, size):
+        view = self._read(f, offset, size)
+        part_digest = new_file_digest()
+        part_digest.update(view)
+        entry = self.uploader.upload_part(
+            self.bucket, self.key, self.upload_id, Part(number, offset, PartStream(view))
+        )
+        if number not in self.parts:
+            # Parts are first uploaded in order, so the running digest extends cleanly
+            state = self.digest_states[number - 1].copy() if number > 1 else new_file_digest()
+            state.update(view)
+            self.digest_states[number] = state
+        self.parts[number] = {'entry': entry, 'digest': part_digest.digest()}
+        view.release()
+
+    def _part_changed(self, f, number):
+        view = self._read(f, (number - 1) * self.part_size, self.part_size)
+        digest = new_file_digest()
+        digest.update(view)
+        view.release()
+        return digest.digest() != self.parts[number]['digest']
+
+    def _verify_next(self, f):
+        if not self.parts:
+            return
+        if self.verify_cursor not in self.parts:
+            self.verify_cursor = 1
+        number = self.verify_cursor
+        self.verify_cursor += 1
+        if self._part_changed(f, number):
+            logger.info(f"Part {number} of {self.key} changed, uploading it again")
+            self._upload_part(f, number, (number - 1) * self.part_size, self.part_size)
+            self._rebuild_digests(f, number)
+
+    def _rebuild_digests(self, f, first_changed):
+        """Recompute the running whole-file digest from the first changed part"""
+        state = self.digest_states[first_changed - 1].copy() if first_changed > 1 else new_file_digest()
+        for number in range(first_changed, max(self.parts) + 1):
+            view = self._read(f, (number - 1) * self.part_size, self.part_size if number < max(self.parts)
+                              else self.uploaded_bytes - (number - 1) * self.part_size)
+            state.update(view)
+            view.release()
+            self.digest_states[number] = state.copy()
+
+
+class _GrowingFileEventHandler(FileSystemEventHandler):
+    """Forward created/modified files to the watcher"""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.track(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.track(event.src_path)
+
+
+class GrowingFileWatcher:
+    """Watch a folder and upload new video files while they are still growing"""
+
+    def __init__(self, uploader, folder, bucket, is_video_file, content_type_for=None,
+                 part_size=DEFAULT_GROWING_PART_SIZE, stable_seconds=10, poll_interval=2,
+                 full_verify=False, on_complete=None, on_error=None):
+        self.uploader = uploader
+        self.folder = folder
+        self.bucket = bucket
+        self.is_video_file = is_video_file
+        self.content_type_for = content_type_for
+        self.part_size = part_size
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.full_verify = full_verify
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.uploads = {}
+        self.completed = {}  # key -> (size, mtime_ns) when its upload finished
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.observer = None
+        self.thread = None
+
+    def start(self):
+        self.observer = Observer()
+        self.observer.schedule(_GrowingFileEventHandler(self), self.folder, recursive=True)
+        self.observer.start()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        logger.info(f"Watching {self.folder} for growing recordings")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(timeout=5.0)
+        if self.thread:
+            self.thread.join(timeout=5.0)
+
+    def is_tracking(self, key):
+        """Whether a key is currently owned by a growing upload"""
+        with self.lock:
+            return key in self.uploads
+
+    def track(self, path):
+        """Start a growing upload for a new video file"""
+        if not self.is_video_file(path) or not os.path.isfile(path):
+            return
+        key = os.path.relpath(path, self.folder).replace('\\', '/')
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return
+        with self.lock:
+            if key in self.uploads or self.completed.get(key) == signature:
+                return
+            extra_args = {'ContentType': self.content_type_for(key)} if self.content_type_for else {}
+            self.uploads[key] = GrowingFileUpload(
+                self.uploader,
+                path,
+                self.bucket,
+                key,
+                part_size=self.part_size,
+                stable_seconds=self.stable_seconds,
+                extra_args=extra_args,
+                metadata={'OriginalName': os.path.basename(path)},
+                full_verify=self.full_verify
+            )
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            with self.lock:
+                active = list(self.uploads.items())
+            for key, upload in active:
+                try:
+                    if upload.poll():
+                        with self.lock:
+                            self.completed[key] = self._signature(upload.file_path)
+                        if self.on_complete:
+                            self.on_complete(key, upload.result)
+                    else:
+                        continue
+                except FileNotFoundError:
+                    logger.info(f"{key} disappeared before it finished uploading")
+                    upload.abort()
+                except Exception as e:
+                    logger.error(f"Error in growing upload of {key}: {e}")
+                    upload.abort()
+                    if self.on_error:
+                        self.on_error(key, e)
+                with self.lock:
+                    self.uploads.pop(key, None)
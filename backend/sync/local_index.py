@@ -0,0 +1,137 @@
+# File: backend/sync/local_index.py
+import os
+import logging
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+logger = logging.getLogger(__name__)
+
+
+class _LocalIndexEventHandler(FileSystemEventHandler):
+    """Apply file system changes to the index"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def on_created(self, event):
+        if event.is_directory:
+            self.index.add_tree(event.src_path)
+        else:
+            self.index.add(event.src_path)
+
+    def on_deleted(self, event):
+        self.index.remove(event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        self.index.remove(event.src_path, event.is_directory)
+        if event.is_directory:
+            self.index.add_tree(event.dest_path)
+        else:
+            self.index.add(event.dest_path)
+
+
+class LocalPathIndex:
+    """In-memory set of the files under a folder, as '/'-separated keys.
+
+    The folder is walked once in the background; afterwards a watchdog
+    observer keeps the set current, so membership checks never touch the
+    disk. Until the first walk finishes, ``ready`` is False.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self.ready = False
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._observer = None
+        # Deletions seen while the walk runs; None once it has finished
+        self._removed_while_building = []
+
+    def start(self):
+        """Start watching, then walk the folder in the background"""
+        self._observer = Observer()
+        self._observer.schedule(_LocalIndexEventHandler(self), self.root, recursive=True)
+        self._observer.start()
+        threading.Thread(target=self._build, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def _build(self):
+        # Watch first, walk second: files created during the walk are added by the observer.
+        # A deletion can land before the walk adds the same file, so deletions are replayed
+        # after it for paths that are still gone
+        self.add_tree(self.root)
+        with self._lock:
+            removed, self._removed_while_building = self._removed_while_building, None
+            for path, key, is_directory in removed:
+                if not os.path.lexists(path):
+                    self._discard(key, is_directory)
+            self.ready = True
+        logger.info(f"Indexed {len(self._keys)} local files under {self.root}")
+
+    def key_for(self, path):
+        # Paths come from the walk or the observer, both rooted at self.root
+        rel_path = os.path.relpath(os.path.abspath(path), self.root)
+        if rel_path == '.' or rel_path.startswith('..'):
+            return None
+        return rel_path.replace(os.sep, '/')
+
+    def add(self, path):
+        key = self.key_for(path)
+        if key:
+            with self._lock:
+                self._keys.add(key)
+
+    def add_tree(self, path):
+        """Add every file below path"""
+        keys = self._scan(path)
+        with self._lock:
+            self._keys.update(keys)
+
+    def _scan(self, path):
+        found = []
+        stack = [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            found.append(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not index {path}: {e}")
+        return {key for key in map(self.key_for, found) if key}
+
+    def remove(self, path, is_directory=False):
+        key = self.key_for(path)
+        if not key:
+            return
+        with self._lock:
+            self._discard(key, is_directory)
+            if self._removed_while_building is not None:
+                self._removed_while_building.append((path, key, is_directory))
+
+    def _discard(self, key, is_directory):
+        self._keys.discard(key)
+        if is_directory:
+            prefix = key + '/'
+            self._keys.difference_update([k for k in self._keys if k.startswith(prefix)])
+
+    def contains(self, key):
+        with self._lock:
+            return key.lstrip('/') in self._keys
+
+    def contains_many(self, keys):
+        """Return {key: bool} for every key"""
+        with self._lock:
+            return {key: key.lstrip('/') in self._keys for key in keys}
+
+    def __len__(self):
+        return len(self._keys)
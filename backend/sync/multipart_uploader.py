@@ -0,0 +1,240 @@
+# File: backend/sync/multipart_uploader.py
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from .checksums import checksum_field, new_file_digest, part_checksum, resolve_algorithm
+from .part_reader import DEFAULT_PART_SIZE, choose_part_size, open_part_source
+from .upload_activity import upload_activity
+
+logger = logging.getLogger(__name__)
+
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * 1024 * 1024  # Largest object CopyObject accepts
+
+
+class MultipartUploader:
+    """Upload local files with a bounded number of parts in flight.
+
+    Parts come from ``open_part_source`` so resident memory is bounded by
+    ``max_concurrency`` parts rather than by the size of the file. Every part
+    is checksummed from the same view that is sent, and a whole-file SHA-256
+    is accumulated as parts are produced, so no second read is needed.
+
+    Multipart uploads declare their metadata before the digest is known, so
+    ``VideoHash`` is only stored on them when ``hash_metadata`` is set; that
+    costs a server-side copy of the whole object after the upload.
+    """
+
+    def __init__(self, s3_client, part_size=DEFAULT_PART_SIZE, max_concurrency=8, use_mmap=True,
+                 checksum_algorithm=None, hash_metadata=False):
+        self.s3_client = s3_client
+        self.part_size = part_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.use_mmap = use_mmap
+        self.checksum_algorithm = resolve_algorithm(checksum_algorithm)
+        self.hash_metadata = hash_metadata
+
+    def upload_file(self, file_path, bucket, key, extra_args=None, callback=None, metadata=None):
+        """Upload a file and return its ETag, size and whole-file digest.
+
+        When ``metadata`` is given it is stored on the object. Single-PUT
+        uploads also carry the digest as ``VideoHash``; multipart ones only
+        with ``hash_metadata``. The digest is always in the result.
+        """
+        file_size = os.path.getsize(file_path)
+        part_size = choose_part_size(file_size, self.part_size)
+        extra_args = dict(extra_args or {})
+
+        with upload_activity.track():
+            if file_size <= part_size:
+                etag, video_hash = self._put_object(file_path, bucket, key, file_size, extra_args, callback, metadata)
+            else:
+                etag, video_hash = self._multipart_upload(
+                    file_path, bucket, key, part_size, extra_args, callback, metadata
+                )
+                if metadata is not None and self.hash_metadata:
+                    etag = self.replace_metadata(bucket, key, file_size, dict(metadata, VideoHash=video_hash), extra_args)
+
+        return {'etag': etag, 'size': file_size, 'video_hash': video_hash}
+
+    def _put_object(self, file_path, bucket, key, file_size, extra_args, callback, metadata):
+        """Upload a file that fits in a single part with one PUT"""
+        digest = new_file_digest()
+        with open_part_source(file_path, max(file_size, 1), 1, self.use_mmap) as source:
+            part = next(iter(source), None)
+            try:
+                body = part.stream if part else b''
+                if part:
+                    digest.update(part.stream.view)
+                params = dict(extra_args)
+                if metadata is not None:
+                    params['Metadata'] = dict(metadata, VideoHash=digest.hexdigest())
+                if part and self.checksum_algorithm:
+                    params[checksum_field(self.checksum_algorithm)] = part_checksum(
+                        self.checksum_algorithm, part.stream.view
+                    )
+                response = self.s3_client.put_object(
+                    Bucket=bucket,
+                    Key=key,
+                    Body=body,
+                    ContentLength=file_size,
+                    **params
+                )
+            finally:
+                if part:
+                    part.release()
+        if callback:
+            callback(file_size)
+        return response.get('ETag'), digest.hexdigest()
+
+    def _multipart_upload(self, file_path, bucket, key, part_size, extra_args, callback, metadata=None):
+        """Upload a file as a multipart upload with parallel parts"""
+        params = dict(extra_args)
+        if metadata is not None:
+            params['Metadata'] = dict(metadata)
+        if self.checksum_algorithm:
+            params['ChecksumAlgorithm'] = self.checksum_algorithm
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            **params
+        )['UploadId']
+
+        try:
+            parts, video_hash = self._upload_parts(file_path, bucket, key, upload_id, part_size, callback)
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return response.get('ETag'), video_hash
+        except Exception:
+            self.abort(bucket, key, upload_id)
+            raise
+
+    def _upload_parts(self, file_path, bucket, key, upload_id, part_size, callback):
+        """Feed parts to the worker pool, never holding more than max_concurrency"""
+        in_flight = threading.BoundedSemaphore(self.max_concurrency)
+        failed = threading.Event()
+        digest = new_file_digest()
+        futures = []
+
+        def upload(part):
+            try:
+                if failed.is_set():
+                    return None
+                result = self.upload_part(bucket, key, upload_id, part)
+                if callback:
+                    callback(part.size)
+                return result
+            except Exception:
+                failed.set()
+                raise
+            finally:
+                part.release()
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            with open_part_source(file_path, part_size, self.max_concurrency, self.use_mmap) as source:
+                for part in source:
+                    in_flight.acquire()
+                    if failed.is_set():
+                        part.release()
+                        in_flight.release()
+                        break
+                    # Parts are produced in order, so the whole-file digest is exact
+                    digest.update(part.stream.view)
+                    futures.append(pool.submit(upload, part))
+                # Every part must finish before the source (and its map) is closed
+                wait(futures)
+            results = [future.result() for future in futures]
+
+        return sorted(results, key=lambda p: p['PartNumber']), digest.hexdigest()
+
+    def upload_part(self, bucket, key, upload_id, part):
+        """Upload one part and return its entry for CompleteMultipartUpload"""
+        params = {}
+        if self.checksum_algorithm:
+            params[checksum_field(self.checksum_algorithm)] = part_checksum(
+                self.checksum_algorithm, part.stream.view
+            )
+        with upload_activity.track():
+            response = self.s3_client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part.number,
+                Body=part.stream,
+                ContentLength=part.size,
+                **params
+            )
+        entry = {'PartNumber': part.number, 'ETag': response['ETag']}
+        entry.update(params)
+        return entry
+
+    def replace_metadata(self, bucket, key, size, metadata, extra_args=None):
+        """Rewrite object metadata with a server-side copy and return the new ETag.
+
+        Multipart uploads must declare metadata before the digest is known,
+        so with ``hash_metadata`` it is attached afterwards without moving
+        any bytes through this machine. Objects over 5 GiB are copied part
+        by part.
+        """
+        params = dict(extra_args or {})
+        params['Metadata'] = metadata
+        if self.checksum_algorithm:
+            params['ChecksumAlgorithm'] = self.checksum_algorithm
+        copy_source = {'Bucket': bucket, 'Key': key}
+
+        if size <= MAX_COPY_OBJECT_SIZE:
+            response = self.s3_client.copy_object(
+                Bucket=bucket,
+                Key=key,
+                CopySource=copy_source,
+                MetadataDirective='REPLACE',
+                **params
+            )
+            return response.get('CopyObjectResult', {}).get('ETag')
+
+        upload_id = self.s3_client.create_multipart_upload(Bucket=bucket, Key=key, **params)['UploadId']
+        try:
+            part_size = choose_part_size(size, self.part_size)
+
+            def copy_part(number, start):
+                end = min(start + part_size, size) - 1
+                result = self.s3_client.upload_part_copy(
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    CopySource=copy_source,
+                    CopySourceRange=f"bytes={start}-{end}"
+                )['CopyPartResult']
+                entry = {'PartNumber': number, 'ETag': result['ETag']}
+                if self.checksum_algorithm:
+                    field = checksum_field(self.checksum_algorithm)
+                    if field in result:
+                        entry[field] = result[field]
+                return entry
+
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                parts = list(pool.map(lambda args: copy_part(*args),
+                                      enumerate(range(0, size, part_size), 1)))
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return response.get('ETag')
+        except Exception:
+            self.abort(bucket, key, upload_id)
+            raise
+
+    def abort(self, bucket, key, upload_id):
+        """Abort a multipart upload, logging rather than raising on failure"""
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        except Exception as e:
+            logger.error(f"Failed to abort multipart upload {upload_id} for {key}: {e}")
@@ -0,0 +1,229 @@
+# File: backend/sync/part_reader.py
+import io
+import mmap
+import os
+import queue
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part except the last
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+def choose_part_size(file_size, part_size=DEFAULT_PART_SIZE):
+    """Return a part size that respects the S3 minimum and the 10,000 part limit"""
+    part_size = max(int(part_size), MIN_PART_SIZE)
+    if file_size > part_size * MAX_PARTS:
+        part_size = -(-file_size // MAX_PARTS)
+    return part_size
+
+
+class PartStream(io.RawIOBase):
+    """Seekable, read-only stream over a memoryview of one upload part.
+
+    The HTTP layer pulls small blocks out of it, so the part itself is never
+    copied into a new bytes object.
+    """
+
+    def __init__(self, view, on_release=None):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+        self._on_release = on_release
+
+    @property
+    def view(self):
+        return self._view
+
+    def __len__(self):
+        return len(self._view)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return self._pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        if self._pos >= end:
+            return b''
+        data = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return data
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def close(self):
+        # Leave the view alone: botocore may close and re-read the body on retry
+        pass
+
+    def release(self):
+        """Release the underlying view and hand the buffer back to its source"""
+        if self._view is None:
+            return
+        self._view.release()
+        self._view = memoryview(b'')
+        callback, self._on_release = self._on_release, None
+        if callback:
+            callback()
+        super().close()
+
+
+class Part:
+    """A single numbered part of a file"""
+
+    def __init__(self, number, offset, stream):
+        self.number = number
+        self.offset = offset
+        self.stream = stream
+
+    @property
+    def size(self):
+        return len(self.stream)
+
+    def release(self):
+        self.stream.release()
+
+
+class MappedPartSource:
+    """Serve file parts as memoryview slices of a read-only mmap"""
+
+    def __init__(self, file_path, part_size=DEFAULT_PART_SIZE):
+        self.file_path = file_path
+        self.part_size = part_size
+        self._file = None
+        self._map = None
+        self._view = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self._map is not None:
+            return self
+        self._file = open(self.file_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+        return self
+
+    def __iter__(self):
+        size = len(self._view)
+        for number, offset in enumerate(range(0, size, self.part_size), 1):
+            yield Part(number, offset, PartStream(self._view[offset:offset + self.part_size]))
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A part is still referenced; the map is freed once it is released
+                logger.warning(f"Memory map for {self.file_path} still has exported parts")
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BufferedPartSource:
+    """Serve file parts by reading into a fixed pool of reusable buffers.
+
+    Iteration blocks until a buffer is released, so at most ``max_in_flight``
+    parts are ever resident.
+    """
+
+    def __init__(self, file_path, part_size=DEFAULT_PART_SIZE, max_in_flight=4):
+        self.file_path = file_path
+        self.part_size = part_size
+        self.max_in_flight = max(1, max_in_flight)
+        self._free = queue.Queue()
+        self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self._file is not None:
+            return self
+        self._file = open(self.file_path, 'rb', buffering=0)
+        for _ in range(self.max_in_flight):
+            self._free.put(bytearray(self.part_size))
+        return self
+
+    def __iter__(self):
+        number = 0
+        offset = 0
+        while True:
+            buffer = self._free.get()
+            view = memoryview(buffer)
+            read = self._file.readinto(view)
+            if not read:
+                view.release()
+                self._free.put(buffer)
+                return
+            # Fill the buffer completely unless the file ends
+            while read < self.part_size:
+                more = self._file.readinto(view[read:])
+                if not more:
+                    break
+                read += more
+            number += 1
+            part_view = view[:read]
+            view.release()
+            yield Part(number, offset, PartStream(part_view, on_release=lambda b=buffer: self._free.put(b)))
+            offset += read
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_part_source(file_path, part_size=DEFAULT_PART_SIZE, max_in_flight=4, use_mmap=True):
+    """Open the cheapest part source available for a file.
+
+    Memory maps are preferred; files that cannot be mapped (empty files,
+    some network shares) fall back to a reusable buffer pool.
+    """
+    if use_mmap and os.path.getsize(file_path) > 0:
+        try:
+            return MappedPartSource(file_path, part_size).open()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot memory-map {file_path}, using buffered reads: {e}")
+    return BufferedPartSource(file_path, part_size, max_in_flight).open()
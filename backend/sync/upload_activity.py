@@ -0,0 +1,54 @@
+# File: backend/sync/upload_activity.py
+import time
+import threading
+from contextlib import contextmanager
+
+
+class UploadActivity:
+    """Process-wide count of uploads in progress.
+
+    Background transfers (prefetch, backfills) check this to stay out of the
+    way of uploads competing for the same uplink and gateway.
+    """
+
+    def __init__(self):
+        self._active = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.last_active = 0.0
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self.last_active = time.monotonic()
+                if not self._active:
+                    self._idle.notify_all()
+
+    def is_active(self):
+        with self._lock:
+            return self._active > 0
+
+    def wait_idle(self, quiet_seconds=0.0, timeout=None):
+        """Block until no upload has run for quiet_seconds; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                quiet_for = time.monotonic() - self.last_active
+                if not self._active and quiet_for >= quiet_seconds:
+                    return True
+                wait = None if self._active else quiet_seconds - quiet_for
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._idle.wait(wait)
+
+
+upload_activity = UploadActivity()
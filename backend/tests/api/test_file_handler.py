@@ -0,0 +1,131 @@
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import pytest
+from flask import Blueprint, Flask, jsonify
+from backend.api_requests.exceptions import (
+    APIException, FileOperationError, ResourceNotFoundError, ValidationError
+)
+from backend.api_requests.handlers import FileHandler
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+def make_handler(tmp_path, **config):
+    sync_folder = tmp_path / 'sync'
+    sync_folder.mkdir(exist_ok=True)
+    aws_integration = SimpleNamespace(
+        config=dict({'sync_folder': str(sync_folder)}, **config),
+        bucket_name='bucket',
+        hls_manager=MagicMock()
+    )
+    return FileHandler(aws_integration), sync_folder
+
+def make_client(handler):
+    """Test client serving the handler's file routes under the names url_for expects"""
+    app = Flask(__name__)
+    bp = Blueprint('api', __name__)
+    bp.add_url_rule('/files/local/<path:file_key>', 'serve_local_file', handler.serve_local_file)
+    bp.add_url_rule('/files/proxy/<path:file_key>', 'proxy_file', handler.proxy_file)
+    bp.add_url_rule('/files/stream/<path:file_key>', 'stream_file', handler.stream_file)
+    app.register_blueprint(bp)
+    app.register_error_handler(APIException, lambda e: (jsonify({'error': e.message}), e.status_code))
+    return app.test_client()
+
+class TestLocalFiles:
+    def test_local_path_stays_inside_the_sync_folder(self, tmp_path):
+        """Keys resolve under the sync folder; .. and symlinks out of it are rejected"""
+        handler, sync_folder = make_handler(tmp_path)
+        assert handler._local_path('/a/clip.mp4') == os.path.join(str(sync_folder.resolve()), 'a', 'clip.mp4')
+        with pytest.raises(ValidationError):
+            handler._local_path('a/../../secret.mp4')
+        (sync_folder / 'link').symlink_to(tmp_path)
+        with pytest.raises(ValidationError):
+            handler._local_path('link/secret.mp4')
+        handler.aws_integration.config['sync_folder'] = None
+        assert handler._local_path('clip.mp4') is None
+
+    def test_range_request_gets_partial_content(self, tmp_path):
+        """A satisfiable Range is answered with 206 and a matching Content-Range"""
+        handler, sync_folder = make_handler(tmp_path)
+        handler.aws_integration.video = MagicMock(get_content_type=lambda path: 'video/mp4')
+        (sync_folder / 'clip.mp4').write_bytes(bytes(range(100)))
+        client = make_client(handler)
+
+        response = client.get('/files/local/clip.mp4', headers={'Range': 'bytes=10-19'})
+        assert response.status_code == 206
+        assert response.headers['Content-Range'] == 'bytes 10-19/100'
+        assert response.data == bytes(range(10, 20))
+        assert response.mimetype == 'video/mp4'
+
+        response = client.get('/files/local/clip.mp4')
+        assert response.status_code == 200 and len(response.data) == 100
+
+    def test_unsatisfiable_range(self, tmp_path):
+        """A range past the end of the file is answered with 416"""
+        handler, sync_folder = make_handler(tmp_path)
+        handler.aws_integration.video = MagicMock(get_content_type=lambda path: 'video/mp4')
+        (sync_folder / 'clip.mp4').write_bytes(bytes(100))
+        response = make_client(handler).get('/files/local/clip.mp4', headers={'Range': 'bytes=200-300'})
+        assert response.status_code == 416
+        assert response.headers['Content-Range'] == 'bytes */100'
+
+    def test_traversal_and_missing_files_are_refused(self, tmp_path):
+        """Keys escaping the sync folder get 400, absent files 404"""
+        handler, _ = make_handler(tmp_path)
+        (tmp_path / 'secret.mp4').write_bytes(b'secret')
+        client = make_client(handler)
+        assert client.get('/files/local/..%2Fsecret.mp4').status_code == 400
+        assert client.get('/files/local/missing.mp4').status_code == 404
+
+    @pytest.mark.parametrize('local, source', [(True, 'local'), (False, 'remote')])
+    def test_stream_source(self, tmp_path, local, source):
+        """A synced copy plays from the local route, anything else from a presigned URL"""
+        handler, _ = make_handler(tmp_path, bucket_name='bucket')
+        aws_integration = handler.aws_integration
+        aws_integration.local_index = lambda: SimpleNamespace(
+            ready=True, contains_many=lambda keys: {key: local for key in keys}
+        )
+        aws_integration.has_cached_head = lambda bucket, key: False
+        aws_integration.generate_presigned_url = lambda bucket, key: f"https://{bucket}.s3/{key}?signed"
+
+        body = make_client(handler).get('/files/stream/a/clip.mp4').get_json()
+        assert body['source'] == source
+        if local:
+            assert body['url'] == 'http://localhost/files/local/a/clip.mp4'
+        else:
+            assert body['url'] == 'https://bucket.s3/a/clip.mp4?signed'
+
+class TestPackageHLS:
+    def test_packages_the_local_copy(self, tmp_path, app):
+        """The synced file is handed to the packager"""
+        handler, sync_folder = make_handler(tmp_path)
+        (sync_folder / 'clip.mp4').write_bytes(b'video')
+        with app.app_context():
+            assert handler.package_hls('/clip.mp4').get_json() == {'status': 'started'}
+        handler.aws_integration.hls_manager.package_in_background.assert_called_once_with(
+            str((sync_folder / 'clip.mp4').resolve()), '/clip.mp4'
+        )
+
+    def test_missing_local_copy(self, tmp_path, app):
+        """A key with no synced file is not found"""
+        handler, _ = make_handler(tmp_path)
+        with app.app_context(), pytest.raises(ResourceNotFoundError):
+            handler.package_hls('missing.mp4')
+
+    def test_missing_ffmpeg(self, tmp_path, app):
+        """Without ffmpeg the request fails before packaging starts"""
+        handler, sync_folder = make_handler(tmp_path)
+        (sync_folder / 'clip.mp4').write_bytes(b'video')
+        handler.aws_integration.hls_manager.is_available.return_value = False
+        with app.app_context(), pytest.raises(FileOperationError):
+            handler.package_hls('clip.mp4')
+        handler.aws_integration.hls_manager.package_in_background.assert_not_called()
+
+    def test_keys_cannot_leave_the_sync_folder(self, tmp_path, app):
+        """.. in a key is rejected"""
+        handler, _ = make_handler(tmp_path)
+        (tmp_path / 'secret.mp4').write_bytes(b'video')
+        with app.app_context(), pytest.raises(ValidationError):
+            handler.package_hls('../secret.mp4')
@@ -0,0 +1,59 @@
+import gzip
+import json
+import pytest
+from flask import Flask, Response, jsonify
+from backend.api import routes
+
+BIG = {'files': [{'Key': f'videos/clip{i:04d}.mp4'} for i in range(200)]}
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.add_url_rule('/big', 'big', lambda: jsonify(BIG))
+    app.add_url_rule('/small', 'small', lambda: jsonify({'ok': True}))
+    app.add_url_rule('/stream', 'stream', lambda: Response(
+        (json.dumps(BIG) for _ in range(1)), mimetype='application/json'
+    ))
+    app.after_request(routes.finalize_response)
+    return app.test_client()
+
+class TestResponseEncoding:
+    def test_matching_etag_gets_304(self, client):
+        """A repeat request with the validator is answered without a body"""
+        etag = client.get('/small').headers['ETag']
+        assert etag.startswith('W/')
+        response = client.get('/small', headers={'If-None-Match': etag})
+        assert response.status_code == 304 and response.data == b''
+        assert client.get('/small', headers={'If-None-Match': 'W/"other"'}).status_code == 200
+
+    def test_gzip_when_brotli_is_not_accepted(self, client):
+        """Clients that only take gzip get gzip"""
+        response = client.get('/big', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == BIG
+
+    @pytest.mark.skipif(routes.brotli is None, reason='brotli not installed')
+    def test_brotli_preferred_when_accepted(self, client):
+        """br wins when the client accepts both"""
+        response = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert json.loads(routes.brotli.decompress(response.data)) == BIG
+
+    def test_identity_without_accept_encoding(self, client):
+        """Clients that accept no encoding get the plain body"""
+        response = client.get('/big', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json() == BIG
+
+    def test_small_bodies_are_not_compressed(self, client):
+        """Bodies under MIN_COMPRESS_SIZE go out as they are"""
+        response = client.get('/small', headers={'Accept-Encoding': 'gzip, br'})
+        assert len(response.data) < routes.MIN_COMPRESS_SIZE
+        assert 'Content-Encoding' not in response.headers
+
+    def test_streamed_responses_are_left_alone(self, client):
+        """Streamed bodies get no validator or encoding, and are not buffered"""
+        response = client.get('/stream', headers={'Accept-Encoding': 'gzip, br'})
+        assert 'ETag' not in response.headers and 'Content-Encoding' not in response.headers
+        assert response.get_json() == BIG
@@ -0,0 +1,36 @@
+import json
+import pytest
+from backend.api.streaming import ndjson_chunks, json_array_chunks
+
+class TestStreaming:
+    def test_ndjson_is_lazy_and_batched(self):
+        """Items are pulled only as chunks are requested"""
+        pulled = []
+
+        def items():
+            for i in range(1000):
+                pulled.append(i)
+                yield {'Key': f'file{i:04d}', 'Size': i}
+
+        chunks = ndjson_chunks(items(), chunk_size=1024)
+        first = next(chunks)
+        assert len(pulled) < 100
+        lines = (first + b''.join(chunks)).decode().splitlines()
+        assert len(lines) == 1000
+        assert json.loads(lines[-1]) == {'Key': 'file0999', 'Size': 999}
+
+    def test_ndjson_reports_errors_inline(self):
+        """A failing listing ends with an error line"""
+        def items():
+            yield {'Key': 'a'}
+            raise RuntimeError('listing failed')
+
+        lines = b''.join(ndjson_chunks(items())).decode().splitlines()
+        assert json.loads(lines[-1]) == {'error': 'listing failed'}
+
+    @pytest.mark.parametrize('count', [0, 1, 500])
+    def test_json_array_matches_json_dumps(self, count):
+        """The chunked array decodes to the same document jsonify would send"""
+        items = [{'Key': f'k{i}'} for i in range(count)]
+        body = b''.join(json_array_chunks(iter(items), extra={'prefix': 'a/', 'continuationToken': None}, chunk_size=256))
+        assert json.loads(body) == {'prefix': 'a/', 'continuationToken': None, 'files': items}
@@ -0,0 +1,147 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from backend.aws.listing_handler import ListingHandler, is_hidden_key, normalize_prefix, parent_prefixes
+
+def make_object(key, size, day):
+    return {
+        'Key': key,
+        'Size': size,
+        'LastModified': datetime(2024, 1, day, tzinfo=timezone.utc),
+        'ETag': f'"{key}"'
+    }
+
+class FakeS3:
+    """Minimal list_objects_v2 with Prefix, Delimiter and MaxKeys paging"""
+
+    def __init__(self, objects):
+        self.objects = sorted(objects, key=lambda o: o['Key'])
+        self.calls = 0
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, MaxKeys=1000, ContinuationToken=None):
+        self.calls += 1
+        rows = []
+        for obj in self.objects:
+            if not obj['Key'].startswith(Prefix):
+                continue
+            rest = obj['Key'][len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                folder = Prefix + rest.split(Delimiter)[0] + Delimiter
+                if not rows or rows[-1] != ('prefix', folder):
+                    rows.append(('prefix', folder))
+            else:
+                rows.append(('object', obj))
+        start = int(ContinuationToken or 0)
+        page = rows[start:start + MaxKeys]
+        result = {
+            'CommonPrefixes': [{'Prefix': v} for t, v in page if t == 'prefix'],
+            'Contents': [v for t, v in page if t == 'object'],
+            'IsTruncated': start + MaxKeys < len(rows)
+        }
+        if result['IsTruncated']:
+            result['NextContinuationToken'] = str(start + MaxKeys)
+        return result
+
+    def get_paginator(self, name):
+        paginator = MagicMock()
+
+        def paginate(**kwargs):
+            token = None
+            while True:
+                page = self.list_objects_v2(ContinuationToken=token, **kwargs)
+                yield page
+                if not page['IsTruncated']:
+                    return
+                token = page['NextContinuationToken']
+
+        paginator.paginate.side_effect = paginate
+        return paginator
+
+class TestListingHandler:
+    @pytest.fixture
+    def s3(self):
+        """Fixture with one folder of clips, a nested folder and HLS output"""
+        objects = [make_object(f'shows/clip{i:02d}.mp4', size=i * 10, day=(i % 28) + 1) for i in range(12)]
+        objects += [
+            make_object('shows/', 0, 1),
+            make_object('shows/extras/bts.mp4', 5, 1),
+            make_object('shows/clip00.mp4.hls/master.m3u8', 1, 1),
+        ]
+        return FakeS3(objects)
+
+    @pytest.fixture
+    def listing(self, s3):
+        client = MagicMock()
+        client.client = s3
+        return ListingHandler(client)
+
+    def test_helpers(self):
+        """Test path normalization and parent prefixes"""
+        assert normalize_prefix('/') == ''
+        assert normalize_prefix('/shows') == 'shows/'
+        assert parent_prefixes('a/b/c.mp4') == ['a/b/', 'a/', '']
+        assert is_hidden_key('.zugacloud/thumbnails/abc/123.jpg')
+        assert not is_hidden_key('shows/.zugacloud.mp4')
+        assert is_hidden_key('shows/clip.mp4.hls/720p/segment_00001.m4s')
+        assert is_hidden_key('shows/clip.MOV.hls/')
+        assert not is_hidden_key('projects/foo.hls/bar.mp4')
+        assert not is_hidden_key('projects/notes.hls/')
+        assert not is_hidden_key('shows/clip.mp4.hls')
+
+    def test_pages_follow_s3_tokens(self, listing):
+        """Test name-ordered pages pass through S3 with opaque tokens"""
+        seen = []
+        token = None
+        while True:
+            page = listing.list_directory('bucket', '/shows', page_size=5, token=token)
+            seen += [entry['Key'] for entry in page['files']]
+            token = page['continuationToken']
+            if not token:
+                break
+        assert seen.count('shows/extras/') == 1
+        assert 'shows/clip00.mp4.hls/' not in seen
+        assert 'shows/' not in seen
+        assert len([k for k in seen if k.endswith('.mp4')]) == 12
+
+    def test_sorted_listing_uses_snapshot(self, listing, s3):
+        """Test non-name sorts page through a cached snapshot"""
+        first = listing.list_directory('bucket', 'shows', page_size=4, sort='size', order='desc')
+        calls = s3.calls
+        second = listing.list_directory('bucket', 'shows', page_size=4, sort='size', order='desc',
+                                        token=first['continuationToken'])
+
+        assert s3.calls == calls
+        assert first['files'][0]['Key'] == 'shows/extras/'
+        sizes = [e['Size'] for e in first['files'][1:] + second['files']]
+        assert sizes == sorted(sizes, reverse=True)
+        assert first['version'] == second['version']
+
+    def test_invalidate_drops_snapshot(self, listing, s3):
+        """Test a write under a folder forces a fresh listing"""
+        listing.list_directory('bucket', 'shows', sort='size')
+        listing.invalidate('bucket', 'shows/new.mp4')
+        calls = s3.calls
+        listing.list_directory('bucket', 'shows', sort='size')
+        assert s3.calls > calls
+
+    def test_rejects_foreign_token(self, listing):
+        """Test a token from another folder is refused"""
+        page = listing.list_directory('bucket', 'shows', page_size=2)
+        with pytest.raises(ValueError):
+            listing.list_directory('bucket', 'other', token=page['continuationToken'])
+
+    def test_snapshot_token_is_refused_once_the_folder_changes(self, listing):
+        """A snapshot page token never falls back to the first S3 page"""
+        first = listing.list_directory('bucket', 'shows', page_size=5, sort='size')
+        listing.invalidate('bucket', 'shows/new.mp4')
+        with pytest.raises(ValueError, match='changed'):
+            listing.list_directory('bucket', 'shows', page_size=5, token=first['continuationToken'])
+
+    def test_name_order_matches_s3(self, s3, listing):
+        """Snapshots order names like S3 does, so both paths agree"""
+        s3.objects = sorted(s3.objects + [make_object('shows/B.mp4', 1, 1), make_object('shows/a.mp4', 1, 1)],
+                            key=lambda o: o['Key'])
+        passthrough = [e['Key'] for e in listing.list_directory('bucket', 'shows', page_size=100)['files']]
+        snapshot = [e['Key'] for e in listing.list_directory('bucket', 'shows', sort='name')['files']]
+        assert snapshot == passthrough
+        assert passthrough.index('shows/B.mp4') < passthrough.index('shows/a.mp4')
@@ -0,0 +1,75 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from backend.aws.metadata_handler import MetadataHandler
+from backend.aws.listing_handler import ListingHandler
+from backend.aws.s3_client import POOL_HEADROOM, pool_size
+
+class FakeHeadClient:
+    """head_object that records calls and threads"""
+
+    def __init__(self, etags):
+        self.etags = etags
+        self.calls = []
+        self.threads = set()
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(Key)
+        self.threads.add(threading.get_ident())
+        if Key not in self.etags:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {
+            'ContentLength': 10,
+            'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc),
+            'ETag': self.etags[Key],
+            'Metadata': {'OriginalName': f'{Key}.orig'}
+        }
+
+class TestMetadataHandler:
+    def make_handler(self, etags, listing=None):
+        client = FakeHeadClient(etags)
+        handler = MetadataHandler(MagicMock(client=client), listing=listing, max_workers=4)
+        return handler, client
+
+    def test_batch_fetches_concurrently_and_caches(self):
+        """Misses are fetched once; repeat batches make no calls"""
+        etags = {f'dir/{i}.mp4': f'"{i}"' for i in range(20)}
+        handler, client = self.make_handler(etags)
+        keys = list(etags) + ['dir/missing.mp4']
+        results = handler.get_many('bucket', keys + ['dir/0.mp4'])
+        assert len(results) == 21
+        assert results['dir/3.mp4']['originalName'] == 'dir/3.mp4.orig'
+        assert results['dir/missing.mp4'] == {'key': 'dir/missing.mp4', 'error': 'File not found'}
+        assert len(client.calls) == 21
+
+        handler.get_many('bucket', list(etags))
+        assert len(client.calls) == 21
+
+    def test_listing_etag_invalidates_cache(self):
+        """A cached listing with a different ETag forces a fresh HEAD"""
+        listing = ListingHandler(MagicMock())
+        handler, client = self.make_handler({'dir/a.mp4': '"1"'}, listing)
+        handler.get('bucket', 'dir/a.mp4')
+        listing._store('bucket', 'dir/', [{'Key': 'dir/a.mp4', 'ETag': '"1"', 'Type': 'object'}])
+        handler.get('bucket', 'dir/a.mp4')
+        assert len(client.calls) == 1
+
+        client.etags['dir/a.mp4'] = '"2"'
+        listing._store('bucket', 'dir/', [{'Key': 'dir/a.mp4', 'ETag': '"2"', 'Type': 'object'}])
+        assert handler.get('bucket', 'dir/a.mp4')['etag'] == '"2"'
+        assert len(client.calls) == 2
+
+    def test_batches_share_one_bounded_pool(self):
+        """Concurrent batches run on the handler's max_workers threads, matching the client's pool"""
+        etags = {f'dir/{i}.mp4': f'"{i}"' for i in range(40)}
+        handler, client = self.make_handler(etags)
+        keys = list(etags)
+        batches = [threading.Thread(target=handler.get_many, args=('bucket', keys[i::2])) for i in range(2)]
+        for batch in batches:
+            batch.start()
+        for batch in batches:
+            batch.join(5)
+        assert len(client.calls) == 40
+        assert len(client.threads) <= 4
+        assert pool_size({'metadata_max_workers': 4}) == 4 + POOL_HEADROOM
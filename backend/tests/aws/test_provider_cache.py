@@ -0,0 +1,29 @@
+from backend.aws.provider_cache import ProviderMetadataCache
+
+class TestProviderMetadataCache:
+    def test_cached_per_credentials(self):
+        """Answers are reused until the credentials change"""
+        config = {'storage_provider': 'aws', 'aws_access_key': 'one'}
+        cache = ProviderMetadataCache(lambda: config)
+        calls = []
+
+        def load():
+            calls.append(1)
+            return ['bucket']
+
+        assert cache.get_or_load('buckets', 'aws', load) == ['bucket']
+        cache.get_or_load('buckets', 'aws', load)
+        assert len(calls) == 1
+
+        config['aws_access_key'] = 'two'
+        cache.get_or_load('buckets', 'aws', load)
+        assert len(calls) == 2
+        assert cache.stats()['hits'] == 1
+
+    def test_failures_expire_sooner(self):
+        """Falsy results are kept only for failure_ttl"""
+        cache = ProviderMetadataCache(lambda: {}, failure_ttl=0)
+        calls = []
+        for _ in range(2):
+            cache.get_or_load('access', 'bucket', lambda: calls.append(1) or False)
+        assert len(calls) == 2
@@ -0,0 +1,76 @@
+import io
+import time
+import threading
+from unittest.mock import MagicMock
+from backend.aws.range_proxy import ChunkCache
+from backend.managers.disk_cache import DiskLRUCache
+
+class FakeRangeClient:
+    """get_object honouring Range and IfMatch"""
+
+    def __init__(self, data, etag='"v1"'):
+        self.data = data
+        self.etag = etag
+        self.ranges = []
+        self.lock = threading.Lock()
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        assert IfMatch == self.etag
+        start, end = map(int, Range[len('bytes='):].split('-'))
+        with self.lock:
+            self.ranges.append((start, end))
+        time.sleep(0.01)
+        return {'Body': io.BytesIO(self.data[start:end + 1])}
+
+class TestDiskLRUCache:
+    def test_evicts_least_recently_used(self, tmp_path):
+        """The byte cap evicts the oldest blobs and survives a reload"""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=10)
+        cache.put('a', b'aaaa')
+        cache.put('b', b'bbbb')
+        assert cache.get('a') == b'aaaa'
+        cache.put('c', b'cccc')
+        assert cache.get('b') is None
+        assert cache.get('a') == b'aaaa' and cache.get('c') == b'cccc'
+        assert cache.stats()['bytes'] == 8
+
+        reloaded = DiskLRUCache(str(tmp_path), max_bytes=10)
+        assert reloaded.get('c') == b'cccc'
+        assert not cache.put('big', b'x' * 11)
+
+class TestChunkCache:
+    def make_cache(self, tmp_path, data, **kwargs):
+        client = FakeRangeClient(data)
+        cache = ChunkCache(MagicMock(client=client), DiskLRUCache(str(tmp_path), 1 << 20), chunk_size=10, **kwargs)
+        return cache, client
+
+    def test_ranges_are_served_from_aligned_chunks(self, tmp_path):
+        """Unaligned ranges read whole chunks once; repeats come from disk"""
+        data = bytes(range(95))
+        cache, client = self.make_cache(tmp_path, data, read_ahead=0)
+        assert b''.join(cache.iter_range('b', 'k', '"v1"', len(data), 5, 27)) == data[5:27]
+        assert sorted(client.ranges) == [(0, 9), (10, 19), (20, 29)]
+        assert b''.join(cache.iter_range('b', 'k', '"v1"', len(data), 12, 95)) == data[12:]
+        assert len(client.ranges) == 10
+        assert client.ranges[-1] == (90, 94)
+        assert b''.join(cache.iter_range('b', 'k', '"v1"', len(data), 0, 95)) == data
+        assert len(client.ranges) == 10
+
+    def test_read_ahead_and_shared_fetches(self, tmp_path):
+        """Reading a chunk prefetches the next ones, each fetched only once"""
+        data = bytes(range(60))
+        cache, client = self.make_cache(tmp_path, data, read_ahead=2)
+        threads = [
+            threading.Thread(target=lambda: b''.join(cache.iter_range('b', 'k', '"v1"', 60, 0, 10)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        deadline = time.monotonic() + 2
+        while not all(cache.has_chunk('b', 'k', '"v1"', i) for i in (1, 2)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.has_chunk('b', 'k', '"v1"', 1) and cache.has_chunk('b', 'k', '"v1"', 2)
+        assert sorted(client.ranges) == [(0, 9), (10, 19), (20, 29)]
+        cache.shutdown()
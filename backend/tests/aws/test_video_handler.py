@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock
+from backend.aws.video_handler import VideoHandler
+from backend.managers.memory_cache import TTLCache
+
+class TestPresignCache:
+    def test_same_url_until_near_expiry(self):
+        """Repeat requests get the same URL; content type is part of the key"""
+        client = MagicMock()
+        client.generate_presigned_url.side_effect = lambda b, k, e, ct: f"https://{b}/{k}?ct={ct}&n={client.generate_presigned_url.call_count}"
+        handler = VideoHandler(client, TTLCache())
+
+        first = handler.generate_streaming_url('bucket', 'a.mp4')
+        assert handler.generate_streaming_url('bucket', 'a.mp4') == first
+        assert client.generate_presigned_url.call_count == 1
+        assert 'video/mp4' in first
+
+        other = handler.presign('bucket', 'a.mp4', 3600)
+        assert other != first
+        assert client.generate_presigned_url.call_count == 2
+
+    def test_reuse_stops_halfway_through_the_lifetime(self, monkeypatch):
+        """A URL is reused only while half its lifetime remains, and expirations don't share URLs"""
+        now = [1000.0]
+        monkeypatch.setattr('backend.managers.memory_cache.time.monotonic', lambda: now[0])
+        client = MagicMock()
+        client.generate_presigned_url.side_effect = lambda b, k, e, ct: f"https://{b}/{k}?e={e}&n={client.generate_presigned_url.call_count}"
+        handler = VideoHandler(client, TTLCache())
+
+        first = handler.presign('bucket', 'a.mp4', 600)
+        assert handler.presign('bucket', 'a.mp4', 60) != first
+        now[0] += 299
+        assert handler.presign('bucket', 'a.mp4', 600) == first
+        now[0] += 2
+        assert handler.presign('bucket', 'a.mp4', 600) != first
+        assert client.generate_presigned_url.call_count == 3
@@ -0,0 +1,63 @@
+import io
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from backend.managers.hls_manager import HLSManager
+
+MASTER = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-STREAM-INF:BANDWIDTH=900000,NAME="720p"
+720p/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=400000,NAME="360p"
+360p/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:6.000,
+segment_00000.m4s
+#EXTINF:2.500,
+segment_00001.m4s
+#EXT-X-ENDLIST
+"""
+
+def make_manager(playlists, config=None):
+    s3 = MagicMock()
+    s3.get_object.side_effect = lambda Bucket, Key: {'Body': io.BytesIO(playlists[Key].encode())}
+    video = MagicMock()
+    video.presign.side_effect = lambda bucket, key, expiration: f"https://{bucket}/{key}?e={expiration}"
+    aws_integration = SimpleNamespace(config=config or {}, bucket_name='bucket', s3=s3, video=video)
+    return HLSManager(aws_integration)
+
+class TestHLSManager:
+    def test_master_playlist_points_at_rendition_urls(self):
+        """Variant lines are replaced by the caller's URLs and tags are kept"""
+        manager = make_manager({'a/clip.mp4.hls/master.m3u8': MASTER})
+        lines = manager.get_master_playlist('a/clip.mp4', lambda name: f"/hls/{name}").splitlines()
+        assert lines[3] == '/hls/720p' and lines[5] == '/hls/360p'
+        assert lines[2] == '#EXT-X-STREAM-INF:BANDWIDTH=900000,NAME="720p"'
+
+    def test_media_playlist_presigns_segments_and_init(self):
+        """Segment lines and the EXT-X-MAP URI become presigned URLs"""
+        manager = make_manager({'a/clip.mp4.hls/720p/index.m3u8': MEDIA})
+        lines = manager.get_media_playlist('a/clip.mp4', '720p', expiration=600).splitlines()
+        base = 'https://bucket/a/clip.mp4.hls/720p/'
+        assert lines[2] == f'#EXT-X-MAP:URI="{base}init.mp4?e=600"'
+        assert lines[4] == f"{base}segment_00000.m4s?e=600"
+        assert lines[6] == f"{base}segment_00001.m4s?e=600"
+        assert lines[-1] == '#EXT-X-ENDLIST'
+
+    def test_packaging_without_ffmpeg_is_skipped(self, tmp_path, monkeypatch):
+        """Without ffmpeg nothing is segmented or uploaded"""
+        monkeypatch.setattr('backend.managers.hls_manager.shutil.which', lambda name: None)
+        manager = make_manager({})
+        assert not manager.is_available()
+        assert manager.package(str(tmp_path / 'clip.mp4'), 'clip.mp4') is False
+        manager.aws_integration.s3.upload_file.assert_not_called()
+
+    def test_background_packaging_keeps_the_bucket(self, tmp_path):
+        """Renditions go to the bucket the video was synced to, not the configured one"""
+        manager = make_manager({})
+        manager.package = MagicMock()
+        manager.package_in_background(str(tmp_path / 'clip.mp4'), 'clip.mp4', 'other-bucket').join(5)
+        manager.package.assert_called_once_with(str(tmp_path / 'clip.mp4'), 'clip.mp4', 'other-bucket')
@@ -0,0 +1,80 @@
+import io
+import cv2
+import numpy as np
+import pytest
+from backend.managers.keyframe_extractor import KeyframeError, extract_keyframes, iter_frames
+from backend.sync.faststart import find_moov_layout
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class RangeSession:
+    """requests.Session stand-in serving Range requests from bytes"""
+
+    def __init__(self, data, honour_range=True):
+        self.data = data
+        self.honour_range = honour_range
+        self.bytes_sent = 0
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        if not self.honour_range:
+            return FakeResponse(200, self.data)
+        start, end = map(int, headers['Range'][len('bytes='):].split('-'))
+        end = min(end, len(self.data) - 1)
+        body = self.data[start:end + 1]
+        self.bytes_sent += len(body)
+        return FakeResponse(206, body, {'Content-Range': f"bytes {start}-{end}/{len(self.data)}"})
+
+def write_video(path, frames=250):
+    """Noisy frames whose top-left patch encodes the frame number"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 25, (320, 240))
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        frame = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+        frame[:64, :64] = (i, i, i)
+        writer.write(frame)
+    writer.release()
+    return path.read_bytes()
+
+@pytest.mark.parametrize('suffix', ['.mp4', '.mkv'])
+class TestExtractFrames:
+    def test_keyframe_is_fetched_with_small_ranges(self, tmp_path, suffix):
+        """One keyframe near 10% decodes from a small fraction of the file"""
+        data = write_video(tmp_path / f"clip{suffix}")
+        if suffix == '.mp4':
+            with io.BytesIO(data) as f:
+                moov, first_mdat = find_moov_layout(f, len(data))
+            assert moov[1] > first_mdat  # index at the end, which a head download misses
+        session = RangeSession(data)
+
+        frames = list(iter_frames('http://storage/clip', suffix, session=session))
+        assert len(frames) == 1 and frames[0].shape == (240, 320, 3)
+        # A keyframe at or before frame 25, not the very first frame
+        assert 0 < frames[0][8:56, 8:56, 0].mean() <= 27
+        assert session.bytes_sent < len(data) // 20
+
+    def test_consecutive_frames_for_previews(self, tmp_path, suffix):
+        data = write_video(tmp_path / f"clip{suffix}")
+        frames = list(iter_frames('http://storage/clip', suffix, count=5, session=RangeSession(data)))
+        assert len(frames) == 5
+
+    def test_several_positions_share_one_index(self, tmp_path, suffix):
+        """Scrub strips seek to keyframes across the video"""
+        data = write_video(tmp_path / f"clip{suffix}")
+        frames = extract_keyframes('http://storage/clip', suffix, [0.25, 0.75], session=RangeSession(data))
+        early, late = (frame[8:56, 8:56, 0].mean() for frame in frames)
+        assert 0 < early < late
+
+    def test_servers_without_range_support_are_refused(self, tmp_path, suffix):
+        data = write_video(tmp_path / f"clip{suffix}", frames=10)
+        with pytest.raises(KeyframeError):
+            list(iter_frames('http://storage/clip', suffix, session=RangeSession(data, honour_range=False)))
@@ -0,0 +1,62 @@
+import struct
+import threading
+from unittest.mock import MagicMock
+from backend.aws.range_proxy import ChunkCache
+from backend.managers.disk_cache import DiskLRUCache
+from backend.managers.prefetch_manager import PrefetchManager, TokenBucket
+from backend.sync.upload_activity import UploadActivity
+from backend.tests.aws.test_range_proxy import FakeRangeClient
+
+def box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+def make_manager(tmp_path, data, **config):
+    client = FakeRangeClient(data)
+    aws = MagicMock()
+    aws.config = dict({'prefetch_head_bytes': 20, 'prefetch_bytes_per_second': 1 << 20}, **config)
+    aws.is_video_file.return_value = True
+    aws.get_file_info.return_value = {'etag': '"v1"', 'size': len(data)}
+    aws.chunk_cache = ChunkCache(MagicMock(client=client), DiskLRUCache(str(tmp_path), 1 << 20),
+                                 chunk_size=10, read_ahead=0)
+    return PrefetchManager(aws), client
+
+class TestPrefetchManager:
+    def test_fetches_head_and_trailing_moov(self, tmp_path):
+        """The head chunks and the chunks holding a trailing moov are cached, nothing else"""
+        data = box(b'ftyp', b'isom') + box(b'mdat', b'\0' * 60) + box(b'moov', b'm' * 12)
+        manager, client = make_manager(tmp_path, data)
+        manager._prefetch('b', 'clip.mp4')
+
+        chunks = sorted({start // 10 for start, _ in client.ranges})
+        moov_start = len(data) - 20
+        assert chunks == [0, 1] + list(range(moov_start // 10, (len(data) - 1) // 10 + 1))
+        assert manager.aws_integration.chunk_cache.has_chunk('b', 'clip.mp4', '"v1"', 0)
+
+    def test_new_page_replaces_queue(self, tmp_path):
+        """Queuing a page drops keys queued for the previous one"""
+        manager, _ = make_manager(tmp_path, b'')
+        manager._ensure_worker = lambda: None
+        manager.enqueue('b', ['a.mp4', 'b.mp4'])
+        manager.enqueue('b', ['c.mp4'])
+        assert manager.pending() == 1
+        assert manager._next() == ('b', 'c.mp4')
+
+class TestTokenBucket:
+    def test_large_requests_go_into_debt(self):
+        """A request above capacity proceeds once full and later ones wait it off"""
+        bucket = TokenBucket(rate=1000, capacity=10)
+        assert bucket.consume(50)
+        assert bucket.tokens == -40
+        stop = threading.Event()
+        stop.set()
+        assert not bucket.consume(1, stop)
+
+class TestUploadActivity:
+    def test_wait_idle(self):
+        """wait_idle times out while an upload is tracked and returns once it ends"""
+        activity = UploadActivity()
+        with activity.track():
+            assert activity.is_active()
+            assert not activity.wait_idle(timeout=0.05)
+        assert not activity.is_active()
+        assert activity.wait_idle(quiet_seconds=0.01, timeout=1)
@@ -0,0 +1,66 @@
+import pytest
+from backend.managers.prefix_stats import PrefixStatsTree, ancestor_prefixes
+
+class TestPrefixStatsTree:
+    @pytest.fixture
+    def tree(self, tmp_path):
+        tree = PrefixStatsTree(str(tmp_path / 'stats.db'))
+        yield tree
+        tree.close()
+
+    def test_ancestor_prefixes(self):
+        """Keys roll up into every folder above them, including the root"""
+        assert ancestor_prefixes('a/b/c.mp4') == ['', 'a/', 'a/b/']
+        assert ancestor_prefixes('c.mp4') == ['']
+
+    def test_rebuild_and_incremental_updates(self, tree):
+        """Incremental writes and deletes match a rebuilt tree"""
+        tree.rebuild('bucket', [
+            ('a/one.mp4', 10, '2024-01-01T00:00:00+00:00'),
+            ('a/b/two.mp4', 20, '2024-01-02T00:00:00+00:00'),
+            ('root.mp4', 5, '2024-01-03T00:00:00+00:00')
+        ])
+        assert tree.is_built('bucket')
+        stats = tree.get_stats('bucket', ['', 'a/', 'a/b/', 'missing/'])
+        assert stats['']['TotalSize'] == 35 and stats['']['FileCount'] == 3
+        assert stats['a/'] == {'TotalSize': 30, 'FileCount': 2, 'LastModified': '2024-01-02T00:00:00+00:00'}
+        assert 'missing/' not in stats
+
+        tree.record_object('bucket', 'a/b/two.mp4', 25, '2024-02-01T00:00:00+00:00')
+        tree.record_object('bucket', 'a/b/three.mp4', 1, '2024-02-02T00:00:00+00:00')
+        stats = tree.get_stats('bucket', ['a/', 'a/b/'])
+        assert stats['a/b/']['TotalSize'] == 26 and stats['a/b/']['FileCount'] == 2
+        assert stats['a/']['LastModified'] == '2024-02-02T00:00:00+00:00'
+
+        tree.remove_object('bucket', 'a/b/two.mp4')
+        tree.remove_object('bucket', 'a/b/three.mp4')
+        tree.remove_object('bucket', 'a/b/never-existed.mp4')
+        stats = tree.get_stats('bucket', ['', 'a/', 'a/b/'])
+        assert 'a/b/' not in stats
+        assert stats['a/']['TotalSize'] == 10 and stats['']['FileCount'] == 2
+
+    def test_writes_during_a_rebuild_are_kept(self, tree):
+        """Uploads and deletes that land while the listing streams in survive the swap"""
+        tree.rebuild('bucket', [('a/old.mp4', 3, None)])
+        tree.start_rebuild('bucket')
+        tree.stage('bucket', [('a/one.mp4', 10, None), ('a/gone.mp4', 4, None)])
+        tree.record_object('bucket', 'a/new.mp4', 6)
+        tree.remove_object('bucket', 'a/gone.mp4')
+        tree.stage('bucket', [('b/two.mp4', 20, None)])
+        # The old tree keeps serving until the swap
+        assert tree.get_stats('bucket', ['a/'])['a/']['FileCount'] == 2
+        tree.finish_rebuild('bucket')
+        stats = tree.get_stats('bucket', ['', 'a/', 'b/'])
+        assert stats['a/']['TotalSize'] == 16 and stats['a/']['FileCount'] == 2
+        assert stats['']['TotalSize'] == 36 and stats['']['FileCount'] == 3
+
+    def test_persists_across_instances(self, tmp_path):
+        """The tree is reloaded from disk"""
+        path = str(tmp_path / 'stats.db')
+        tree = PrefixStatsTree(path)
+        tree.rebuild('bucket', [('a/x.mp4', 7, None)])
+        tree.close()
+        reopened = PrefixStatsTree(path)
+        assert reopened.is_built('bucket')
+        assert reopened.get_stats('bucket', ['a/'])['a/']['FileCount'] == 1
+        reopened.close()
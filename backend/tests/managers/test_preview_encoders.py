@@ -0,0 +1,37 @@
+import numpy as np
+from PIL import Image, ImageSequence
+from backend.managers.preview_encoders import GIFEncoder, WebPEncoder, get_encoder, resolve_format
+from backend.managers.keyframe_extractor import iter_frames
+from backend.tests.managers.test_keyframe_extractor import RangeSession, write_video
+
+class TestPreviewEncoders:
+    def test_webp_frames_are_rgb(self, tmp_path):
+        """BGR frames from OpenCV come out with the right colours"""
+        path = str(tmp_path / 'preview.webp')
+        encoder = WebPEncoder(path, fps=8, size=(32, 18))
+        red_bgr = np.zeros((18, 32, 3), np.uint8)
+        red_bgr[:, :, 2] = 255
+        for i in range(3):
+            frame = red_bgr.copy()
+            frame[:4, :4] = 80 * i  # frames must differ or Pillow merges them
+            encoder.add(frame)
+        assert encoder.close()
+
+        with Image.open(path) as image:
+            frames = [frame.convert('RGB') for frame in ImageSequence.Iterator(image)]
+        assert len(frames) == 3
+        r, g, b = frames[0].getpixel((16, 9))
+        assert r > 200 and g < 60 and b < 60
+
+    def test_unknown_formats_fall_back(self):
+        assert resolve_format('webp') == 'webp'
+        assert get_encoder('nope') in (WebPEncoder, GIFEncoder)
+
+class TestFrameSampling:
+    def test_frames_are_spaced_to_the_preview_rate(self, tmp_path):
+        """At 5 fps from a 25 fps source, every fifth frame is kept"""
+        data = write_video(tmp_path / 'clip.mp4')
+        frames = list(iter_frames('http://storage/clip', '.mp4', count=4, sample_fps=5, session=RangeSession(data)))
+        numbers = [frame[8:56, 8:56, 0].mean() for frame in frames]
+        assert len(numbers) == 4
+        assert all(4 <= b - a <= 6 for a, b in zip(numbers, numbers[1:]))
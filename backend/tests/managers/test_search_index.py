@@ -0,0 +1,66 @@
+import pytest
+from backend.managers.search_index import SearchIndex
+
+class TestSearchIndex:
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = SearchIndex(str(tmp_path / 'search.db'))
+        index.rebuild('clips', [
+            ('2024/jan/Interview_Smith.mp4', 100, '2024-01-05T10:00:00+00:00'),
+            ('2024/feb/broll_city.mov', 500, '2024-02-10T10:00:00+00:00'),
+            ('2024/feb/notes.txt', 1, '2024-02-11T10:00:00+00:00')
+        ])
+        index.rebuild('archive', [('old/interview_jones.mp4', 50, '2019-06-01T00:00:00+00:00')])
+        yield index
+        index.close()
+
+    def keys(self, results):
+        return [r['Key'] for r in results]
+
+    def test_substring_search_across_buckets(self, index):
+        """Partial, case-insensitive names match in every bucket"""
+        assert set(self.keys(index.search('interview'))) == {
+            '2024/jan/Interview_Smith.mp4', 'old/interview_jones.mp4'
+        }
+        assert self.keys(index.search('interview', buckets=['archive'])) == ['old/interview_jones.mp4']
+        # Shorter than a trigram still works through the fallback scan
+        assert self.keys(index.search('ci', buckets=['clips'])) == ['2024/feb/broll_city.mov']
+
+    def test_filters(self, index):
+        """Prefix, extension, size and date ranges narrow results"""
+        assert self.keys(index.search(buckets=['clips'], prefix='2024/feb/')) == [
+            '2024/feb/notes.txt', '2024/feb/broll_city.mov'
+        ]
+        assert self.keys(index.search(ext=['mp4', '.MOV'], buckets=['clips'])) == [
+            '2024/feb/broll_city.mov', '2024/jan/Interview_Smith.mp4'
+        ]
+        assert self.keys(index.search(min_size=50, max_size=200)) == [
+            '2024/jan/Interview_Smith.mp4', 'old/interview_jones.mp4'
+        ]
+        assert self.keys(index.search(date_from='2024-02-01', date_to='2024-02-10T23:59:59')) == [
+            '2024/feb/broll_city.mov'
+        ]
+
+    def test_metadata_survives_rebuild(self, index):
+        """OriginalName recorded on upload is searchable and kept by later rebuilds"""
+        index.record_object('clips', '2024/feb/broll_city.mov', 500, metadata={'OriginalName': 'Drone Skyline.mov'})
+        index.rebuild('clips', [('2024/feb/broll_city.mov', 500, '2024-02-10T10:00:00+00:00')])
+        results = index.search('skyline')
+        assert self.keys(results) == ['2024/feb/broll_city.mov']
+        assert results[0]['OriginalName'] == 'Drone Skyline.mov'
+        assert index.search('notes') == []
+        index.remove_object('clips', '2024/feb/broll_city.mov')
+        assert index.search('skyline') == []
+
+    def test_writes_during_a_rebuild_are_kept(self, index):
+        """An upload and a delete made while the listing streams in survive the sweep"""
+        index.start_rebuild('clips')
+        index.stage('clips', [('2024/jan/Interview_Smith.mp4', 100, '2024-01-05T10:00:00+00:00')])
+        index.record_object('clips', '2024/mar/new_upload.mp4', 7, metadata={'OriginalName': 'Fresh Take.mp4'})
+        index.remove_object('clips', '2024/feb/broll_city.mov')
+        index.stage('clips', [('2024/feb/broll_city.mov', 500, '2024-02-10T10:00:00+00:00')])
+        index.finish_rebuild('clips')
+        assert set(self.keys(index.search(buckets=['clips']))) == {
+            '2024/jan/Interview_Smith.mp4', '2024/mar/new_upload.mp4'
+        }
+        assert self.keys(index.search('fresh take')) == ['2024/mar/new_upload.mp4']
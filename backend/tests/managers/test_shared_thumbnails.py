@@ -0,0 +1,74 @@
+import io
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from backend.managers.shared_thumbnails import SHARED_PREFIX, SharedThumbnails
+from backend.managers.single_flight import SingleFlight
+from backend.managers.thumbnail_store import ThumbnailStore
+from backend.tests.aws.test_listing_handler import FakeS3
+
+class BucketS3(FakeS3):
+    """FakeS3 that also stores uploads and serves downloads"""
+
+    def __init__(self):
+        super().__init__([])
+        self.bodies = {}
+
+    def upload_file(self, path, bucket, key, ExtraArgs=None):
+        with open(path, 'rb') as f:
+            self.bodies[key] = f.read()
+        self.objects = sorted(self.objects + [{
+            'Key': key, 'Size': len(self.bodies[key]), 'ETag': '"t"',
+            'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc)
+        }], key=lambda o: o['Key'])
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.bodies[Key])}
+
+def make_install(tmp_path, s3, name, **kwargs):
+    manager = MagicMock()
+    manager.preview_format = 'webp'
+    manager.render_params.return_value = {'width': 400}
+    manager.store = ThumbnailStore(str(tmp_path / name))
+    manager.aws_integration = SimpleNamespace(s3_client=SimpleNamespace(client=s3), flights=SingleFlight())
+    return SharedThumbnails(manager, **kwargs)
+
+class TestSharedThumbnails:
+    def test_one_install_renders_and_the_others_download(self, tmp_path):
+        s3 = BucketS3()
+        first, second = make_install(tmp_path, s3, 'first'), make_install(tmp_path, s3, 'second')
+        assert not second.fetch('bucket', '"abc"', 'id2')
+
+        first.thumbnail_manager.store.put('id1', 'static', b'jpg')
+        first.thumbnail_manager.store.put('id1', 'animated', b'webp')
+        first.publish('bucket', '"abc"', 'id1')
+        assert sorted(k[len(SHARED_PREFIX):].split('/')[1] for k in s3.bodies) == ['abc.jpg', 'abc.webp']
+
+        # The second install's cached listing predates the upload
+        assert not second.fetch('bucket', '"abc"', 'id2')
+        second.cache.clear()
+        calls = s3.calls
+        assert second.fetch('bucket', '"abc"', 'id2', animated=True)
+        assert second.fetch('bucket', '"abc"', 'id2')
+        assert s3.calls == calls + 1  # one listing for every lookup
+        assert second.thumbnail_manager.store.get('id2', 'animated') == b'webp'
+
+    def test_missing_etags_are_looked_up_without_relisting(self, tmp_path):
+        """Once the index is stale, an ETag it lacks costs one scoped listing, not a full one"""
+        s3 = BucketS3()
+        first, second = make_install(tmp_path, s3, 'first'), make_install(tmp_path, s3, 'second', ttl=0)
+        assert not second.fetch('bucket', '"abc"', 'id2')
+        first.thumbnail_manager.store.put('id1', 'static', b'jpg')
+        first.publish('bucket', '"abc"', 'id1')
+
+        calls = s3.calls
+        assert second.fetch('bucket', '"abc"', 'id2')
+        assert second.fetch('bucket', '"abc"', 'id3')
+        assert s3.calls == calls + 1
+        assert second.available('bucket')['abc'] == {'static'}
+
+    def test_settings_change_the_prefix(self, tmp_path):
+        install = make_install(tmp_path, BucketS3(), 'install')
+        before = install.object_key('"abc"', 'static')
+        install.thumbnail_manager.render_params.return_value = {'width': 200}
+        assert install.object_key('"abc"', 'static') != before
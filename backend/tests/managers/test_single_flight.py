@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from backend.managers.single_flight import PathLocks, SingleFlight
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_run(self):
+        """Callers arriving while the work runs get the leader's result"""
+        flights = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def work():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(flights.do, 'key', work)
+            started.wait()
+            followers = [executor.submit(flights.do, 'key', work) for _ in range(4)]
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert results == ['result'] * 5
+        assert len(calls) == 1
+        assert flights.in_flight() == 0
+        # Nothing is cached once the call is done
+        flights.do('key', work)
+        assert len(calls) == 2
+
+    def test_errors_are_shared(self):
+        """A failing leader raises in every waiting caller"""
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def work():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError('boom')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flights.do, 'key', work)
+            started.wait()
+            follower = executor.submit(flights.do, 'key', work)
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+class TestPathLocks:
+    def test_writers_to_one_path_take_turns(self, tmp_path):
+        """Holders of the same path run one at a time; other paths are not blocked"""
+        locks = PathLocks()
+        active, overlaps = [], []
+
+        def write(path):
+            with locks.hold(path):
+                active.append(path)
+                overlaps.append(active.count(path))
+                time.sleep(0.05)
+                active.remove(path)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, [str(tmp_path / 'a.jpg')] * 3 + [str(tmp_path / 'b.jpg')]))
+        assert max(overlaps) == 1
+        assert not locks._locks
@@ -0,0 +1,89 @@
+from unittest.mock import MagicMock
+import cv2
+import numpy as np
+import pytest
+from backend.managers import sprite_sheets
+from backend.managers.single_flight import SingleFlight
+from backend.managers.sprite_sheets import SCRUB_WIDTH, TILE_HEIGHT, TILE_WIDTH, SpriteSheets
+from backend.managers.thumbnail_service import PRIORITY_VISIBLE
+from backend.managers.thumbnail_store import ThumbnailStore
+
+@pytest.fixture
+def sprites(tmp_path, monkeypatch):
+    monkeypatch.setattr(sprite_sheets, 'SHEET_TILES', 4)
+    monkeypatch.setattr(sprite_sheets, 'SHEET_COLUMNS', 2)
+    manager = MagicMock()
+    manager.aws_integration.flights = SingleFlight()
+    manager.aws_integration.get_files_info.side_effect = lambda bucket, keys: {k: {'etag': '"e"'} for k in keys}
+    manager.thumbnail_id.side_effect = lambda bucket, key, etag=None: key
+    manager.store = ThumbnailStore(str(tmp_path / 'store'))
+    return SpriteSheets(manager, str(tmp_path / 'sprites'))
+
+def write_tile(sprites, key, shade):
+    image = np.full((TILE_HEIGHT, TILE_WIDTH, 3), shade, np.uint8)
+    sprites.store.put(key, 'static', cv2.imencode('.jpg', image)[1].tobytes())
+
+class TestSpriteSheets:
+    def test_tiles_are_packed_and_missing_ones_queued(self, tmp_path, sprites):
+        """Each key gets a slot in page order; keys without a thumbnail are pending"""
+        keys = [f"v{i}.mp4" for i in range(5)]
+        for i, key in enumerate(keys[:4]):
+            write_tile(sprites, key, 40 * (i + 1))
+
+        index = sprites.build('b', keys)
+        assert [(s['width'], s['height']) for s in index['sheets']] == [(800, 450), (400, 225)]
+        assert index['tiles']['v3.mp4'] == {'sheet': 0, 'x': TILE_WIDTH, 'y': TILE_HEIGHT}
+        assert index['pending'] == ['v4.mp4']
+        sprites.thumbnail_manager.service.submit.assert_called_once_with('b', 'v4.mp4', PRIORITY_VISIBLE, etag='"e"')
+
+        sheet = cv2.imread(sprites.sheet_path(index['sheets'][0]['name']))
+        assert abs(sheet[TILE_HEIGHT + 100, TILE_WIDTH + 100].mean() - 160) < 5
+
+    def test_rebuild_repaints_only_changed_sheets(self, tmp_path, sprites):
+        """Unchanged sheets are reused and changed ones are painted from the thumbnails"""
+        keys = [f"v{i}.mp4" for i in range(6)]
+        for key in keys[:5]:
+            write_tile(sprites, key, 100)
+        first = [s['name'] for s in sprites.build('b', keys)['sheets']]
+        assert [s['name'] for s in sprites.build('b', keys)['sheets']] == first
+
+        # Sheets are repainted from the stored thumbnails, not from the previous sheet
+        with open(sprites.sheet_path(first[1]), 'wb') as f:
+            f.write(cv2.imencode('.jpg', np.zeros((TILE_HEIGHT, 2 * TILE_WIDTH, 3), np.uint8))[1].tobytes())
+
+        # The pending thumbnail lands: only the second sheet changes
+        write_tile(sprites, 'v5.mp4', 200)
+        index = sprites.build('b', keys)
+        assert index['sheets'][0]['name'] == first[0]
+        assert index['sheets'][1]['name'] != first[1]
+        assert index['pending'] == []
+        sheet = cv2.imread(sprites.sheet_path(index['sheets'][1]['name']))
+        assert abs(sheet[100, TILE_WIDTH + 100].mean() - 200) < 5
+        assert abs(sheet[100, 100].mean() - 100) < 5
+
+    def test_scrub_strip_uses_the_sprite_format(self, tmp_path, sprites):
+        index = sprites.scrub('b', 'clip.mp4')
+        assert index['pending'] == ['clip.mp4'] and index['frames'] == []
+        sprites.thumbnail_manager.service.submit.assert_called_once_with(
+            'b', 'clip.mp4', PRIORITY_VISIBLE, animated=True
+        )
+
+        strip = cv2.imencode('.jpg', np.zeros((90, SCRUB_WIDTH * 3, 3), np.uint8))[1].tobytes()
+        sprites.store.put('clip.mp4', 'scrub', strip)
+        index = sprites.scrub('b', 'clip.mp4')
+        assert index['frames'] == [{'sheet': 0, 'x': x * SCRUB_WIDTH, 'y': 0} for x in range(3)]
+        assert sprites.sheet_path(index['sheets'][0]['name'])
+
+    def test_old_pages_age_out(self, tmp_path, sprites):
+        """Sheets and manifests of pages nobody asks for are evicted past the byte cap"""
+        keys = [f"v{i}.mp4" for i in range(12)]
+        for i, key in enumerate(keys):
+            write_tile(sprites, key, 20 * i)
+        first = sprites.build('b', keys[:4])['sheets'][0]['name']
+        sprites.cache.max_bytes = sprites.cache.total_bytes * 2
+        for start in (4, 8):
+            sprites.build('b', keys[start:start + 4])
+        assert sprites.sheet_path(first) is None
+        assert sprites.cache.total_bytes <= sprites.cache.max_bytes
+        # An evicted page is simply painted again
+        assert sprites.sheet_path(sprites.build('b', keys[:4])['sheets'][0]['name'])
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from backend.managers.single_flight import SingleFlight
+from backend.managers.thumbnail_manager import ThumbnailManager
+from backend.tests.managers.test_keyframe_extractor import write_video
+
+class TestLocalThumbnails:
+    def test_upload_adopts_thumbnails_rendered_from_the_local_copy(self, tmp_path):
+        """A render started before the upload is stored and published under the returned ETag"""
+        write_video(tmp_path / 'clip.mp4', frames=100)
+        aws_integration = SimpleNamespace(
+            config={'thumbnail_workers': 1}, data_dir=str(tmp_path / 'data'), flights=SingleFlight(),
+            get_file_info=MagicMock(side_effect=AssertionError('no HEAD needed'))
+        )
+        manager = ThumbnailManager(aws_integration)
+        manager.service._executor = ThreadPoolExecutor(max_workers=1)
+        manager.service.publish = MagicMock()
+
+        render = manager.render_local(str(tmp_path / 'clip.mp4'))
+        render[1].result(60)
+        manager.adopt_local(render, 'bucket', 'videos/clip.mp4', '"abc"')
+
+        thumb_id = manager.thumbnail_id('bucket', 'videos/clip.mp4', '"abc"')
+        static_path, animated_path = manager.stored_thumbnails(thumb_id, animated=True)
+        assert static_path and animated_path and manager.store.contains(thumb_id, 'scrub')
+        manager.service.publish.assert_called_once_with('bucket', 'videos/clip.mp4', thumb_id, '"abc"')
+        assert list((tmp_path / 'data' / 'thumbnail_staging').iterdir()) == []
+
+    def test_failed_upload_discards_the_render(self, tmp_path):
+        write_video(tmp_path / 'clip.mp4', frames=10)
+        aws_integration = SimpleNamespace(config={}, data_dir=str(tmp_path / 'data'), flights=SingleFlight())
+        manager = ThumbnailManager(aws_integration)
+        manager.service._executor = ThreadPoolExecutor(max_workers=1)
+
+        render = manager.render_local(str(tmp_path / 'clip.mp4'))
+        render[1].result(60)
+        manager.discard_local(render)
+        assert list((tmp_path / 'data' / 'thumbnail_staging').iterdir()) == []
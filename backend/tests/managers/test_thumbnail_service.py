@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+import pytest
+import backend
+from backend.managers.thumbnail_service import (
+    PRIORITY_BACKFILL, PRIORITY_VISIBLE, QueueFull, ThumbnailService
+)
+
+class GatedRender:
+    """Render stand-in that records calls and blocks until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, url, suffix, static_path, animated_path, **options):
+        self.calls.append(url)
+        self.started.set()
+        self.release.wait(5)
+        return static_path, animated_path
+
+def echo_render(url, suffix, static_path, animated_path, **options):
+    return static_path, animated_path
+
+class BrokenPool:
+    """Executor whose worker has died"""
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+def make_service(tmp_path, workers=1, max_queue=100):
+    manager = MagicMock()
+    # Keys stand in for thumbnail ids, and the staging paths for the store
+    manager.thumbnail_id.side_effect = lambda bucket, key, etag=None: key
+    manager.get_thumbnail_paths.side_effect = lambda thumb_id: {
+        'static': str(tmp_path / f"{thumb_id}.jpg"), 'animated': str(tmp_path / f"{thumb_id}.gif")
+    }
+    manager.stored_thumbnails.side_effect = lambda thumb_id, animated=False: (
+        (str(tmp_path / f"{thumb_id}.jpg"), None) if (tmp_path / f"{thumb_id}.jpg").exists() else None
+    )
+    manager.store_rendered.side_effect = lambda thumb_id, result: result
+    manager.fetch_shared.return_value = False
+    manager.aws_integration.video.presign.side_effect = lambda bucket, key: key
+    manager.render_options.return_value = {}
+    render = GatedRender()
+    service = ThumbnailService(manager, render, workers=workers, max_queue=max_queue,
+                               executor=ThreadPoolExecutor(max_workers=workers))
+    return service, render
+
+class TestThumbnailService:
+    def test_visible_tiles_jump_the_backfill_and_duplicates_share_a_job(self, tmp_path):
+        """Queued keys are deduplicated and visible ones render before backfill ones"""
+        service, render = make_service(tmp_path)
+        first = service.submit('b', 'busy.mp4')
+        assert render.started.wait(5)
+        old = service.submit('b', 'old.mp4', PRIORITY_BACKFILL)
+        service.submit('b', 'later.mp4', PRIORITY_BACKFILL)
+        tile = service.submit('b', 'tile.mp4', PRIORITY_VISIBLE)
+        # Asking again for a backfill key bumps it instead of queueing twice
+        bumped = service.submit('b', 'later.mp4', PRIORITY_VISIBLE)
+        assert service.submit('b', 'tile.mp4') is tile
+        assert service.status()['queued'] == 3
+
+        render.release.set()
+        assert first.result(5)[0].endswith('busy.mp4.jpg')
+        bumped.result(5)
+        old.result(5)
+        assert render.calls == ['busy.mp4', 'tile.mp4', 'later.mp4', 'old.mp4']
+        assert service.status()['completed'] == 4
+
+    def test_preview_requested_during_a_static_render_follows_it(self, tmp_path):
+        """An animated request joining a static-only render gets its own render afterwards"""
+        service, render = make_service(tmp_path)
+        static = service.submit('b', 'clip.mp4')
+        assert render.started.wait(5)
+        animated = service.submit('b', 'clip.mp4', animated=True)
+        assert animated is not static
+        assert service.submit('b', 'clip.mp4', animated=True) is animated
+
+        render.release.set()
+        assert static.result(5)[1] is None
+        assert animated.result(5)[1].endswith('clip.mp4.gif')
+        assert render.calls == ['clip.mp4', 'clip.mp4']
+
+    def test_full_queue_displaces_backfill(self, tmp_path):
+        """A visible key displaces the newest backfill key once the queue is full"""
+        service, render = make_service(tmp_path, max_queue=2)
+        service.submit('b', 'busy.mp4')
+        assert render.started.wait(5)
+        kept = service.submit('b', 'a.mp4', PRIORITY_BACKFILL)
+        dropped = service.submit('b', 'b.mp4', PRIORITY_BACKFILL)
+        service.submit('b', 'tile.mp4')
+        with pytest.raises(QueueFull):
+            dropped.result(1)
+        with pytest.raises(QueueFull):
+            service.submit('b', 'c.mp4', PRIORITY_BACKFILL).result(1)
+        render.release.set()
+        assert kept.result(5)[0].endswith('a.mp4.jpg')
+
+    def test_existing_thumbnails_are_not_rendered(self, tmp_path):
+        """A key whose thumbnail is on disk completes without a render"""
+        service, render = make_service(tmp_path)
+        (tmp_path / 'done.mp4.jpg').write_bytes(b'jpg')
+        assert service.submit('b', 'done.mp4').result(5)[0].endswith('done.mp4.jpg')
+        assert render.calls == []
+
+    def test_published_thumbnails_skip_the_render(self, tmp_path):
+        """A key another install already rendered is copied in, and local renders are published"""
+        service, render = make_service(tmp_path)
+        manager = service.thumbnail_manager
+
+        def fetch(bucket, key, thumb_id, animated, etag):
+            (tmp_path / f"{thumb_id}.jpg").write_bytes(b'jpg')
+            return True
+        manager.fetch_shared.side_effect = fetch
+        assert service.submit('b', 'shared.mp4', etag='"e"').result(5)[0].endswith('shared.mp4.jpg')
+        assert render.calls == []
+
+        manager.fetch_shared.side_effect = None
+        render.release.set()
+        service.submit('b', 'local.mp4', etag='"f"').result(5)
+        service._get_io().submit(lambda: None).result(5)
+        manager.publish_shared.assert_called_once_with('b', 'local.mp4', 'local.mp4', '"f"')
+
+    def test_local_renders_share_the_worker_slots(self, tmp_path):
+        """Upload renders wait behind visible tiles, go before backfills, and are capped"""
+        service, render = make_service(tmp_path, max_queue=1002)
+        service.submit('b', 'busy.mp4')
+        assert render.started.wait(5)
+        old = service.submit('b', 'old.mp4', PRIORITY_BACKFILL)
+        paths = {kind: str(tmp_path / f"upload.{kind}") for kind in ('static', 'animated', 'scrub')}
+        upload = service.render_file('/sync/upload.mp4', paths)
+        service.submit('b', 'tile.mp4', PRIORITY_VISIBLE)
+        assert service.status()['queued'] == 3
+        # The backfill share of the queue is used up
+        with pytest.raises(QueueFull):
+            service.render_file('/sync/other.mp4', paths).result(5)
+
+        render.release.set()
+        assert upload.result(5) == (paths['static'], paths['animated'])
+        old.result(5)
+        assert render.calls == ['busy.mp4', 'tile.mp4', '/sync/upload.mp4', 'old.mp4']
+        # Local renders stay in staging for the uploader to adopt
+        stored = [c.args[0] for c in service.thumbnail_manager.store_rendered.call_args_list]
+        assert stored == ['busy.mp4', 'tile.mp4', 'old.mp4']
+
+    def test_broken_pool_is_replaced(self, tmp_path):
+        """A pool broken by a dead worker is swapped for a fresh spawn pool"""
+        manager = make_service(tmp_path)[0].thumbnail_manager
+        broken = BrokenPool()
+        service = ThumbnailService(manager, echo_render, workers=1, executor=broken)
+        try:
+            assert service.submit('b', 'clip.mp4').result(60)[0].endswith('clip.mp4.jpg')
+            assert service._executor is not broken
+        finally:
+            service._executor.shutdown()
+
+    def test_workers_do_not_import_the_app(self):
+        """The worker module loads without building the AWS integration or the routes"""
+        code = ("import sys, backend.managers.thumbnail_render; "
+                "print('backend.aws.aws_integration' in sys.modules, 'backend.api.routes' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(backend.__file__)))
+        assert output.stdout.split() == ['False', 'False']
@@ -0,0 +1,34 @@
+from backend.managers.thumbnail_store import ThumbnailStore, thumbnail_id
+
+class TestThumbnailStore:
+    def test_ids_separate_keys_versions_and_settings(self):
+        """Keys that used to share a flattened file name get distinct ids"""
+        base = thumbnail_id('b', 'a/b_c.mp4', '"1"', {'width': 400})
+        assert base != thumbnail_id('b', 'a_b/c.mp4', '"1"', {'width': 400})
+        assert base != thumbnail_id('b', 'a/b_c.mp4', '"2"', {'width': 400})
+        assert base != thumbnail_id('b', 'a/b_c.mp4', '"1"', {'width': 200})
+        assert base == thumbnail_id('b', 'a/b_c.mp4', '"1"', {'width': 400})
+
+    def test_disk_tier_is_byte_capped(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path), max_bytes=200, memory_bytes=0)
+        for name in ('one', 'two', 'three'):
+            store.put(name, 'static', name.encode() * 20)
+        assert store.get('one', 'static') is None
+        assert store.get('three', 'static') == b'three' * 20
+        assert store.stats()['bytes'] <= 200
+
+    def test_new_etag_drops_the_old_version(self, tmp_path):
+        store = ThumbnailStore(str(tmp_path))
+        store.track('b', 'clip.mp4', 'old')
+        store.put('old', 'static', b'jpg')
+        staged = tmp_path / 'render.webp'
+        staged.write_bytes(b'webp')
+        store.put_file('old', 'animated', str(staged))
+        assert store.path('old', 'animated') and not staged.exists()
+
+        store.track('b', 'clip.mp4', 'new')
+        assert store.get('old', 'static') is None and store.path('old', 'animated') is None
+
+        store.put('new', 'static', b'jpg')
+        store.invalidate('b', 'clip.mp4')
+        assert not store.contains('new', 'static')
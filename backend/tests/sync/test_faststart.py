@@ -0,0 +1,64 @@
+import struct
+import pytest
+from backend.sync.faststart import faststart, faststart_copy, iter_top_level_boxes, needs_faststart
+
+def box(box_type, payload):
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+def stco(offsets):
+    return box(b'stco', struct.pack('>II', 0, len(offsets)) + struct.pack(f'>{len(offsets)}I', *offsets))
+
+def build_moov(offsets):
+    stbl = box(b'stbl', stco(offsets))
+    trak = box(b'trak', box(b'mdia', box(b'minf', stbl)))
+    return box(b'moov', box(b'mvhd', b'\0' * 100) + trak)
+
+def read_offsets(data):
+    index = data.index(b'stco')
+    count = struct.unpack_from('>I', data, index + 8)[0]
+    return struct.unpack_from(f'>{count}I', data, index + 12)
+
+class TestFaststart:
+    @pytest.fixture
+    def moov_at_end(self, tmp_path):
+        """Fixture writing ftyp, mdat with two chunks, then moov"""
+        ftyp = box(b'ftyp', b'isom\0\0\0\1isom')
+        chunks = [b'chunk-one' * 10, b'chunk-two' * 20]
+        mdat_offset = len(ftyp)
+        offsets = [mdat_offset + 8, mdat_offset + 8 + len(chunks[0])]
+        data = ftyp + box(b'mdat', b''.join(chunks)) + build_moov(offsets)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+        return path, chunks
+
+    def test_moves_moov_and_patches_offsets(self, moov_at_end, tmp_path):
+        """Test moov is moved before mdat and chunk offsets still hit the media"""
+        path, chunks = moov_at_end
+        out = tmp_path / 'fast.mp4'
+
+        assert needs_faststart(str(path))
+        assert faststart(str(path), str(out))
+
+        data = out.read_bytes()
+        with open(out, 'rb') as f:
+            assert [b[0] for b in iter_top_level_boxes(f, len(data))] == [b'ftyp', b'moov', b'mdat']
+        assert len(data) == path.stat().st_size
+        for offset, chunk in zip(read_offsets(data), chunks):
+            assert data[offset:offset + len(chunk)] == chunk
+        assert not needs_faststart(str(out))
+
+    def test_already_faststart_is_untouched(self, tmp_path):
+        """Test files with moov first produce no temporary copy"""
+        ftyp = box(b'ftyp', b'isom\0\0\0\1isom')
+        moov = build_moov([0])
+        path = tmp_path / 'fast.mp4'
+        path.write_bytes(ftyp + moov + box(b'mdat', b'media'))
+
+        assert not needs_faststart(str(path))
+        assert faststart_copy(str(path)) is None
+
+    def test_non_mp4_is_ignored(self, tmp_path):
+        """Test containers other than ISO-BMFF are skipped"""
+        path = tmp_path / 'clip.mkv'
+        path.write_bytes(b'\x1aE\xdf\xa3' + b'\0' * 32)
+        assert not needs_faststart(str(path))
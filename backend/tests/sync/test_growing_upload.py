@@ -0,0 +1,69 @@
+import hashlib
+import os
+import pytest
+from unittest.mock import MagicMock
+from backend.sync.growing_upload import GrowingFileUpload
+from backend.sync.multipart_uploader import MultipartUploader
+from backend.sync.part_reader import MIN_PART_SIZE
+
+class TestGrowingFileUpload:
+    @pytest.fixture
+    def client(self):
+        """Fixture recording the bytes uploaded for each part number"""
+        client = MagicMock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        client.uploaded = {}
+
+        def upload_part(**kwargs):
+            client.uploaded[kwargs['PartNumber']] = kwargs['Body'].read()
+            return {'ETag': f'"etag-{kwargs["PartNumber"]}"'}
+
+        client.upload_part.side_effect = upload_part
+        client.complete_multipart_upload.return_value = {'ETag': '"final"'}
+        client.copy_object.return_value = {'CopyObjectResult': {'ETag': '"copied"'}}
+        return client
+
+    def test_parts_upload_while_file_grows(self, tmp_path, client):
+        """Test full parts go up during capture and the tail on completion"""
+        path = tmp_path / 'live.mp4'
+        path.write_bytes(os.urandom(MIN_PART_SIZE // 2))
+        upload = GrowingFileUpload(
+            MultipartUploader(client), str(path), 'bucket', 'live.mp4',
+            part_size=MIN_PART_SIZE, stable_seconds=5
+        )
+
+        assert not upload.poll(now=0)
+        assert client.uploaded == {}
+
+        with open(path, 'ab') as f:
+            f.write(os.urandom(MIN_PART_SIZE))
+        assert not upload.poll(now=1)
+        assert list(client.uploaded) == [1]
+
+        assert upload.poll(now=10)
+        data = path.read_bytes()
+        assert client.uploaded[1] + client.uploaded[2] == data
+        assert upload.result['video_hash'] == hashlib.sha256(data).hexdigest()
+        parts = client.complete_multipart_upload.call_args[1]['MultipartUpload']['Parts']
+        assert [p['PartNumber'] for p in parts] == [1, 2]
+
+    def test_rewritten_header_is_uploaded_again(self, tmp_path, client):
+        """Test a recorder patching earlier bytes gets the affected part resent"""
+        path = tmp_path / 'live.mp4'
+        path.write_bytes(os.urandom(MIN_PART_SIZE * 2 + 10))
+        upload = GrowingFileUpload(
+            MultipartUploader(client, hash_metadata=True), str(path), 'bucket', 'live.mp4',
+            part_size=MIN_PART_SIZE, stable_seconds=5, metadata={}
+        )
+        upload.poll(now=0)
+        assert 'UploadDate' in client.create_multipart_upload.call_args[1]['Metadata']
+        first_upload = client.uploaded[1]
+
+        with open(path, 'r+b') as f:
+            f.write(b'moov-size-fixup')
+        upload.finalize()
+
+        data = path.read_bytes()
+        assert client.uploaded[1] != first_upload
+        assert b''.join(client.uploaded[n] for n in sorted(client.uploaded)) == data
+        assert client.copy_object.call_args[1]['Metadata']['VideoHash'] == hashlib.sha256(data).hexdigest()
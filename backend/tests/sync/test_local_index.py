@@ -0,0 +1,85 @@
+import os
+import time
+import threading
+from types import SimpleNamespace
+from backend.sync.local_index import LocalPathIndex
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestLocalPathIndex:
+    def test_builds_and_follows_changes(self, tmp_path):
+        """The walk seeds the set and watchdog events keep it current"""
+        (tmp_path / 'shows').mkdir()
+        (tmp_path / 'shows' / 'a.mp4').write_bytes(b'a')
+        (tmp_path / 'top.mp4').write_bytes(b't')
+
+        index = LocalPathIndex(str(tmp_path)).start()
+        try:
+            assert wait_for(lambda: index.ready)
+            assert index.contains_many(['shows/a.mp4', '/top.mp4', 'missing.mp4']) == {
+                'shows/a.mp4': True, '/top.mp4': True, 'missing.mp4': False
+            }
+
+            (tmp_path / 'shows' / 'b.mp4').write_bytes(b'b')
+            assert wait_for(lambda: index.contains('shows/b.mp4'))
+
+            os.rename(tmp_path / 'shows', tmp_path / 'renamed')
+            assert wait_for(lambda: index.contains('renamed/a.mp4') and not index.contains('shows/a.mp4'))
+
+            os.remove(tmp_path / 'top.mp4')
+            assert wait_for(lambda: not index.contains('top.mp4'))
+        finally:
+            index.stop()
+
+    def test_deletion_during_the_walk_is_not_undone(self, tmp_path):
+        """A file the walk saw but the observer reported deleted stays out of the index"""
+        (tmp_path / 'gone.mp4').write_bytes(b'g')
+        (tmp_path / 'kept.mp4').write_bytes(b'k')
+        index = LocalPathIndex(str(tmp_path))
+        scan = index._scan
+
+        def scan_then_delete(path):
+            keys = scan(path)
+            os.remove(tmp_path / 'gone.mp4')
+            index.remove(str(tmp_path / 'gone.mp4'))
+            return keys
+
+        index._scan = scan_then_delete
+        index._build()
+        assert index.ready
+        assert index.contains_many(['gone.mp4', 'kept.mp4']) == {'gone.mp4': False, 'kept.mp4': True}
+
+class TestLocalIndexLookup:
+    def test_root_is_resolved_once_per_sync_folder(self, tmp_path, monkeypatch):
+        """Repeat lookups reuse the index without touching the filesystem until the folder changes"""
+        from backend.aws.aws_integration import AWSIntegration
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        first.mkdir()
+        second.mkdir()
+        owner = SimpleNamespace(
+            config={'sync_folder': str(first)}, _index_lock=threading.Lock(),
+            _local_index=None, _local_index_for=(None, None)
+        )
+        resolved = []
+        realpath = os.path.realpath
+        monkeypatch.setattr('backend.aws.aws_integration.os.path.realpath',
+                            lambda path: resolved.append(path) or realpath(path))
+        try:
+            index = AWSIntegration.local_index(owner)
+            assert str(first) in resolved
+            resolved.clear()
+            assert all(AWSIntegration.local_index(owner) is index for _ in range(3))
+            assert resolved == []
+
+            owner.config['sync_folder'] = str(second)
+            moved = AWSIntegration.local_index(owner)
+            assert moved is not index and moved.root == realpath(str(second))
+            assert str(second) in resolved
+        finally:
+            owner._local_index.stop()
@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import os
+import pytest
+from unittest.mock import MagicMock
+from backend.sync.part_reader import (
+    MIN_PART_SIZE,
+    MAX_PARTS,
+    BufferedPartSource,
+    MappedPartSource,
+    choose_part_size,
+    open_part_source
+)
+from backend.sync.multipart_uploader import MultipartUploader
+
+class TestPartReader:
+    @pytest.fixture
+    def video_file(self, tmp_path):
+        """Fixture writing a file slightly larger than two minimum-size parts"""
+        data = os.urandom(2 * MIN_PART_SIZE + 1234)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+        return str(path), data
+
+    def test_choose_part_size(self):
+        """Test part sizes respect the S3 minimum and maximum part count"""
+        assert choose_part_size(10, 1) == MIN_PART_SIZE
+        huge = MIN_PART_SIZE * MAX_PARTS * 3
+        assert choose_part_size(huge, MIN_PART_SIZE) * MAX_PARTS >= huge
+
+    @pytest.mark.parametrize('source_class', [MappedPartSource, BufferedPartSource])
+    def test_parts_cover_file(self, video_file, source_class):
+        """Test both sources serve every byte exactly once, in order"""
+        path, data = video_file
+        chunks = []
+        with source_class(path, MIN_PART_SIZE) as source:
+            for part in source:
+                assert part.offset == sum(len(c) for c in chunks)
+                chunks.append(part.stream.read())
+                part.release()
+        assert [len(c) for c in chunks] == [MIN_PART_SIZE, MIN_PART_SIZE, 1234]
+        assert b''.join(chunks) == data
+
+    def test_part_stream_is_seekable(self, video_file):
+        """Test a part can be rewound, as botocore does on retries"""
+        path, data = video_file
+        with MappedPartSource(path, MIN_PART_SIZE) as source:
+            part = next(iter(source))
+            assert part.stream.read(10) == data[:10]
+            part.stream.seek(0)
+            buffer = bytearray(4)
+            assert part.stream.readinto(buffer) == 4
+            assert bytes(buffer) == data[:4]
+            part.stream.seek(0, os.SEEK_END)
+            assert part.stream.tell() == len(part.stream) == MIN_PART_SIZE
+            part.release()
+
+    def test_buffered_source_reuses_buffers(self, video_file):
+        """Test the buffered source recycles its pool instead of allocating"""
+        path, _ = video_file
+        with BufferedPartSource(path, MIN_PART_SIZE, max_in_flight=1) as source:
+            buffers = set()
+            for part in source:
+                buffers.add(id(part.stream.view.obj))
+                part.release()
+        assert len(buffers) == 1
+
+    def test_empty_file_falls_back_to_buffers(self, tmp_path):
+        """Test files that cannot be memory-mapped still produce a source"""
+        path = tmp_path / 'empty.mp4'
+        path.write_bytes(b'')
+        with open_part_source(str(path), MIN_PART_SIZE) as source:
+            assert isinstance(source, BufferedPartSource)
+            assert list(source) == []
+
+class TestMultipartUploader:
+    def test_multipart_upload(self, tmp_path):
+        """Test large files are sent as parts and completed in order"""
+        data = os.urandom(MIN_PART_SIZE * 2 + 10)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+
+        client = MagicMock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        received = {}
+
+        def upload_part(**kwargs):
+            received[kwargs['PartNumber']] = kwargs['Body'].read()
+            return {'ETag': f'"etag-{kwargs["PartNumber"]}"'}
+
+        client.upload_part.side_effect = upload_part
+        client.complete_multipart_upload.return_value = {'ETag': '"final"'}
+        progress = []
+
+        uploader = MultipartUploader(client, part_size=MIN_PART_SIZE, max_concurrency=2)
+        result = uploader.upload_file(str(path), 'bucket', 'clip.mp4', callback=progress.append)
+
+        assert result['etag'] == '"final"'
+        assert result['video_hash'] == hashlib.sha256(data).hexdigest()
+        assert b''.join(received[n] for n in sorted(received)) == data
+        assert sum(progress) == len(data)
+        parts = client.complete_multipart_upload.call_args[1]['MultipartUpload']['Parts']
+        assert [p['PartNumber'] for p in parts] == [1, 2, 3]
+
+    def test_failed_part_aborts_upload(self, tmp_path):
+        """Test a failing part aborts the multipart upload"""
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(os.urandom(MIN_PART_SIZE * 2))
+
+        client = MagicMock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        client.upload_part.side_effect = RuntimeError('network down')
+
+        uploader = MultipartUploader(client, part_size=MIN_PART_SIZE, max_concurrency=1)
+        with pytest.raises(RuntimeError):
+            uploader.upload_file(str(path), 'bucket', 'clip.mp4')
+
+        client.abort_multipart_upload.assert_called_once_with(
+            Bucket='bucket', Key='clip.mp4', UploadId='upload-1'
+        )
+        client.complete_multipart_upload.assert_not_called()
+
+    def test_small_file_single_put(self, tmp_path):
+        """Test files below one part size use a single PUT"""
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(b'tiny')
+        client = MagicMock()
+        client.put_object.return_value = {'ETag': '"small"'}
+
+        result = MultipartUploader(client).upload_file(
+            str(path), 'bucket', 'clip.mp4', metadata={'OriginalName': 'clip.mp4'}
+        )
+        assert result['etag'] == '"small"'
+        client.create_multipart_upload.assert_not_called()
+        assert client.put_object.call_args[1]['Metadata'] == {
+            'OriginalName': 'clip.mp4',
+            'VideoHash': hashlib.sha256(b'tiny').hexdigest()
+        }
+
+    def test_multipart_metadata_is_declared_up_front(self, tmp_path):
+        """Test metadata goes with the upload and no copy follows unless asked for"""
+        data = os.urandom(MIN_PART_SIZE + 100)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+        client = MagicMock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        client.upload_part.side_effect = lambda **kwargs: {'ETag': f'"etag-{kwargs["PartNumber"]}"'}
+        client.complete_multipart_upload.return_value = {'ETag': '"done"'}
+
+        result = MultipartUploader(client, part_size=MIN_PART_SIZE).upload_file(
+            str(path), 'bucket', 'clip.mp4', metadata={'OriginalName': 'clip.mp4'}
+        )
+        assert client.create_multipart_upload.call_args[1]['Metadata'] == {'OriginalName': 'clip.mp4'}
+        client.copy_object.assert_not_called()
+        assert result['etag'] == '"done"'
+        assert result['video_hash'] == hashlib.sha256(data).hexdigest()
+
+    def test_part_checksums_and_video_hash(self, tmp_path):
+        """Test parts carry SHA256 checksums and the digest is stored afterwards"""
+        data = os.urandom(MIN_PART_SIZE + 100)
+        path = tmp_path / 'clip.mp4'
+        path.write_bytes(data)
+
+        client = MagicMock()
+        client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        client.upload_part.side_effect = lambda **kwargs: {'ETag': f'"etag-{kwargs["PartNumber"]}"'}
+        client.copy_object.return_value = {'CopyObjectResult': {'ETag': '"copied"'}}
+
+        uploader = MultipartUploader(client, part_size=MIN_PART_SIZE, checksum_algorithm='sha256',
+                                     hash_metadata=True)
+        result = uploader.upload_file(str(path), 'bucket', 'clip.mp4', metadata={'OriginalName': 'clip.mp4'})
+
+        assert client.create_multipart_upload.call_args[1]['ChecksumAlgorithm'] == 'SHA256'
+        parts = client.complete_multipart_upload.call_args[1]['MultipartUpload']['Parts']
+        expected = base64.b64encode(hashlib.sha256(data[:MIN_PART_SIZE]).digest()).decode()
+        assert parts[0]['ChecksumSHA256'] == expected
+
+        copy_args = client.copy_object.call_args[1]
+        assert copy_args['MetadataDirective'] == 'REPLACE'
+        assert copy_args['Metadata']['VideoHash'] == hashlib.sha256(data).hexdigest()
+        assert result['etag'] == '"copied"'